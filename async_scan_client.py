@@ -0,0 +1,283 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║              🛡️ SUBMIT-THEN-POLL (ASYNC) SECURITY SCANNING                  ║
+# ║  ⚠️  CRITICAL: THIS IS 100% SECURITY - NO CHATBOT FUNCTIONALITY HERE!     ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • For bulk / non-interactive work: many prompts, verdicts later          ║
+# ║  • Groups prompts into batches for /v1/scan/async/request                 ║
+# ║  • One background thread polls /v1/scan/results?scan_ids=... for ALL      ║
+# ║    outstanding scans together, a few scan IDs per query                   ║
+# ║  • Every prompt gets a Future (and an optional callback) that completes   ║
+# ║    with the same verdict dict the sync scan returns                       ║
+# ║                                                                            ║
+# ║  Interactive chat should keep using the sync scan: async scans trade      ║
+# ║  latency for throughput.                                                  ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, InvalidStateError
+
+import json_codec
+from chatbot_settings import get_settings
+from http_session import get_http_session
+
+ASYNC_SUBMIT_PATH = "/v1/scan/async/request"
+RESULTS_PATH = "/v1/scan/results"
+MAX_SCAN_IDS_PER_QUERY = 5   # the results API accepts at most 5 scan IDs per call
+
+
+class AsyncScanError(Exception):
+    """🚨 An async scan could not be submitted, failed, or never completed."""
+
+
+class _Pending:
+    __slots__ = ("future", "submitted_at")
+
+    def __init__(self, future):
+        self.future = future
+        self.submitted_at = time.monotonic()
+
+
+def _settle(future, result=None, error=None):
+    """Complete `future` unless the caller already cancelled it."""
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass  # cancelled between the check and here
+
+
+class AsyncScanClient:
+    """
+    🚀 BATCHING, POLLING CLIENT FOR THE AIRS ASYNC SCAN API
+
+    Usage:
+
+        with AsyncScanClient(api_key, profile_name) as client:
+            futures = [client.submit(p) for p in prompts]
+            verdicts = [f.result() for f in futures]
+
+    Settings (read when each batch is formed / each poll runs):
+    - ASYNC_SCAN_BATCH_SIZE: prompts per submission (max 25)
+    - ASYNC_SCAN_BATCH_WAIT_MS: how long a partial batch waits for more prompts
+    - ASYNC_SCAN_POLL_INTERVAL_MS: pause between result polls
+    - ASYNC_SCAN_TIMEOUT_SECONDS: a prompt still pending after this fails
+    """
+
+    def __init__(self, api_key, profile_name, base_url=None):
+        self.api_key = api_key
+        self.profile_name = profile_name
+        self.base_url = (base_url or get_settings().panw_ai_sec_endpoint).rstrip("/")
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "x-pan-token": api_key,
+        }
+        self._ai_profile = {"profile_name": profile_name}
+        self._queue = []          # [(request_data, future, queued_at)] waiting to be batched
+        self._outstanding = {}    # scan_id -> {req_id: _Pending}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 📊 Counters
+        self.batches_submitted = 0
+        self.result_queries = 0
+
+        self._thread = threading.Thread(target=self._run, name="airs-async-scan", daemon=True)
+        self._thread.start()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📥 PUBLIC API
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def submit(self, prompt, callback=None):
+        """
+        📤 Queue one prompt for scanning and return a concurrent.futures.Future.
+
+        The future's result is the AIRS verdict dict. callback(future), if
+        given, runs on the polling thread when the scan finishes - keep it short.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        request_data = {
+            "tr_id": str(uuid.uuid4()),
+            "ai_profile": self._ai_profile,
+            "contents": [{"prompt": prompt}],
+        }
+        with self._cond:
+            if self._closed:
+                raise AsyncScanError("AsyncScanClient is closed")
+            self._queue.append((request_data, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def scan_many(self, prompts, timeout=None):
+        """📦 Scan many prompts; returns verdicts in the same order (raises on failure)."""
+        futures = [self.submit(prompt) for prompt in prompts]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def outstanding(self):
+        """Prompts queued or submitted but not finished yet."""
+        with self._cond:
+            return len(self._queue) + sum(len(reqs) for reqs in self._outstanding.values())
+
+    def close(self, wait=True):
+        """
+        🔒 Stop accepting prompts. With wait=True, finish every outstanding
+        scan first; otherwise fail them with AsyncScanError.
+        """
+        with self._cond:
+            self._closed = True
+            if not wait:
+                self._fail_all(AsyncScanError("AsyncScanClient closed before the scan finished"))
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # ⚙️ BACKGROUND SCHEDULER
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # One thread alternates between two jobs:
+    #   1. submit queued prompts as soon as a batch is full (or has waited long enough)
+    #   2. every poll interval, ask for the results of all outstanding scan IDs
+
+    def _run(self):
+        next_poll = time.monotonic()
+        while True:
+            settings = get_settings()
+            batch_size = settings.async_scan_batch_size
+            batch_wait = settings.async_scan_batch_wait_ms / 1000
+            poll_interval = settings.async_scan_poll_interval_ms / 1000
+
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._closed and not self._queue and not self._outstanding:
+                        return
+                    batch_due = self._queue and (
+                        len(self._queue) >= batch_size or self._closed
+                        or now - self._queue[0][2] >= batch_wait)
+                    poll_due = self._outstanding and now >= next_poll
+                    if batch_due or poll_due:
+                        break
+                    deadlines = []
+                    if self._queue:
+                        deadlines.append(self._queue[0][2] + batch_wait)
+                    if self._outstanding:
+                        deadlines.append(next_poll)
+                    self._cond.wait(max(0.0, min(deadlines) - now) if deadlines else None)
+                batch = self._queue[:batch_size] if batch_due else []
+                del self._queue[:len(batch)]
+
+            # One bad batch or result must never stop the thread: every other
+            # pending Future would then wait forever
+            try:
+                if batch:
+                    self._submit_batch(batch)
+                    if next_poll < time.monotonic():
+                        next_poll = time.monotonic() + poll_interval
+                if poll_due:
+                    self._poll(settings.async_scan_timeout_seconds)
+            except Exception as e:
+                print(f"⚠️ Async scan scheduler error: {e}")
+            if poll_due:
+                next_poll = time.monotonic() + poll_interval
+
+    def _submit_batch(self, batch):
+        payload = [{"req_id": req_id, "scan_req": request_data}
+                   for req_id, (request_data, _, _) in enumerate(batch, start=1)]
+        try:
+            response = get_http_session().post(
+                f"{self.base_url}{ASYNC_SUBMIT_PATH}", headers=self.headers,
+                data=json_codec.dumps(payload), timeout=get_settings().http_timeout)
+            if response.status_code != 200:
+                raise AsyncScanError(
+                    f"Async submit failed: HTTP {response.status_code}: {response.text[:200]}")
+            scan_id = json_codec.loads(response.content)["scan_id"]
+        except Exception as e:
+            error = e if isinstance(e, AsyncScanError) else AsyncScanError(f"Async submit failed: {e}")
+            for _, future, _ in batch:
+                _settle(future, error=error)
+            return
+        with self._cond:
+            self._outstanding[scan_id] = {
+                req_id: _Pending(future) for req_id, (_, future, _) in enumerate(batch, start=1)}
+            self.batches_submitted += 1
+            self._cond.notify()
+
+    def _poll(self, timeout_seconds):
+        with self._cond:
+            scan_ids = list(self._outstanding)
+        for start in range(0, len(scan_ids), MAX_SCAN_IDS_PER_QUERY):
+            group = scan_ids[start:start + MAX_SCAN_IDS_PER_QUERY]
+            try:
+                response = get_http_session().get(
+                    f"{self.base_url}{RESULTS_PATH}", headers=self.headers,
+                    params={"scan_ids": ",".join(group)}, timeout=get_settings().http_timeout)
+                self.result_queries += 1
+                if response.status_code != 200:
+                    print(f"⚠️ Async result poll failed: HTTP {response.status_code}")
+                    continue
+                results = json_codec.loads(response.content)
+            except Exception as e:
+                print(f"⚠️ Async result poll failed: {e}")  # try again next interval
+                continue
+            self._resolve(results)
+        self._expire(timeout_seconds)
+
+    def _resolve(self, results):
+        finished = []
+        with self._cond:
+            for entry in results:
+                if entry.get("status") != "complete":
+                    continue
+                requests_for_scan = self._outstanding.get(entry.get("scan_id"))
+                if requests_for_scan is None:
+                    continue
+                pending = requests_for_scan.pop(entry.get("req_id"), None)
+                if pending is not None:
+                    finished.append((pending.future, entry.get("result")))
+                if not requests_for_scan:
+                    del self._outstanding[entry["scan_id"]]
+        # Futures are completed outside the lock: callbacks may call submit()
+        for future, result in finished:
+            if result is None:
+                _settle(future, error=AsyncScanError("Async scan completed without a result"))
+            else:
+                _settle(future, result=result)
+
+    def _expire(self, timeout_seconds):
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            for scan_id in list(self._outstanding):
+                requests_for_scan = self._outstanding[scan_id]
+                for req_id in [r for r, p in requests_for_scan.items()
+                               if now - p.submitted_at > timeout_seconds]:
+                    expired.append(requests_for_scan.pop(req_id).future)
+                if not requests_for_scan:
+                    del self._outstanding[scan_id]
+        for future in expired:
+            _settle(future, error=AsyncScanError(
+                f"Async scan still pending after {timeout_seconds:g}s"))
+
+    def _fail_all(self, error):
+        # Caller holds self._cond
+        futures = [future for _, future, _ in self._queue]
+        futures += [p.future for reqs in self._outstanding.values() for p in reqs.values()]
+        self._queue.clear()
+        self._outstanding.clear()
+        for future in futures:
+            _settle(future, error=error)
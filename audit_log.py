@@ -0,0 +1,344 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 📜 APPEND-ONLY AUDIT LOG OF SECURITY SCANS                  ║
+# ║  🛡️ SECURITY COMPONENT: a durable record of every scan verdict            ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Records one line per scan: tr_id, verdict, threat flags, latencies     ║
+# ║    and a HASH of the prompt - never the prompt text itself                ║
+# ║  • record() only appends to an in-memory queue, so scans never wait on    ║
+# ║    the disk; a background thread writes batches through a large buffer    ║
+# ║  • fsync every AUDIT_FSYNC_INTERVAL_SECONDS bounds what a crash can lose  ║
+# ║  • Segment files are append-only and never reopened; a segment is closed  ║
+# ║    when it reaches AUDIT_SEGMENT_MAX_BYTES or AUDIT_SEGMENT_MAX_SECONDS   ║
+# ║    and then gzip-compressed                                               ║
+# ║  • If the queue is full (disk too slow) records are DROPPED and counted   ║
+# ║    (audit_dropped_total) rather than slowing down chat traffic           ║
+# ║                                                                            ║
+# ║  Files: AUDIT_DIR/audit-<start time>-<pid>-<n>.jsonl[.gz], one JSON       ║
+# ║  object per line; read them back with iter_records().                     ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import atexit
+import gzip
+import hashlib
+import hmac
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import json_codec
+import metrics
+from chatbot_settings import get_settings
+
+BATCH_WAKE_RECORDS = 1000      # wake the writer early once this many records wait
+WRITE_BUFFER_BYTES = 1 << 20   # file buffer; the writer flushes it on every fsync
+
+
+def prompt_hash(prompt):
+    """
+    #️⃣ Stable fingerprint of a prompt for the audit trail.
+
+    HMAC-SHA256 with AUDIT_HASH_KEY when it is set (so short prompts cannot
+    be guessed by hashing candidates), plain SHA-256 otherwise.
+    """
+    data = prompt.encode("utf-8", "surrogatepass")
+    key = get_settings().audit_hash_key
+    if key:
+        return hmac.new(key.encode("utf-8"), data, hashlib.sha256).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+def scan_record(tr_id, profile, prompt, verdict, scan_ms, source, error=None, **latencies):
+    """
+    📝 Build one audit record from a scan verdict (None = the scan failed).
+
+    Extra keyword arguments are latencies in milliseconds, e.g. queue_wait_ms.
+    """
+    verdict = verdict or {}
+    prompt_detected = verdict.get("prompt_detected") or {}
+    response_detected = verdict.get("response_detected") or {}
+    record = {
+        "ts": time.time(),
+        "tr_id": tr_id,
+        "report_id": verdict.get("report_id"),
+        "scan_id": verdict.get("scan_id"),
+        "profile": profile,
+        "source": source,
+        "action": verdict.get("action", "error"),
+        "category": verdict.get("category"),
+        "prompt_detected": prompt_detected,
+        "response_detected": response_detected,
+        "threats": ([f"prompt.{name}" for name, hit in prompt_detected.items() if hit]
+                    + [f"response.{name}" for name, hit in response_detected.items() if hit]),
+        "prompt_hash": prompt_hash(prompt),
+        "prompt_chars": len(prompt),
+        "scan_ms": round(scan_ms, 3),
+    }
+    for name, value in latencies.items():
+        if value is not None:
+            record[name] = round(value, 3)
+    if verdict.get("verdict_reused"):
+        record["reused"] = True
+    if verdict.get("chunks_scanned"):
+        record["chunks"] = verdict["chunks_scanned"]
+    if error is not None:
+        record["error"] = str(error)[:200]
+    return record
+
+
+class AuditSink:
+    """
+    📜 BATCHING, ROTATING, APPEND-ONLY WRITER
+
+    Settings:
+    - AUDIT_DIR: where segments are written (default logs/audit)
+    - AUDIT_FLUSH_INTERVAL_MS: how often queued records are written
+    - AUDIT_FSYNC_INTERVAL_SECONDS: how often written data is forced to disk
+    - AUDIT_SEGMENT_MAX_BYTES / AUDIT_SEGMENT_MAX_SECONDS: rotation limits
+    - AUDIT_COMPRESS: gzip closed segments
+    - AUDIT_QUEUE_MAX: records held in memory before new ones are dropped
+    """
+
+    def __init__(self, directory=None):
+        settings = get_settings()
+        self.directory = Path(directory or settings.audit_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.queue_max = settings.audit_queue_max
+        self.records_written = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._file = None
+        self._path = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+        self._last_fsync = 0.0
+        self._sequence = 0
+        self._compressors = []
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # ⚡ REQUEST PATH
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def record(self, record):
+        """⚡ Queue one record for writing; never blocks on I/O. Returns False if dropped."""
+        with self._cond:
+            if self._closing or len(self._queue) >= self.queue_max:
+                self.dropped += 1
+                metrics.inc("audit_dropped_total")
+                return False
+            self._queue.append(record)
+            if len(self._queue) == BATCH_WAKE_RECORDS:
+                self._cond.notify()
+        return True
+
+    def pending(self):
+        return len(self._queue)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # ✍️ WRITER THREAD
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._queue) < BATCH_WAKE_RECORDS and not self._closing:
+                    self._cond.wait(get_settings().audit_flush_interval_ms / 1000)
+                batch = list(self._queue)
+                self._queue.clear()
+                closing = self._closing
+            try:
+                if batch:
+                    self._write(batch)
+                self._maybe_sync_and_rotate(force_sync=closing)
+            except Exception as e:
+                # ⚠️ Whatever happens, the writer keeps running (and close() still finishes)
+                metrics.inc("audit_write_errors_total")
+                print(f"⚠️  Audit log writer error: {e}")
+            if closing and not self._queue:
+                self._close_segment()
+                return
+
+    def _encode(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json_codec.dumps(record) + b"\n")
+            except Exception as e:
+                # 🚫 One record that cannot be encoded is dropped, not the batch
+                self.dropped += 1
+                metrics.inc("audit_dropped_total")
+                metrics.inc("audit_encode_errors_total")
+                print(f"⚠️  Audit record could not be encoded: {e}")
+        return lines
+
+    def _write(self, batch):
+        start = time.monotonic()
+        lines = self._encode(batch)
+        if not lines:
+            return
+        data = b"".join(lines)
+        try:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(data)
+        except OSError as e:
+            # ⚠️ Disk trouble must not take the chatbot down; count and carry on.
+            # The segment is closed (and compressed) as it is; the next batch
+            # starts a new one.
+            self.dropped += len(lines)
+            metrics.inc("audit_dropped_total", len(lines))
+            metrics.inc("audit_write_errors_total")
+            print(f"⚠️  Audit log write failed ({self._path}): {e}")
+            self._close_segment()
+            return
+        self._segment_bytes += len(data)
+        self.records_written += len(lines)
+        metrics.inc("audit_records_total", len(lines))
+        metrics.observe("audit_batch_records", len(lines))
+        metrics.observe("audit_write_ms", (time.monotonic() - start) * 1000)
+        metrics.set_gauge("audit_queue_depth", len(self._queue))
+
+    def _open_segment(self):
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        self._path = self.directory / f"audit-{stamp}-{os.getpid()}-{self._sequence:04d}.jsonl"
+        # "xb": a segment is only ever created fresh, never reopened or overwritten
+        self._file = open(self._path, "xb", buffering=WRITE_BUFFER_BYTES)
+        self._segment_bytes = 0
+        self._segment_started = time.monotonic()
+
+    def _maybe_sync_and_rotate(self, force_sync=False):
+        if self._file is None:
+            return
+        settings = get_settings()
+        now = time.monotonic()
+        if force_sync or now - self._last_fsync >= settings.audit_fsync_interval_seconds:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                metrics.inc("audit_write_errors_total")
+                print(f"⚠️  Audit log fsync failed ({self._path}): {e}")
+            self._last_fsync = now
+        if (self._segment_bytes >= settings.audit_segment_max_bytes
+                or now - self._segment_started >= settings.audit_segment_max_seconds):
+            self._close_segment()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        segment, closed = self._file, self._path
+        self._file = self._path = None
+        try:
+            segment.flush()
+            os.fsync(segment.fileno())
+        except OSError:
+            metrics.inc("audit_write_errors_total")
+        try:
+            segment.close()  # retries a failed flush; the handle is released either way
+        except OSError:
+            pass
+        metrics.inc("audit_segments_total")
+        if get_settings().audit_compress:
+            # Compress off the writer thread so the next batch is not delayed
+            compressor = threading.Thread(target=compress_segment, args=(closed,),
+                                          name="audit-compress", daemon=True)
+            compressor.start()
+            self._compressors = [t for t in self._compressors if t.is_alive()] + [compressor]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🔒 SHUTDOWN
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def close(self, timeout=10):
+        """🔒 Write everything queued, fsync, close (and compress) the segment."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        for compressor in self._compressors:
+            compressor.join(timeout)
+
+
+def compress_segment(path):
+    """🗜️ gzip a closed segment: write .gz.tmp, rename, then remove the original."""
+    path = Path(path)
+    target = path.with_name(path.name + ".gz")
+    temporary = path.with_name(path.name + ".gz.tmp")
+    try:
+        with open(path, "rb") as source, gzip.open(temporary, "wb", compresslevel=6) as sink:
+            shutil.copyfileobj(source, sink, WRITE_BUFFER_BYTES)
+        os.replace(temporary, target)
+        path.unlink()
+    except OSError as e:
+        metrics.inc("audit_write_errors_total")
+        print(f"⚠️  Could not compress audit segment {path}: {e}")
+
+
+def iter_records(directory=None):
+    """
+    📖 Yield every audit record in `directory`, oldest segment first.
+
+    Reads plain and gzip-compressed segments one line at a time, so memory
+    stays flat however large the history is. A torn last line (crash while
+    writing) is skipped.
+    """
+    directory = Path(directory or get_settings().audit_dir)
+    segments = sorted(p for p in directory.glob("audit-*.jsonl*") if not p.name.endswith(".tmp"))
+    for segment in segments:
+        opener = gzip.open if segment.suffix == ".gz" else open
+        try:
+            with opener(segment, "rb") as f:
+                for line in f:
+                    try:
+                        yield json_codec.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue  # compressed and removed while we were listing
+
+
+_sink = None
+_sink_failed = False
+_sink_lock = threading.Lock()
+
+
+def get_audit_sink():
+    """📜 The process-wide AuditSink, or None when AUDIT_ENABLED is false."""
+    global _sink, _sink_failed
+    if _sink is None:
+        if _sink_failed or not get_settings().audit_enabled:
+            return None
+        with _sink_lock:
+            if _sink is None and not _sink_failed:
+                try:
+                    _sink = AuditSink()
+                except OSError as e:
+                    _sink_failed = True  # say it once, not on every scan
+                    print(f"⚠️  Audit log disabled: cannot use {get_settings().audit_dir}: {e}")
+                    return None
+                atexit.register(_sink.close)
+    return _sink
+
+
+def close_audit_sink(timeout=10):
+    """🔒 Flush, fsync and close the process-wide sink; the next scan opens a new one."""
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close(timeout)
+
+
+def record_scan(tr_id, profile, prompt, verdict, scan_ms, source, error=None, **latencies):
+    """⚡ Audit one scan (no-op when auditing is off). Cheap enough for the request path."""
+    sink = get_audit_sink()
+    if sink is not None:
+        sink.record(scan_record(tr_id, profile, prompt, verdict, scan_ms, source, error, **latencies))
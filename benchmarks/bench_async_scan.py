@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+📦 ASYNC SCAN BENCHMARK - BULK THROUGHPUT, SYNC vs SUBMIT-THEN-POLL
+==================================================================
+
+Scans the same set of prompts against the local AIRS stand-in two ways:
+
+- sync:  scan_prompt_with_paloalto_api() from SCAN_CONCURRENCY worker threads
+- async: async_scan_client.AsyncScanClient (batched submits, coalesced polls)
+
+and reports prompts per second plus the number of HTTP requests each needed.
+No credentials or network access are required. Run from the repository root:
+
+    python3 benchmarks/bench_async_scan.py [--prompts 500] [--latency-ms 50]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_scan_client import AsyncScanClient  # noqa: E402
+from chatbot_settings import get_settings  # noqa: E402
+from local_standins import LocalAIRSStandIn  # noqa: E402
+from secure_chatbot_openai_api import scan_prompt_with_paloalto_api  # noqa: E402
+
+API_KEY, PROFILE_NAME = "benchmark-key", "benchmark-profile"
+
+
+def run_sync(prompts, base_url, workers):
+    def scan(prompt):
+        with contextlib.redirect_stdout(io.StringIO()):  # the scan prints progress lines
+            return scan_prompt_with_paloalto_api(prompt, API_KEY, PROFILE_NAME, base_url=base_url)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(scan, prompts))
+
+
+def run_async(prompts, base_url):
+    with AsyncScanClient(API_KEY, PROFILE_NAME, base_url=base_url) as client:
+        return client.scan_many(prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompts", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50.0,
+                        help="stand-in latency per HTTP request")
+    parser.add_argument("--async-delay-ms", type=float, default=200.0,
+                        help="time before an async scan reports complete")
+    args = parser.parse_args()
+
+    prompts = [f"Summarize ticket #{i} for the support team" for i in range(args.prompts)]
+    workers = get_settings().scan_concurrency
+
+    print("📦 ASYNC SCAN BENCHMARK")
+    print("=" * 60)
+    print(f"Prompts: {args.prompts}   Stand-in latency: {args.latency_ms:g} ms   "
+          f"Sync workers: {workers}")
+    print("=" * 60)
+
+    with LocalAIRSStandIn(latency_ms=args.latency_ms, async_delay_ms=args.async_delay_ms) as airs:
+        start = time.perf_counter()
+        run_sync(prompts, airs.base_url, workers)
+        sync_seconds = time.perf_counter() - start
+        sync_requests = airs.requests_served
+        print(f"{'sync (' + str(workers) + ' threads)':<24} {args.prompts / sync_seconds:9.1f} prompts/s"
+              f"   {sync_requests:6d} HTTP requests")
+
+        start = time.perf_counter()
+        run_async(prompts, airs.base_url)
+        async_seconds = time.perf_counter() - start
+        async_requests = airs.requests_served - sync_requests
+        print(f"{'async (batched)':<24} {args.prompts / async_seconds:9.1f} prompts/s"
+              f"   {async_requests:6d} HTTP requests"
+              f" ({airs.async_submissions} submits, {airs.result_queries} polls)")
+
+    print("=" * 60)
+    print(f"Speed-up: {sync_seconds / async_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
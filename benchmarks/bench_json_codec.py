@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+⚡ JSON SERIALIZER BENCHMARK - PER-REQUEST CPU COST OF A SECURITY SCAN
+=====================================================================
+
+Compares the CPU time spent building, encoding and decoding one AIRS scan
+round-trip:
+
+- baseline: dict built per request + json.dumps() + json.loads() (the old path)
+- codec:    json_codec.ScanRequestEncoder + json_codec.loads() for every
+            installed backend (orjson / ujson / stdlib)
+
+No network calls are made. Run from the repository root:
+
+    python3 benchmarks/bench_json_codec.py [--iterations 20000] [--prompt-chars 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec  # noqa: E402
+
+# 📄 A response shaped like a real /v1/scan/sync/request answer
+SAMPLE_RESPONSE = json.dumps({
+    "action": "allow",
+    "category": "benign",
+    "profile_id": "00000000-0000-0000-0000-000000000000",
+    "profile_name": "benchmark-profile",
+    "prompt_detected": {"dlp": False, "injection": False, "url_cats": False,
+                        "toxic_content": False, "malicious_code": False, "agent": False},
+    "response_detected": {"dlp": False, "url_cats": False, "db_security": False},
+    "report_id": "R00000000-0000-0000-0000-000000000000",
+    "scan_id": "00000000-0000-0000-0000-000000000000",
+    "tr_id": "00000000-0000-0000-0000-000000000000",
+}).encode("utf-8")
+
+
+def baseline_round_trip(prompt, api_key, profile_name):
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "x-pan-token": api_key,
+    }
+    payload = {
+        "tr_id": str(uuid.uuid4()),
+        "ai_profile": {"profile_name": profile_name},
+        "contents": [{"prompt": prompt}],
+    }
+    body = json.dumps(payload).encode("utf-8")  # bytes on the wire either way
+    result = json.loads(SAMPLE_RESPONSE.decode("utf-8"))
+    return headers, body, result
+
+
+def codec_round_trip(encoder, prompt):
+    body = encoder.encode(str(uuid.uuid4()), [{"prompt": prompt}])
+    result = json_codec.loads(SAMPLE_RESPONSE)
+    return encoder.headers, body, result
+
+
+def measure(func, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6  # µs of CPU per request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--prompt-chars", type=int, default=500)
+    args = parser.parse_args()
+
+    prompt = ("What is the weather like today? " * (args.prompt_chars // 32 + 1))[:args.prompt_chars]
+    api_key, profile_name = "benchmark-key", "benchmark-profile"
+
+    print("⚡ JSON SERIALIZER BENCHMARK")
+    print("=" * 60)
+    print(f"Iterations: {args.iterations}   Prompt size: {len(prompt)} characters")
+    print(f"Installed backends: {', '.join(json_codec.available_backends())}")
+    print("=" * 60)
+
+    baseline = measure(lambda: baseline_round_trip(prompt, api_key, profile_name), args.iterations)
+    print(f"{'baseline (json.dumps/json.loads)':<36} {baseline:8.2f} µs CPU/request")
+
+    default_backend = json_codec.get_backend()
+    try:
+        for backend in json_codec.available_backends():
+            json_codec.set_backend(backend)
+            encoder = json_codec.ScanRequestEncoder(profile_name, api_key)
+            cost = measure(lambda: codec_round_trip(encoder, prompt), args.iterations)
+            saved = baseline - cost
+            print(f"{'codec/' + backend:<36} {cost:8.2f} µs CPU/request"
+                  f"   saved {saved:7.2f} µs ({saved / baseline * 100:5.1f}%)")
+    finally:
+        json_codec.set_backend(default_backend)
+
+    print("=" * 60)
+    print(f"Default backend: {default_backend}")
+
+
+if __name__ == "__main__":
+    main()
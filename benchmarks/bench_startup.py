@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+🚀 STARTUP BENCHMARK - IMPORT TIME AND TIME TO FIRST SCAN
+=========================================================
+
+Starts each chatbot entry point in a fresh Python process and measures:
+
+- import:      time to import the module (what every CLI run / worker spawn pays)
+- first scan:  time from process start until the first security scan returns
+- process:     total wall time of the child process, interpreter start included
+
+Scans go to a local HTTPS AIRS stand-in (local_standins.py, needs the openssl
+command-line tool), so no credentials or network access are needed. Each
+entry point is run several times and the median is reported.
+
+Track results over releases by recording them with a label:
+
+    python3 benchmarks/bench_startup.py --record v1.2.0
+
+Recorded runs are appended to benchmarks/startup_history.jsonl and every run
+is compared with the most recent recorded one.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_FILE = os.path.join(REPO_ROOT, "benchmarks", "startup_history.jsonl")
+
+sys.path.insert(0, REPO_ROOT)
+
+from local_standins import LocalAIRSStandIn  # noqa: E402
+
+# 🧪 Code run in each child process; prints one JSON result line at the end
+CHILD_CODE = r"""
+import json, sys, time
+t_start = time.perf_counter()
+entry_point, base_url = sys.argv[1], sys.argv[2]
+if entry_point == "api":
+    import secure_chatbot_openai_api as module
+    t_import = time.perf_counter()
+    module.scan_prompt_with_paloalto_api(
+        "What is the weather today?", "bench-key", "bench-profile", base_url=base_url)
+else:
+    import secure_chatbot_openai_sdk as module
+    t_import = time.perf_counter()
+    scanner = module.SDKSecurityScanner(
+        "bench-key", "bench-profile", api_endpoint=base_url, num_retries=0)
+    scanner.sync_scan("What is the weather today?")
+t_scan = time.perf_counter()
+print("BENCH_RESULT " + json.dumps({
+    "import_ms": (t_import - t_start) * 1000,
+    "first_scan_ms": (t_scan - t_start) * 1000,
+}))
+"""
+
+ENTRY_POINTS = ("api", "sdk")
+
+
+def run_child(entry_point, airs, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, REQUESTS_CA_BUNDLE=airs.ca_bundle)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE, entry_point, airs.base_url],
+        cwd=workdir,  # empty directory: no .env file is picked up
+        env=env, capture_output=True, text=True,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    for line in completed.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            result = json.loads(line[len("BENCH_RESULT "):])
+            result["process_ms"] = process_ms
+            return result
+    raise RuntimeError(
+        f"{entry_point} child failed (exit {completed.returncode}):\n"
+        f"{completed.stdout[-2000:]}\n{completed.stderr[-2000:]}")
+
+
+def load_last_record():
+    if not os.path.exists(HISTORY_FILE):
+        return None
+    last = None
+    with open(HISTORY_FILE) as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for both entry points")
+    parser.add_argument("--runs", type=int, default=7, help="runs per entry point (median reported)")
+    parser.add_argument("--entry-point", choices=ENTRY_POINTS, action="append",
+                        help="limit to one entry point (repeatable)")
+    parser.add_argument("--record", metavar="RELEASE",
+                        help="append the results to startup_history.jsonl under this label")
+    args = parser.parse_args()
+
+    entry_points = args.entry_point or list(ENTRY_POINTS)
+    previous = load_last_record()
+    results = {}
+
+    print("🚀 STARTUP BENCHMARK")
+    print("=" * 72)
+    with LocalAIRSStandIn(tls=True) as airs, tempfile.TemporaryDirectory() as workdir:
+        for entry_point in entry_points:
+            try:
+                runs = [run_child(entry_point, airs, workdir) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"⚠️  {entry_point}: skipped ({str(e).splitlines()[0]})")
+                continue
+            results[entry_point] = {
+                key: statistics.median(run[key] for run in runs)
+                for key in ("import_ms", "first_scan_ms", "process_ms")
+            }
+
+    print(f"{'entry point':<12} {'import':>12} {'first scan':>12} {'process':>12}")
+    for entry_point, medians in results.items():
+        line = (f"{entry_point:<12} {medians['import_ms']:>10.1f}ms "
+                f"{medians['first_scan_ms']:>10.1f}ms {medians['process_ms']:>10.1f}ms")
+        before = (previous or {}).get("results", {}).get(entry_point)
+        if before:
+            delta = medians["first_scan_ms"] - before["first_scan_ms"]
+            line += f"   ({delta:+.1f}ms first scan vs {previous['release']})"
+        print(line)
+    print("=" * 72)
+
+    if args.record and results:
+        record = {
+            "release": args.record,
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "results": results,
+        }
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"📝 Recorded as '{args.record}' in {os.path.relpath(HISTORY_FILE, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+🎙️ TRAFFIC REPLAY - THROUGHPUT AND TAIL LATENCY AGAINST RECORDED LOAD
+====================================================================
+
+Re-drives a traffic recording (TRAFFIC_RECORD_PATH, see traffic_recorder.py)
+through the scan + completion pipeline against the local AIRS and OpenAI
+stand-ins (local_standins.py):
+
+- turns start at their recorded arrival times, divided by --speed (1x, 4x, ...)
+- each synthetic prompt has the recorded size, and contains a block phrase
+  when the recorded verdict was "block"
+- the stand-ins answer after the RECORDED upstream latency of that turn, so
+  what is measured on top of it is the pipeline's own overhead
+- --scanner mock answers scans in-process (no AIRS round trip at all)
+
+Reports achieved throughput, end-to-end turn latency percentiles (from the
+scheduled arrival, so queueing counts) and per-stage overhead. Save a run
+with --save and compare later runs with --baseline to catch regressions.
+No credentials or network access are required. Run from the repository root:
+
+    python3 benchmarks/replay_traffic.py recording.jsonl [--speed 4] [--scanner sdk]
+    python3 benchmarks/replay_traffic.py --synthetic 2000 --rate 50
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The replay must not write audit records or record itself
+os.environ["AUDIT_ENABLED"] = "false"
+os.environ["TRAFFIC_RECORD_PATH"] = ""
+
+from completion_cache import CompletionCache  # noqa: E402
+from local_standins import DEFAULT_BLOCK_PHRASES, LocalAIRSStandIn, LocalOpenAIStandIn  # noqa: E402
+from traffic_recorder import load_recording  # noqa: E402
+
+API_KEY, PROFILE_NAME, MODEL = "replay-key", "replay-profile", "replay-model"
+TURN_MARKER = re.compile(r"replay (\d+) ")
+
+
+def synthetic_recording(turns, rate, block_rate=0.05, seed=7):
+    """🎲 Poisson arrivals with log-normal sizes and latencies, shaped like chat traffic."""
+    rng = random.Random(seed)
+    t, recording = 0.0, []
+    for _ in range(turns):
+        t += rng.expovariate(rate)
+        blocked = rng.random() < block_rate
+        turn = {"t": t, "prompt_chars": int(min(20000, rng.lognormvariate(5, 1)) + 20),
+                "action": "block" if blocked else "allow",
+                "category": "malicious" if blocked else "benign",
+                "scan_ms": rng.lognormvariate(3.5, 0.4)}
+        if not blocked:
+            turn["completion_ms"] = rng.lognormvariate(6.5, 0.5)
+            turn["response_chars"] = int(rng.lognormvariate(6, 0.6))
+        recording.append(turn)
+    return recording
+
+
+def synthetic_prompt(index, turn):
+    """📝 Text of the recorded size; 'replay <index>' lets the stand-ins find the turn."""
+    text = f"replay {index} "
+    if turn.get("action") == "block":
+        text += DEFAULT_BLOCK_PHRASES[0] + " "
+    size = max(turn.get("prompt_chars") or 0, len(text))
+    return text + "x" * (size - len(text))
+
+
+def recorded_latency(recording, field):
+    def latency_for(text):
+        match = TURN_MARKER.search(text or "")
+        return recording[int(match.group(1))].get(field) if match else None
+    return latency_for
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def make_scan(kind, airs):
+    """
+    🛡️ scan(prompt) -> verdict through the chosen client path: the raw-HTTP
+    chatbot function ("api"), or a scanners.py backend ("sdk", "mock").
+    """
+    if kind in ("sdk", "mock"):
+        import scanners
+        if kind == "sdk":
+            from secure_chatbot_openai_sdk import load_aisecurity_sdk
+            if not load_aisecurity_sdk():
+                raise SystemExit("❌ --scanner sdk needs pan-aisecurity installed")
+        return scanners.build_scanner(kind, API_KEY, PROFILE_NAME,
+                                      base_url=airs.base_url if kind == "sdk" else None).scan
+    from secure_chatbot_openai_api import scan_prompt_with_paloalto_api
+    return lambda prompt: scan_prompt_with_paloalto_api(prompt, API_KEY, PROFILE_NAME,
+                                                        base_url=airs.base_url)
+
+
+def replay(recording, speed, scanner_kind, workers):
+    """▶️ Replay every turn; returns the list of per-turn measurements."""
+    from openai import OpenAI
+
+    airs = LocalAIRSStandIn(tls=scanner_kind == "sdk", latency_for=recorded_latency(recording, "scan_ms"))
+    llm = LocalOpenAIStandIn(latency_for=recorded_latency(recording, "completion_ms"))
+    results = [None] * len(recording)
+    with airs, llm:
+        if airs.ca_bundle:
+            os.environ["REQUESTS_CA_BUNDLE"] = airs.ca_bundle
+        scan = make_scan(scanner_kind, airs)
+        client = OpenAI(api_key="local", base_url=llm.base_url + "/v1", max_retries=0)
+        cache = CompletionCache()
+
+        def run_turn(index, scheduled):
+            turn = recording[index]
+            prompt = synthetic_prompt(index, turn)
+            started = time.perf_counter()
+            result = {"late_ms": (started - scheduled) * 1000, "recorded": turn}
+            try:
+                verdict = scan(prompt)
+                scanned = time.perf_counter()
+                result["scan_ms"] = (scanned - started) * 1000
+                result["action"] = (verdict or {}).get("action", "error")
+                if result["action"] == "allow" and turn.get("completion_ms") is not None:
+                    cache.complete(client, route="chat", verdict=verdict, model=MODEL,
+                                   messages=[{"role": "user", "content": prompt}],
+                                   max_tokens=max(1, (turn.get("response_chars") or 400) // 4))
+                    result["completion_ms"] = (time.perf_counter() - scanned) * 1000
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["turn_ms"] = (time.perf_counter() - scheduled) * 1000
+            results[index] = result
+
+        origin = recording[0]["t"] if recording else 0.0
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="replay") as pool:
+            start = time.perf_counter()
+            for index, turn in enumerate(recording):
+                scheduled = start + (turn["t"] - origin) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(run_turn, index, scheduled)
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def summarize(results, elapsed, recording, speed):
+    done = [r for r in results if r and "error" not in r]
+    span = ((recording[-1]["t"] - recording[0]["t"]) / speed) if len(recording) > 1 else 0.0
+    overhead = {
+        stage: [r[f"{stage}_ms"] - r["recorded"][f"{stage}_ms"] for r in done
+                if r.get(f"{stage}_ms") is not None and r["recorded"].get(f"{stage}_ms") is not None]
+        for stage in ("scan", "completion")
+    }
+    turn_ms = [r["turn_ms"] for r in done]
+    return {
+        "turns": len(results),
+        "errors": sum(1 for r in results if r is None or "error" in r),
+        "verdict_mismatches": sum(1 for r in done if r["recorded"].get("action")
+                                  and r.get("action") != r["recorded"]["action"]),
+        "speed": speed,
+        "offered_per_s": len(recording) / span if span else None,
+        "achieved_per_s": len(results) / elapsed if elapsed else None,
+        "turn_ms": {f"p{p}": percentile(turn_ms, p) for p in (50, 95, 99)} | {"max": max(turn_ms, default=None)},
+        "late_ms_p99": percentile([r["late_ms"] for r in done], 99),
+        "overhead_ms": {stage: {"p50": percentile(v, 50), "p99": percentile(v, 99)}
+                        for stage, v in overhead.items()},
+    }
+
+
+def compare(summary, baseline, tolerance):
+    """📉 Regressions beyond `tolerance` (fraction) against a saved baseline."""
+    checks = [
+        ("turn p99", summary["turn_ms"]["p99"], baseline["turn_ms"]["p99"], True),
+        ("turn p50", summary["turn_ms"]["p50"], baseline["turn_ms"]["p50"], True),
+        ("throughput", summary["achieved_per_s"], baseline["achieved_per_s"], False),
+    ]
+    regressions = []
+    for name, now, before, lower_is_better in checks:
+        if now is None or not before:
+            continue
+        change = (now - before) / before
+        if (change > tolerance) if lower_is_better else (change < -tolerance):
+            regressions.append(f"{name}: {before:.1f} -> {now:.1f} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording", nargs="?", help="traffic recording (JSONL)")
+    parser.add_argument("--synthetic", type=int, metavar="TURNS", help="generate a recording instead")
+    parser.add_argument("--rate", type=float, default=20.0, help="synthetic arrivals per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--scanner", choices=("api", "sdk", "mock"), default="api")
+    parser.add_argument("--workers", type=int, default=256, help="max turns in flight")
+    parser.add_argument("--save", metavar="FILE", help="write the summary as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with a saved summary")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression (fraction)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        recording = synthetic_recording(args.synthetic, args.rate)
+    elif args.recording:
+        recording = load_recording(args.recording)
+    else:
+        parser.error("give a recording file or --synthetic TURNS")
+    if not recording:
+        parser.error("the recording has no turns")
+
+    print("🎙️ TRAFFIC REPLAY")
+    print("=" * 60)
+    print(f"Turns: {len(recording)}   Speed: {args.speed:g}x   Scanner: {args.scanner}")
+    print("=" * 60)
+
+    results, elapsed = replay(recording, args.speed, args.scanner, args.workers)
+    summary = summarize(results, elapsed, recording, args.speed)
+
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"  # noqa: E731
+    print(f"Throughput: {fmt(summary['achieved_per_s'])}/s achieved "
+          f"(offered {fmt(summary['offered_per_s'])}/s)")
+    print("Turn latency ms: " + "  ".join(f"{k}={fmt(v)}" for k, v in summary["turn_ms"].items()))
+    print(f"Start lateness p99: {fmt(summary['late_ms_p99'])}ms")
+    for stage, values in summary["overhead_ms"].items():
+        print(f"{stage.capitalize()} overhead ms (above recorded upstream): "
+              f"p50={fmt(values['p50'])}  p99={fmt(values['p99'])}")
+    print(f"Errors: {summary['errors']}   Verdict mismatches: {summary['verdict_mismatches']}")
+    errors = [r["error"] for r in results if r and "error" in r]
+    if errors:
+        print(f"   first error: {errors[0]}")
+    print("=" * 60)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ REGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
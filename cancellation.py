@@ -0,0 +1,142 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                ⏹️ CANCELLATION TOKENS AND REQUEST DEADLINES                 ║
+# ║  ⚙️ SYSTEM COMPONENT: lets a caller abandon a request mid-way              ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • A CancelToken is created per request and handed down to the scan and   ║
+# ║    the OpenAI call; anyone holding it can cancel the whole request        ║
+# ║  • An optional deadline cancels the token automatically                   ║
+# ║  • Code that waits (retry back-off) waits ON the token, so a cancel       ║
+# ║    wakes it immediately instead of after the sleep                        ║
+# ║  • Clean-up callbacks (close an OpenAI stream, ...) run on cancel         ║
+# ║  • Records what cancelling saved: retries and back-off skipped, OpenAI    ║
+# ║    tokens not generated                                                   ║
+# ║                                                                            ║
+# ║  🛡️ A cancelled scan is a FAILED scan: the prompt never goes to OpenAI.    ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+
+import metrics
+
+
+class Cancelled(Exception):
+    """⏹️ The request was cancelled (by the caller or its deadline)."""
+
+
+class CancelToken:
+    """
+    🎫 SHARED "STOP NOW" FLAG FOR ONE REQUEST
+
+    - deadline_seconds: cancel automatically after this long (None = never)
+    """
+
+    def __init__(self, deadline_seconds=None):
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """⏹️ Cancel the request and run the clean-up callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Cancel callback {callback!r} failed: {e}")
+
+    def on_cancel(self, callback):
+        """🧹 Run callback() when cancelled (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def child(self):
+        """
+        🌱 A token for one part of this request (e.g. one of two hedged
+        OpenAI calls): cancelled with this one, same deadline, but it can
+        also be cancelled on its own. Call release_child() when done with it.
+        """
+        token = CancelToken()
+        token.deadline = self.deadline
+        self.on_cancel(token.cancel)
+        return token
+
+    def release_child(self, token):
+        """🧹 Stop cancelling `token` along with this one."""
+        self.remove_callback(token.cancel)
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def remaining(self):
+        """Seconds until the deadline (None if there is no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def bound_timeout(self, timeout):
+        """
+        ⏰ Shrink a timeout so it ends by the deadline.
+
+        Accepts a number or a requests-style (connect, read) tuple.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        remaining = max(remaining, 0.001)
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) for part in timeout)
+        return min(timeout, remaining) if timeout is not None else remaining
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def sleep(self, seconds):
+        """
+        💤 Sleep, but wake up as soon as the token is cancelled.
+
+        Raises Cancelled if it was (or the deadline comes first).
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._event.wait(remaining)
+            self.cancel("deadline exceeded")
+        else:
+            self._event.wait(seconds)
+        self.raise_if_cancelled()
+
+
+def record_cancellation(stage, token, reason=None, **saved):
+    """
+    📊 Count one cancellation and the work it saved.
+
+    stage: where it happened ("scan", "scan_retry", "openai", "openai_stream").
+    reason: defaults to the token's reason.
+    saved: amounts of avoided work, e.g. retries=2, backoff_seconds=3,
+    completion_tokens=700. Each becomes a cancel_saved_<name>_total counter.
+    """
+    reason = reason or (token.reason if token is not None else None) or "cancelled"
+    metrics.inc("cancellations_total", stage=stage, reason=reason)
+    for name, amount in saved.items():
+        if amount:
+            metrics.inc(f"cancel_saved_{name}_total", amount, stage=stage)
@@ -0,0 +1,414 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                    ⚙️ CHATBOT SETTINGS (TYPED + CACHED)                    ║
+# ║  NOT SECURITY OR CHATBOT - THIS IS BASIC SYSTEM CONFIGURATION             ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Reads the .env file (quotes, comments and "export" lines supported)    ║
+# ║    WITHOUT overwriting variables already set in the real environment      ║
+# ║  • Validates every setting once with pydantic and caches the result      ║
+# ║  • Holds all the performance knobs (pool sizes, timeouts, concurrency)    ║
+# ║  • Reloads on SIGHUP so running workers pick up new values without a      ║
+# ║    restart - code reads get_settings() each time it needs a value         ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import os
+import signal
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+DEFAULT_ENV_FILE = ".env"
+DEFAULT_AIRS_ENDPOINT = "https://service.api.aisecurity.paloaltonetworks.com"
+
+
+class ChatbotSettings(BaseModel):
+    """
+    📋 EVERY SETTING THE CHATBOT USES, IN ONE VALIDATED OBJECT
+
+    Field names are the lower-case form of the environment variable names
+    documented in .env.example (PANW_AI_SEC_ENDPOINT -> panw_ai_sec_endpoint).
+    Instances are immutable; a reload builds a new object.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    # 🛡️ PALO ALTO NETWORKS AI RUNTIME SECURITY
+    panw_ai_sec_api_key: Optional[str] = None
+    panw_ai_sec_profile_name: Optional[str] = None
+    panw_ai_sec_endpoint: str = DEFAULT_AIRS_ENDPOINT
+    panw_ai_sec_failover_endpoints: Tuple[str, ...] = Field(
+        (), description="Other regional endpoints accepting the same key and profile")
+
+    # 🧠 OPENAI
+    openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-4o-mini"
+    openai_fallback_models: Tuple[str, ...] = Field((), description="Backup models, in order")
+
+    # 🧭 MODEL ROUTING (model_router.py)
+    model_route_policy: Dict[str, Tuple[str, ...]] = Field(
+        default_factory=dict, description="Per-route model order, e.g. summary=gpt-4o-mini|gpt-4o")
+    model_context_overrides: Dict[str, int] = Field(
+        default_factory=dict, description="Context window per model, e.g. gpt-3.5-turbo=16385")
+    model_latency_slo_ms: float = Field(10000.0, gt=0, description="Typical latency a model should stay under")
+    model_hedge_after_ms: float = Field(0.0, ge=0, description="Send a backup request after this, 0 = off")
+    model_hedge_workers: int = Field(8, ge=2, description="Threads for hedged OpenAI calls")
+    model_cooldown_seconds: float = Field(30.0, gt=0, description="How long a failing model is skipped")
+
+    # 🏷️ GENERAL
+    environment: str = "production"
+    log_level: str = "INFO"
+
+    # ⏰ TIMEOUTS AND RETRIES
+    request_timeout: float = Field(30.0, gt=0, description="Read timeout per HTTP request, seconds")
+    connect_timeout: float = Field(5.0, gt=0, description="TCP/TLS connect timeout, seconds")
+    max_retries: int = Field(3, ge=0, le=5, description="Retries for failed security scans")
+    request_deadline_seconds: float = Field(
+        0.0, ge=0, description="Whole-turn deadline (scan + retries + OpenAI), 0 = off")
+
+    # 📜 AUDIT LOG (audit_log.py) - prompt hashes only, never prompt text
+    audit_enabled: bool = True
+    audit_dir: str = "logs/audit"
+    audit_hash_key: Optional[str] = None
+    audit_flush_interval_ms: float = Field(200.0, gt=0, description="Batch window for queued records")
+    audit_fsync_interval_seconds: float = Field(1.0, ge=0, description="Most a crash can lose, seconds")
+    audit_segment_max_bytes: int = Field(64 * 1024 * 1024, ge=1024, description="Rotate at this size")
+    audit_segment_max_seconds: float = Field(3600.0, gt=0, description="Rotate at this age")
+    audit_compress: bool = True
+    audit_queue_max: int = Field(100000, ge=100, description="Queued records before new ones are dropped")
+    scan_index_path: str = "logs/scan_index.sqlite3"
+    traffic_record_path: Optional[str] = None  # JSONL traffic shape for benchmarks/replay_traffic.py
+
+    # 🔬 ON-DEMAND PROFILING (profiling.py, started with kill -USR1 <pid>)
+    profile_seconds: float = Field(30.0, gt=0, description="How long one profile runs")
+    profile_sample_interval_ms: float = Field(5.0, ge=0.5, description="CPU stack sampling period")
+    profile_tracemalloc_frames: int = Field(16, ge=1, description="Stack depth kept per allocation")
+    profile_dir: str = "logs/profiles"
+
+    # 🩺 RUNTIME HEALTH (runtime_health.py): event-loop lag, blocked loop, pool saturation
+    health_monitor_enabled: bool = True
+    health_loop_interval_ms: float = Field(100.0, ge=10, description="Event-loop heartbeat period")
+    health_slow_callback_ms: float = Field(250.0, ge=10, description="Loop stall reported as blocking")
+
+    # 🔚 GRACEFUL SHUTDOWN (lifecycle.py)
+    shutdown_drain_seconds: float = Field(20.0, ge=0, description="In-flight work allowed to finish on exit")
+    shutdown_metrics_path: Optional[str] = None  # final metrics snapshot (JSON) written on exit
+
+    # 🌍 AIRS ENDPOINT SELECTION (endpoint_manager.py)
+    dns_cache_ttl_seconds: float = Field(300.0, ge=0, description="Reuse DNS answers this long, 0 = off")
+    endpoint_failure_threshold: int = Field(3, ge=1, description="Failures in a row before an endpoint is down")
+    endpoint_cooldown_seconds: float = Field(30.0, gt=0, description="How long a down endpoint is skipped")
+    endpoint_probe_interval_seconds: float = Field(
+        60.0, ge=0, description="Latency probes of every endpoint, 0 = off")
+
+    # 🔥 STARTUP WARM-UP (warmup.py)
+    warmup_enabled: bool = True
+    warmup_canary_prompt: str = Field(
+        "Hello, this is a connectivity check.", description="Probe-scanned at startup, empty = no probe")
+    warmup_keepalive_seconds: float = Field(45.0, ge=0, description="Idle connection ping interval, 0 = off")
+
+    # 🗂️ MULTI-TENANT SCANNING (scanner_registry.py)
+    tenant_config_file: Optional[str] = None
+    scan_rate_limit_per_second: float = Field(0.0, ge=0, description="Scans per second per API key, 0 = off")
+
+    # 🔌 CONNECTION POOLS (shared requests.Session per process)
+    http_pool_connections: int = Field(4, ge=1, description="Distinct hosts kept in the pool")
+    http_pool_maxsize: int = Field(16, ge=1, description="Keep-alive connections per host")
+
+    # 🚦 CONCURRENCY
+    scan_concurrency: int = Field(8, ge=1, description="Security scans allowed in flight at once")
+    scan_executor_workers: int = Field(8, ge=1, description="Threads per scanner running blocking scans")
+    scan_executor_queue: int = Field(
+        32, ge=0, description="Scans waiting for a busy pool before new ones are rejected (0 = none wait)")
+
+    # 🧅 SCANNER LAYERS (scanners.py, stacked onto any scanner backend)
+    scan_cache_ttl_seconds: float = Field(0.0, ge=0, description="Exact-prompt verdict reuse window, 0 = off")
+    scan_cache_max_entries: int = Field(10000, ge=1)
+    scan_dedup_enabled: bool = True  # identical prompts in flight share one scan
+
+    # 🚦 SCAN SCHEDULER (priority classes + fair share per tenant/profile)
+    scheduler_workers: int = Field(8, ge=1, description="Scans the scheduler runs at once")
+    scheduler_weight_interactive: float = Field(8.0, gt=0)
+    scheduler_weight_batch: float = Field(2.0, gt=0)
+    scheduler_weight_background: float = Field(1.0, gt=0)
+    scheduler_queue_interactive: int = Field(200, ge=1, description="Queued scans before shedding")
+    scheduler_queue_batch: int = Field(5000, ge=1)
+    scheduler_queue_background: int = Field(5000, ge=1)
+    scheduler_max_wait_interactive_seconds: float = Field(
+        15.0, gt=0, description="Interactive scans queued longer than this are shed")
+
+    # 💬 CONVERSATION HISTORY (in memory only)
+    conversation_max_tokens: int = Field(4000, ge=100, description="History token budget per session")
+    conversation_max_sessions: int = Field(1000, ge=1, description="Sessions kept in memory")
+    conversation_max_bytes: int = Field(32 * 1024 * 1024, ge=1024, description="History bytes, all sessions")
+    scan_context_chars: int = Field(500, ge=0, description="Earlier-turn context sent with each scan")
+
+    # ✂️ LARGE-PROMPT CHUNKING
+    scan_chunk_chars: int = Field(20000, ge=1000, description="Prompts longer than this are chunked")
+    scan_chunk_overlap_chars: int = Field(500, ge=0, description="Characters shared by adjacent chunks")
+    scan_chunk_parallelism: int = Field(4, ge=1, description="Chunks scanned at once per prompt")
+
+    # 🧮 OPENAI TOKEN BUDGETS AND QUOTA
+    completion_max_tokens: int = Field(800, ge=1, description="Default answer budget per request")
+    completion_min_tokens: int = Field(16, ge=1, description="Smallest answer budget worth sending")
+    completion_route_max_tokens: Dict[str, int] = Field(
+        default_factory=dict, description="Per-route answer budgets, e.g. chat=800,summary=300")
+    model_context_tokens: int = Field(128000, ge=1024, description="Context window of OPENAI_MODEL")
+    openai_tokens_per_minute: int = Field(0, ge=0, description="Token quota to stay under, 0 = off")
+
+    # 🧠 OPENAI COMPLETION CACHE (opt-in)
+    completion_cache_enabled: bool = False
+    completion_cache_ttl_seconds: float = Field(3600.0, gt=0, description="Reuse window for an answer")
+    completion_cache_max_entries: int = Field(1024, ge=1)
+    completion_cache_max_bytes: int = Field(16 * 1024 * 1024, ge=1024)
+    completion_cache_max_temperature: float = Field(0.0, ge=0, le=2)
+    completion_cache_routes: FrozenSet[str] = Field(
+        frozenset(), description="Routes whose answers are cacheable at any temperature")
+
+    # 🛡️ NEAR-DUPLICATE SCAN VERDICT REUSE (opt-in, "allow" verdicts only)
+    similarity_cache_enabled: bool = False
+    similarity_cache_threshold: float = Field(
+        0.9, ge=0.8, le=1.0, description="Share of a cached prompt a new prompt must cover")
+    similarity_cache_max_new_shingles: int = Field(
+        0, ge=0, le=8, description="Word shingles a prompt may add to a cached one (0 = none)")
+    similarity_cache_max_entries: int = Field(10000, ge=1)
+    similarity_cache_ttl_seconds: float = Field(600.0, gt=0, description="Reuse window for a verdict")
+
+    # 📦 ASYNC (SUBMIT-THEN-POLL) SCANNING FOR BULK WORK
+    async_scan_batch_size: int = Field(25, ge=1, le=25, description="Prompts per async submission")
+    async_scan_batch_wait_ms: float = Field(20.0, ge=0, description="Wait for a partial batch to fill")
+    async_scan_poll_interval_ms: float = Field(250.0, gt=0, description="Pause between result polls")
+    async_scan_timeout_seconds: float = Field(300.0, gt=0, description="Fail scans pending longer")
+
+    @field_validator("panw_ai_sec_endpoint")
+    @classmethod
+    def _strip_trailing_slash(cls, value):
+        value = value.strip().rstrip("/")
+        if not value.startswith(("https://", "http://")):
+            raise ValueError("must start with https://")
+        return value
+
+    @field_validator("panw_ai_sec_failover_endpoints")
+    @classmethod
+    def _strip_trailing_slashes(cls, value):
+        return tuple(cls._strip_trailing_slash(endpoint) for endpoint in value)
+
+    @field_validator("completion_cache_routes", mode="before")
+    @classmethod
+    def _split_comma_list(cls, value):
+        if isinstance(value, str):
+            return frozenset(item.strip() for item in value.split(",") if item.strip())
+        return value
+
+    @field_validator("scan_chunk_overlap_chars")
+    @classmethod
+    def _overlap_smaller_than_chunk(cls, value, info):
+        chunk_chars = info.data.get("scan_chunk_chars")
+        if chunk_chars is not None and value >= chunk_chars // 2:
+            raise ValueError("must be less than half of SCAN_CHUNK_CHARS")
+        return value
+
+    @field_validator("openai_fallback_models", "panw_ai_sec_failover_endpoints", mode="before")
+    @classmethod
+    def _split_ordered_list(cls, value):
+        if isinstance(value, str):
+            return tuple(item.strip() for item in value.split(",") if item.strip())
+        return value
+
+    @field_validator("completion_route_max_tokens", "model_route_policy",
+                     "model_context_overrides", mode="before")
+    @classmethod
+    def _split_key_value_list(cls, value, info):
+        # "a=1,b=2" -> {"a": "1", "b": "2"}; route policies hold "|"-separated model lists
+        if isinstance(value, str):
+            mapping = {}
+            for item in value.split(","):
+                key, sep, item_value = item.partition("=")
+                if not item.strip():
+                    continue
+                if not sep:
+                    raise ValueError(f"expected key=value, got {item.strip()!r}")
+                item_value = item_value.strip()
+                if info.field_name == "model_route_policy":
+                    item_value = [v.strip() for v in item_value.split("|") if v.strip()]
+                mapping[key.strip()] = item_value
+            return mapping
+        return value
+
+    @field_validator("log_level")
+    @classmethod
+    def _upper_log_level(cls, value):
+        value = value.strip().upper()
+        if value not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            raise ValueError("must be one of DEBUG, INFO, WARNING, ERROR, CRITICAL")
+        return value
+
+    @property
+    def http_timeout(self):
+        """(connect, read) timeout tuple in the form requests expects."""
+        return (self.connect_timeout, self.request_timeout)
+
+
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                          📄 .ENV FILE PARSER                              ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+_DOUBLE_QUOTE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+def _parse_value(raw):
+    raw = raw.strip()
+    if raw[:1] == "'":
+        # 'single quotes': taken literally up to the closing quote
+        end = raw.find("'", 1)
+        return raw[1:end] if end != -1 else raw[1:]
+    if raw[:1] == '"':
+        # "double quotes": backslash escapes, ends at the first unescaped quote
+        chars, i = [], 1
+        while i < len(raw):
+            ch = raw[i]
+            if ch == "\\" and i + 1 < len(raw):
+                chars.append(_DOUBLE_QUOTE_ESCAPES.get(raw[i + 1], "\\" + raw[i + 1]))
+                i += 2
+                continue
+            if ch == '"':
+                break
+            chars.append(ch)
+            i += 1
+        return "".join(chars)
+    # unquoted: an inline comment starts at " #"
+    comment = raw.find(" #")
+    if comment != -1:
+        raw = raw[:comment]
+    return raw.strip()
+
+
+def parse_env_file(path):
+    """
+    📄 Parse a .env file into a dict.
+
+    Supports blank lines, # comments, "export KEY=value", inline comments on
+    unquoted values, and single- or double-quoted values.
+    """
+    values = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("export "):
+                line = line[len("export "):].lstrip()
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if not sep or not key.isidentifier():
+                continue
+            values[key] = _parse_value(value)
+    return values
+
+
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                     🗄️ CACHED LOADING AND HOT RELOAD                       ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+_lock = threading.RLock()
+_settings = None
+_env_file_keys = set()   # variables that came from .env (safe to refresh on reload)
+_reload_callbacks = []
+
+
+def _apply_env_file(path):
+    """Copy .env values into os.environ without touching real environment variables."""
+    env_path = Path(path)
+    values = parse_env_file(env_path) if env_path.exists() else {}
+    # A variable deleted from .env since the last load is deleted here too
+    for key in list(_env_file_keys - values.keys()):
+        os.environ.pop(key, None)
+        _env_file_keys.discard(key)
+    applied = 0
+    for key, value in values.items():
+        if key in os.environ and key not in _env_file_keys:
+            continue  # the real environment always wins
+        os.environ[key] = value
+        _env_file_keys.add(key)
+        applied += 1
+    return applied
+
+
+def _build_settings():
+    fields = {name: os.environ[name.upper()]
+              for name in ChatbotSettings.model_fields if name.upper() in os.environ}
+    return ChatbotSettings(**fields)
+
+
+def load_settings(env_file=DEFAULT_ENV_FILE):
+    """
+    📥 Read .env plus the environment and return validated settings.
+
+    Raises pydantic.ValidationError if a value is invalid. Most code should
+    call get_settings() instead, which caches the result.
+    """
+    global _settings
+    with _lock:
+        try:
+            applied = _apply_env_file(env_file)
+            if applied:
+                print(f"✅ Loaded environment variables from {env_file} file")
+        except OSError as e:
+            print(f"⚠️ Could not load {env_file} file: {e}")
+        _settings = _build_settings()
+        return _settings
+
+
+def get_settings():
+    """⚡ Return the cached settings, loading them on first use."""
+    settings = _settings
+    if settings is None:
+        with _lock:
+            settings = _settings if _settings is not None else load_settings()
+    return settings
+
+
+def on_reload(callback):
+    """
+    🔔 Register callback(old_settings, new_settings), run after each successful reload.
+
+    Use it for things built once from settings, such as connection pools.
+    """
+    _reload_callbacks.append(callback)
+    return callback
+
+
+def reload_settings(env_file=DEFAULT_ENV_FILE):
+    """
+    🔄 Re-read .env and the environment and swap in the new settings.
+
+    If the new values do not validate, the current settings stay in effect
+    and False is returned.
+    """
+    with _lock:
+        old = _settings
+        try:
+            new = load_settings(env_file)
+        except ValidationError as e:
+            print(f"⚠️ Settings reload rejected, keeping current settings:\n{e}")
+            return False
+        for callback in list(_reload_callbacks):
+            try:
+                callback(old, new)
+            except Exception as e:
+                print(f"⚠️ Settings reload callback {callback!r} failed: {e}")
+    print("🔄 Settings reloaded")
+    return True
+
+
+def install_reload_signal_handler(env_file=DEFAULT_ENV_FILE):
+    """
+    📶 Reload settings when the process receives SIGHUP (POSIX only).
+
+    Must be called from the main thread. Returns False where SIGHUP does not exist.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_settings(env_file))
+    return True
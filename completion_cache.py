@@ -0,0 +1,248 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 🧠 OPT-IN CACHE FOR OPENAI CHAT COMPLETIONS                 ║
+# ║  🧠 CHATBOT COMPONENT: Runs only AFTER a message passed security scanning  ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Remembers OpenAI answers for repeated, security-approved prompts       ║
+# ║  • Key = model + full message list + parameters + scan verdict, so an     ║
+# ║    answer is never reused for a different conversation or verdict         ║
+# ║  • TTL expiry, LRU eviction and a total size cap in bytes                 ║
+# ║  • Replays cached answers as a stream when the caller wants streaming    ║
+# ║  • Only used when the temperature is low enough OR the route's policy     ║
+# ║    allows it - creative (high temperature) answers are not frozen by      ║
+# ║    accident                                                               ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import json_codec
+import lifecycle
+from cancellation import Cancelled, record_cancellation
+from chatbot_settings import get_settings
+
+ENTRY_OVERHEAD_BYTES = 200  # dict/key bookkeeping per entry, roughly
+
+
+class CompletionCache:
+    """
+    🗄️ TTL + LRU CACHE OF COMPLETION TEXT, BOUNDED IN BYTES
+
+    Settings (all read at call time, so a SIGHUP reload applies immediately):
+    - COMPLETION_CACHE_ENABLED: master switch (off by default)
+    - COMPLETION_CACHE_TTL_SECONDS: how long an answer may be reused
+    - COMPLETION_CACHE_MAX_ENTRIES / COMPLETION_CACHE_MAX_BYTES: size limits
+    - COMPLETION_CACHE_MAX_TEMPERATURE: requests at or below it are cacheable
+    - COMPLETION_CACHE_ROUTES: comma-separated routes cacheable at any temperature
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (expires_at, text, size_bytes)
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🚦 POLICY AND KEYS
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    @staticmethod
+    def is_cacheable(route, verdict, params):
+        """
+        ✅ May this request use the cache?
+
+        Requires the cache to be enabled, an "allow" verdict, and either a
+        temperature at or below COMPLETION_CACHE_MAX_TEMPERATURE or a route
+        listed in COMPLETION_CACHE_ROUTES.
+        """
+        settings = get_settings()
+        if not settings.completion_cache_enabled:
+            return False
+        if not verdict or verdict.get("action") != "allow":
+            return False
+        if route in settings.completion_cache_routes:
+            return True
+        return params.get("temperature", 1.0) <= settings.completion_cache_max_temperature
+
+    @staticmethod
+    def make_key(model, messages, params, verdict):
+        """🔑 Stable hash of everything that can change the answer."""
+        material = json_codec.dumps({
+            "model": model,
+            "messages": messages,
+            "params": sorted((k, v) for k, v in params.items() if k != "stream"),
+            "verdict": [verdict.get("profile_id") or verdict.get("profile_name"),
+                        verdict.get("category"), verdict.get("action")],
+        })
+        return hashlib.sha256(material).hexdigest()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🗄️ STORAGE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def get(self, key):
+        """📥 Return cached text, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, text, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._size_bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        """📤 Store text, evicting least-recently-used entries to fit the limits."""
+        settings = get_settings()
+        size = len(text.encode("utf-8")) + len(key) + ENTRY_OVERHEAD_BYTES
+        if size > settings.completion_cache_max_bytes:
+            return  # never let one huge answer flush the whole cache
+        expires_at = time.monotonic() + settings.completion_cache_ttl_seconds
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size_bytes -= old[2]
+            self._entries[key] = (expires_at, text, size)
+            self._size_bytes += size
+            while self._entries and (
+                    len(self._entries) > settings.completion_cache_max_entries
+                    or self._size_bytes > settings.completion_cache_max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self):
+        """📊 Entry count, bytes used, hits and misses."""
+        with self._lock:
+            return {"entries": len(self._entries), "size_bytes": self._size_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🤖 OPENAI WRAPPERS
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def complete(self, client, route, verdict, model, messages, usage_callback=None,
+                 cancel=None, **params):
+        """
+        🧠 chat.completions.create() with caching.
+
+        Returns (text, from_cache). Only complete answers (finish_reason
+        "stop") are stored; truncated ones are not reused. usage_callback,
+        if given, receives response.usage after a real OpenAI call (also one
+        cancelled while OpenAI answered: its tokens were spent anyway).
+        cancel (CancelToken): a cancelled request is not sent at all, and
+        the OpenAI timeout is cut to what is left of the token's deadline.
+        """
+        cacheable = self.is_cacheable(route, verdict, params)
+        if cacheable:
+            key = self.make_key(model, messages, params, verdict)
+            text = self.get(key)
+            if text is not None:
+                return text, True
+
+        request_options = self._cancel_options(cancel, params)
+        with lifecycle.tracked("completion"):  # 🔚 drained on shutdown
+            response = client.chat.completions.create(model=model, messages=messages,
+                                                      **params, **request_options)
+        if usage_callback is not None and getattr(response, "usage", None) is not None:
+            usage_callback(response.usage)
+        choice = response.choices[0]
+        text = choice.message.content or ""
+        # A call cancelled while OpenAI was answering (a hedged call that lost,
+        # a passed deadline) is not cached: nobody is waiting for its answer
+        if cacheable and choice.finish_reason == "stop" and not (cancel is not None and cancel.cancelled):
+            self.put(key, text)
+        return text, False
+
+    def stream(self, client, route, verdict, model, messages, chunk_chars=64, cancel=None, **params):
+        """
+        🌊 Streaming chat completion with caching; yields text pieces.
+
+        A cache hit is replayed in chunk_chars-sized pieces, so callers that
+        render a stream work the same either way. On a miss the live stream is
+        passed through and stored only if it finished normally.
+
+        The live stream is closed (freeing its connection and stopping token
+        generation) as soon as `cancel` is cancelled - Cancelled is raised -
+        or the caller stops reading (generator closed, client disconnected).
+        """
+        cacheable = self.is_cacheable(route, verdict, params)
+        if cacheable:
+            key = self.make_key(model, messages, params, verdict)
+            text = self.get(key)
+            if text is not None:
+                for start in range(0, len(text), chunk_chars):
+                    yield text[start:start + chunk_chars]
+                return
+
+        pieces, finish_reason, reader_gone = [], None, False
+        request_options = self._cancel_options(cancel, params)
+        lifecycle.work_started("completion")  # 🔚 until the stream ends; drained on shutdown
+        try:
+            live = client.chat.completions.create(model=model, messages=messages, stream=True,
+                                                  **params, **request_options)
+        except BaseException:
+            lifecycle.work_finished("completion")
+            raise
+        if cancel is not None:
+            cancel.on_cancel(live.close)  # ⏹️ a cancel from any thread drops the connection
+        try:
+            for chunk in live:
+                if cancel is not None and cancel.cancelled:
+                    break
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta.content if choice.delta else None
+                if delta:
+                    pieces.append(delta)
+                    yield delta
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        except GeneratorExit:
+            reader_gone = True
+            raise
+        except Exception:
+            if cancel is None or not cancel.cancelled:
+                raise  # a real stream error, not our own close()
+        finally:
+            lifecycle.work_finished("completion")
+            if cancel is not None:
+                cancel.remove_callback(live.close)
+            if finish_reason is None and (reader_gone or (cancel is not None and cancel.cancelled)):
+                # ⏹️ Abandoned part-way (cancelled or the reader went away):
+                # close now rather than letting OpenAI finish an unread answer
+                live.close()
+                # one streamed delta is about one token
+                unsent = max(0, (params.get("max_tokens") or 0) - len(pieces))
+                record_cancellation("openai_stream", cancel,
+                                    reason="reader gone" if reader_gone else None,
+                                    completion_tokens=unsent)
+        if cancel is not None and cancel.cancelled and finish_reason is None:
+            raise Cancelled(cancel.reason)
+        if cacheable and finish_reason == "stop":
+            self.put(key, "".join(pieces))
+
+    @staticmethod
+    def _cancel_options(cancel, params):
+        """⏹️ Refuse cancelled requests; bound the OpenAI timeout by the deadline."""
+        if cancel is None:
+            return {}
+        if cancel.cancelled:
+            record_cancellation("openai", cancel, completion_tokens=params.get("max_tokens") or 0)
+            raise Cancelled(cancel.reason)
+        remaining = cancel.remaining()
+        return {"timeout": max(remaining, 0.001)} if remaining is not None else {}
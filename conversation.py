@@ -0,0 +1,211 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║              💬 BOUNDED CONVERSATION STORE + INCREMENTAL SCANNING           ║
+# ║  🧠 CHATBOT COMPONENT (history) + 🛡️ SECURITY HELPER (what to scan)         ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Keeps per-session chat history in memory so OpenAI sees the context    ║
+# ║  • Trims each session to a token budget (oldest messages go first)        ║
+# ║  • Caps total memory: least-recently-used sessions are dropped            ║
+# ║  • Builds the text to security-scan for a turn: ONLY the new user         ║
+# ║    message(s) plus a short tail of earlier turns as context, so scan      ║
+# ║    cost stays flat instead of growing with the whole transcript           ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+from collections import OrderedDict
+
+from chatbot_settings import get_settings
+
+# Rough size of one token in characters for English text. Used when no
+# tokenizer is plugged in via set_token_counter().
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators added by the chat format
+
+
+def _estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+_token_counter = _estimate_tokens
+
+
+def set_token_counter(counter):
+    """🔌 Replace the character-based token estimate with a real tokenizer."""
+    global _token_counter
+    _token_counter = counter
+
+
+def count_message_tokens(message):
+    """Approximate tokens one chat message costs in a completion request."""
+    return _token_counter(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _message_bytes(message):
+    return len(message["content"].encode("utf-8")) + len(message["role"])
+
+
+class Conversation:
+    """
+    💬 ONE SESSION'S MESSAGE HISTORY
+
+    Messages are plain {"role": ..., "content": ...} dicts in the format
+    chat.completions.create() expects. Only user messages that have not
+    been security-scanned yet count as "new" for incremental scanning.
+    on_grow (optional) is called after every add(); ConversationStore uses it
+    to keep the whole store within its limits.
+    """
+
+    def __init__(self, session_id, max_tokens, on_grow=None):
+        self.session_id = session_id
+        self.max_tokens = max_tokens
+        self.on_grow = on_grow
+        self.messages = []
+        self.tokens = 0
+        self.size_bytes = 0
+        self.last_used = time.monotonic()
+        self._unscanned_from = 0  # index of the first user message not yet scanned
+
+    def add(self, role, content):
+        """➕ Append a message, then trim the oldest ones to stay within budget."""
+        message = {"role": role, "content": content}
+        self.messages.append(message)
+        self.tokens += count_message_tokens(message)
+        self.size_bytes += _message_bytes(message)
+        self.last_used = time.monotonic()
+        self._trim()
+        if self.on_grow is not None:
+            self.on_grow(self)
+        return message
+
+    def add_user(self, content):
+        return self.add("user", content)
+
+    def add_assistant(self, content):
+        return self.add("assistant", content)
+
+    def _drop_oldest(self):
+        message = self.messages.pop(0)
+        self.tokens -= count_message_tokens(message)
+        self.size_bytes -= _message_bytes(message)
+        self._unscanned_from = max(0, self._unscanned_from - 1)
+
+    def _trim(self):
+        # The newest message always stays, even if it alone exceeds the budget
+        while self.tokens > self.max_tokens and len(self.messages) > 1:
+            self._drop_oldest()
+
+    def discard_unscanned(self):
+        """
+        🚫 Remove the user messages that have not passed a scan yet.
+
+        Call this when a scan blocks (or fails) so rejected text never
+        reaches OpenAI as history in a later turn.
+        """
+        while len(self.messages) > self._unscanned_from:
+            message = self.messages.pop()
+            self.tokens -= count_message_tokens(message)
+            self.size_bytes -= _message_bytes(message)
+
+    def mark_scanned(self):
+        """✅ Everything currently in the history has passed security scanning."""
+        self._unscanned_from = len(self.messages)
+
+    def scan_window(self, context_chars):
+        """
+        🔍 Text to send to the security scan for this turn.
+
+        Returns the new (unscanned) user messages, prefixed by at most
+        context_chars characters from the end of the earlier transcript.
+        The context lets AIRS see multi-turn manipulation without rescanning
+        the whole conversation every turn.
+        """
+        new_text = "\n".join(
+            m["content"] for m in self.messages[self._unscanned_from:] if m["role"] == "user")
+        if context_chars <= 0 or self._unscanned_from == 0:
+            return new_text
+
+        # Walk backwards only as far as the context budget needs
+        parts, remaining = [], context_chars
+        for message in reversed(self.messages[:self._unscanned_from]):
+            if remaining <= 0:
+                break  # Budget used up exactly (line[-0:] would be the whole line)
+            line = f"{message['role']}: {message['content']}"
+            if len(line) >= remaining:
+                parts.append(line[-remaining:])
+                break
+            parts.append(line)
+            remaining -= len(line) + 1
+        context = "\n".join(reversed(parts))
+        return f"{context}\n{new_text}" if context else new_text
+
+
+class ConversationStore:
+    """
+    🗄️ ALL SESSIONS, WITH A MEMORY LIMIT
+
+    Limits (defaults from settings):
+    - max_tokens: per-session token budget (CONVERSATION_MAX_TOKENS)
+    - max_sessions: sessions kept at once (CONVERSATION_MAX_SESSIONS)
+    - max_bytes: total message bytes across sessions (CONVERSATION_MAX_BYTES)
+
+    Limits are checked when a session is fetched and whenever a message is
+    added to one; when one is exceeded the least-recently-used sessions are
+    dropped (never the session that just grew).
+    """
+
+    def __init__(self, max_tokens=None, max_sessions=None, max_bytes=None):
+        settings = get_settings()
+        self.max_tokens = max_tokens or settings.conversation_max_tokens
+        self.max_sessions = max_sessions or settings.conversation_max_sessions
+        self.max_bytes = max_bytes or settings.conversation_max_bytes
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """📂 Return the session's conversation, creating it if needed."""
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = Conversation(session_id, self.max_tokens, on_grow=self._grew)
+                self._sessions[session_id] = conversation
+            self._sessions.move_to_end(session_id)
+            self._evict(keep=session_id)
+            return conversation
+
+    def _grew(self, conversation):
+        # 📈 A message was added: that session is now the most recent one
+        with self._lock:
+            if self._sessions.get(conversation.session_id) is not conversation:
+                return  # already dropped from the store
+            self._sessions.move_to_end(conversation.session_id)
+            self._evict(keep=conversation.session_id)
+
+    def drop(self, session_id):
+        """🗑️ Forget a session (e.g. when the user logs out)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(c.size_bytes for c in self._sessions.values())
+
+    def enforce_limits(self):
+        """🧹 Drop least-recently-used sessions until the store fits its limits."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self, keep=None):
+        total = sum(c.size_bytes for c in self._sessions.values())
+        while self._sessions and (
+                len(self._sessions) > self.max_sessions or total > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                if len(self._sessions) == 1:
+                    break
+                self._sessions.move_to_end(session_id)
+                continue
+            total -= self._sessions.pop(session_id).size_bytes
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,396 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║           🌍 AIRS ENDPOINT SELECTION, FAILOVER AND DNS CACHING              ║
+# ║  ⚙️ SYSTEM COMPONENT: decides WHERE security scans are sent               ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Keeps a list of regional AIRS endpoints: PANW_AI_SEC_ENDPOINT first,   ║
+# ║    then PANW_AI_SEC_FAILOVER_ENDPOINTS                                    ║
+# ║  • Tracks each endpoint's latency (moving average) and health             ║
+# ║  • Sends each scan to the fastest healthy endpoint and fails over to the  ║
+# ║    next one on connection errors, timeouts and 5xx responses             ║
+# ║  • An endpoint that fails ENDPOINT_FAILURE_THRESHOLD times in a row is    ║
+# ║    skipped for ENDPOINT_COOLDOWN_SECONDS                                  ║
+# ║  • Caches DNS answers for the AIRS hosts only, for DNS_CACHE_TTL_SECONDS ║
+# ║    (serving the last good answer if the resolver fails), so new scan     ║
+# ║    connections skip the lookup. Only the pooled scan session resolves    ║
+# ║    through the cache; every other library (OpenAI...) is untouched       ║
+# ║                                                                            ║
+# ║  🛡️ Failover changes WHICH region scans - never WHETHER a prompt is       ║
+# ║  scanned. When every endpoint fails, the scan fails (closed).             ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import functools
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import metrics
+from chatbot_settings import get_settings
+from http_session import get_http_session
+
+LATENCY_SMOOTHING = 0.3     # weight of the newest sample in the moving average
+SWITCH_MARGIN = 0.8         # another endpoint must be 20% faster before we move to it
+STALE_DNS_FACTOR = 10       # serve a DNS answer up to 10x its TTL if the resolver is down
+DNS_CACHE_MAX_ENTRIES = 256  # (host, port, ...) answers kept, least recently used dropped
+
+_managers = {}              # primary endpoint -> EndpointManager
+_managers_lock = threading.Lock()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 📇 DNS CACHE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class DNSCache:
+    """
+    📇 CACHING getaddrinfo FOR THE AIRS HOSTS
+
+    Only hosts added with add_host() (the AIRS endpoints) are cached; any
+    other host is passed straight to the resolver. Nothing is patched
+    process-wide: the scan session's DNSCachingAdapter asks this cache, so
+    other libraries (httpx for OpenAI, ...) resolve as they always do. TLS
+    still checks the certificate against the host NAME, so a cached address
+    cannot weaken it. At most max_entries answers are kept (LRU).
+    """
+
+    def __init__(self, resolver=socket.getaddrinfo, max_entries=DNS_CACHE_MAX_ENTRIES):
+        self._resolve = resolver
+        self.max_entries = max_entries
+        self._hosts = set()
+        self._entries = OrderedDict()  # (host, port, family, type, proto, flags) -> (resolved_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add_host(self, host):
+        """➕ Cache answers for `host` from now on."""
+        if host:
+            with self._lock:
+                self._hosts.add(host.rstrip(".").lower())
+
+    def covers(self, host):
+        return bool(host) and host.rstrip(".").lower() in self._hosts
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        ttl = get_settings().dns_cache_ttl_seconds
+        if ttl <= 0 or not self.covers(host):
+            return self._resolve(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and now - entry[0] < ttl:
+            self.hits += 1
+            metrics.inc("dns_cache_total", outcome="hit")
+            return list(entry[1])
+        self.misses += 1
+        try:
+            result = self._resolve(host, port, family, type, proto, flags)
+        except OSError:
+            if entry is not None and now - entry[0] < ttl * STALE_DNS_FACTOR:
+                metrics.inc("dns_cache_total", outcome="stale")
+                return list(entry[1])  # resolver trouble: the last good answer beats none
+            raise
+        metrics.inc("dns_cache_total", outcome="miss")
+        with self._lock:
+            self._entries[key] = (now, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(result)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_dns_cache = DNSCache()
+
+
+def get_dns_cache():
+    """📇 The process-wide DNSCache used by the scan session."""
+    return _dns_cache
+
+
+@functools.lru_cache(maxsize=1)
+def _dns_caching_classes():
+    # Built on first use: urllib3/requests are imported lazily to keep startup fast
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.exceptions import NameResolutionError, NewConnectionError
+
+    class CachedDNSMixin:
+        def _new_conn(self):
+            host = self._dns_host
+            if not _dns_cache.covers(host):
+                return super()._new_conn()
+            try:
+                infos = _dns_cache.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                raise NameResolutionError(self.host, self, e) from e
+            # Connect to each cached address in turn, as urllib3 does itself.
+            # Only the socket target changes: SNI and certificate checks use self.host.
+            last_error = None
+            for address in dict.fromkeys(info[4][0] for info in infos):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except NewConnectionError as e:
+                    last_error = e
+                finally:
+                    self._dns_host = host
+            raise last_error
+
+    class CachedHTTPConnection(CachedDNSMixin, HTTPConnection):
+        pass
+
+    class CachedHTTPSConnection(CachedDNSMixin, HTTPSConnection):
+        pass
+
+    class CachedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CachedHTTPConnection
+
+    class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CachedHTTPSConnection
+
+    class DNSCachingAdapter(HTTPAdapter):
+        """🔌 requests adapter whose connections resolve AIRS hosts through the DNSCache."""
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": CachedHTTPConnectionPool, "https": CachedHTTPSConnectionPool}
+
+    return DNSCachingAdapter
+
+
+def build_dns_caching_adapter(**kwargs):
+    """🔌 An HTTPAdapter (same arguments) that uses the DNSCache for the AIRS hosts."""
+    return _dns_caching_classes()(**kwargs)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 🌍 ENDPOINTS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _smooth(average, sample):
+    return sample if average is None else LATENCY_SMOOTHING * sample + (1 - LATENCY_SMOOTHING) * average
+
+
+class _EndpointHealth:
+    __slots__ = ("latency_ms", "rtt_ms", "failures", "down_until")
+
+    def __init__(self):
+        self.latency_ms = None   # scans: moving average, None until measured
+        self.rtt_ms = None       # probes: moving average, None until probed
+        self.failures = 0        # failures in a row
+        self.down_until = 0.0
+
+    def speed_ms(self):
+        # Probes measure every endpoint the same way, so rank by them when we
+        # have them; scan latency (which includes scan work) is the fallback
+        return self.rtt_ms if self.rtt_ms is not None else self.latency_ms
+
+
+class EndpointManager:
+    """
+    🌍 PICKS THE AIRS ENDPOINT FOR EACH SCAN
+
+    Usage:
+
+        endpoints = get_endpoint_manager()
+        response = endpoints.post("/v1/scan/sync/request", headers=..., data=..., timeout=...)
+
+    Endpoints must all accept the same API key and security profile.
+    With a single endpoint this only adds health metrics and DNS caching.
+    """
+
+    def __init__(self, endpoints):
+        self.endpoints = list(dict.fromkeys(e.rstrip("/") for e in endpoints))
+        self._health = {endpoint: _EndpointHealth() for endpoint in self.endpoints}
+        self._current = self.endpoints[0]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prober = None
+        for endpoint in self.endpoints:
+            _dns_cache.add_host(urlsplit(endpoint).hostname)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🧭 CHOOSING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def ranked(self):
+        """
+        📋 Endpoints best first: healthy before down, then fastest.
+
+        Unmeasured endpoints keep their configured place behind measured
+        ones. The current endpoint keeps its place unless another one is
+        clearly (SWITCH_MARGIN) faster, so selection does not flap.
+        """
+        now = time.monotonic()
+        with self._lock:
+            def rank(endpoint):
+                health = self._health[endpoint]
+                latency = health.speed_ms()
+                if endpoint == self._current and latency is not None:
+                    latency *= SWITCH_MARGIN
+                return (health.down_until > now,
+                        latency is None,
+                        latency or 0.0,
+                        self.endpoints.index(endpoint))
+            return sorted(self.endpoints, key=rank)
+
+    def choose(self):
+        """🎯 The endpoint the next scan should use."""
+        return self.ranked()[0]
+
+    def record(self, endpoint, latency_ms, ok, probe=False):
+        """📊 Add one request's (or probe's) outcome to the endpoint's health."""
+        settings = get_settings()
+        with self._lock:
+            health = self._health[endpoint]
+            if ok:
+                health.failures = 0
+                health.down_until = 0.0
+                if probe:
+                    health.rtt_ms = _smooth(health.rtt_ms, latency_ms)
+                else:
+                    health.latency_ms = _smooth(health.latency_ms, latency_ms)
+            else:
+                health.failures += 1
+                now = time.monotonic()
+                if health.failures >= settings.endpoint_failure_threshold and health.down_until <= now:
+                    health.down_until = now + settings.endpoint_cooldown_seconds
+                    metrics.inc("endpoint_down_total", endpoint=endpoint)
+                    print(f"⚠️  AIRS endpoint {endpoint} marked down for "
+                          f"{settings.endpoint_cooldown_seconds:g}s")
+        kind = "probe" if probe else "scan"
+        metrics.inc("endpoint_requests_total", endpoint=endpoint, kind=kind, outcome="ok" if ok else "error")
+        if ok:
+            metrics.observe("endpoint_latency_ms", latency_ms, endpoint=endpoint, kind=kind)
+
+    def health(self):
+        """🩺 endpoint -> {"latency_ms", "rtt_ms", "failures", "down"} for status displays."""
+        now = time.monotonic()
+        with self._lock:
+            return {endpoint: {"latency_ms": h.latency_ms, "rtt_ms": h.rtt_ms, "failures": h.failures,
+                               "down": h.down_until > now}
+                    for endpoint, h in self._health.items()}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📡 SENDING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def post(self, path, **kwargs):
+        """
+        📡 POST `path` to the best endpoint, failing over on trouble.
+
+        Each endpoint is tried at most once. Connection errors, timeouts and
+        5xx responses move on to the next endpoint; any other response
+        (including 4xx) is returned to the caller. If every endpoint fails,
+        the last 5xx response is returned or the last error is raised.
+        """
+        import requests  # imported on first use to keep startup fast
+
+        last_error = None
+        last_response = None
+        for index, endpoint in enumerate(self.ranked()):
+            if index:
+                metrics.inc("endpoint_failovers_total", to_endpoint=endpoint)
+                print(f"   🔁 Failing over to {endpoint} after: {last_error}")
+            start = time.monotonic()
+            try:
+                response = get_http_session().post(endpoint + path, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.record(endpoint, (time.monotonic() - start) * 1000, ok=False)
+                last_error = e
+                continue
+            latency_ms = (time.monotonic() - start) * 1000
+            if response.status_code >= 500:
+                self.record(endpoint, latency_ms, ok=False)
+                last_error = f"HTTP {response.status_code}"
+                last_response = response
+                continue
+            self.record(endpoint, latency_ms, ok=True)
+            with self._lock:
+                self._current = endpoint
+            return response
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 💓 PROBING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def probe_all(self):
+        """💓 Time a HEAD request to every endpoint (any HTTP status = reachable)."""
+        results = {}
+        for endpoint in self.endpoints:
+            start = time.monotonic()
+            try:
+                get_http_session().head(endpoint, timeout=get_settings().http_timeout).close()
+            except Exception:
+                self.record(endpoint, (time.monotonic() - start) * 1000, ok=False, probe=True)
+                results[endpoint] = None
+                continue
+            results[endpoint] = (time.monotonic() - start) * 1000
+            self.record(endpoint, results[endpoint], ok=True, probe=True)
+        return results
+
+    def start_probing(self, interval=None):
+        """⏱️ Probe every endpoint now and then every ENDPOINT_PROBE_INTERVAL_SECONDS."""
+        interval = get_settings().endpoint_probe_interval_seconds if interval is None else interval
+        if interval <= 0 or self._prober is not None:
+            return
+        def run():
+            self.probe_all()
+            while not self._stop.wait(interval):
+                self.probe_all()
+        self._prober = threading.Thread(target=run, name="endpoint-probe", daemon=True)
+        self._prober.start()
+
+    def close(self):
+        self._stop.set()
+        if self._prober is not None:
+            self._prober.join(timeout=5)
+            self._prober = None
+
+
+def get_endpoint_manager(primary=None):
+    """
+    🌍 The shared EndpointManager for `primary` (default PANW_AI_SEC_ENDPOINT).
+
+    The configured primary endpoint gets PANW_AI_SEC_FAILOVER_ENDPOINTS as
+    backups; any other endpoint (e.g. a tenant's own) stands alone. With
+    backups configured, background latency probing starts on first use.
+    """
+    settings = get_settings()
+    primary = (primary or settings.panw_ai_sec_endpoint).rstrip("/")
+    manager = _managers.get(primary)
+    if manager is None:
+        endpoints = [primary]
+        if primary == settings.panw_ai_sec_endpoint:
+            endpoints += settings.panw_ai_sec_failover_endpoints
+        manager = EndpointManager(endpoints)
+        with _managers_lock:
+            manager = _managers.setdefault(primary, manager)
+        if len(manager.endpoints) > 1:
+            manager.start_probing()
+    return manager
+
+
+def close_endpoint_managers():
+    """🔒 Stop every manager's background latency probing."""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close()
@@ -0,0 +1,69 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                   🔌 SHARED HTTP CONNECTION POOL                           ║
+# ║  ⚙️ SYSTEM COMPONENT: Keep-alive connections for security scan requests   ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Gives every scan in the process one requests.Session, so TCP and TLS   ║
+# ║    connections to Palo Alto are reused instead of rebuilt per message     ║
+# ║  • Sizes the pool from settings (HTTP_POOL_CONNECTIONS/HTTP_POOL_MAXSIZE) ║
+# ║  • Rebuilds the pool when a settings reload changes those sizes           ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+
+import chatbot_settings
+
+_lock = threading.Lock()
+_session = None
+
+
+def build_http_session(pool_connections, pool_maxsize):
+    """
+    🏗️ Create a requests.Session with a sized connection pool.
+
+    Retries are NOT done by urllib3 here: the scanners run their own retry
+    loops so they can report each attempt.
+    """
+    import requests  # imported on first use to keep startup fast
+    from endpoint_manager import build_dns_caching_adapter  # DNS cache for the AIRS hosts only
+
+    session = requests.Session()
+    adapter = build_dns_caching_adapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session():
+    """⚡ Return the process-wide pooled session, creating it on first use."""
+    global _session
+    session = _session
+    if session is None:
+        with _lock:
+            if _session is None:
+                settings = chatbot_settings.get_settings()
+                _session = build_http_session(
+                    settings.http_pool_connections, settings.http_pool_maxsize)
+            session = _session
+    return session
+
+
+def close_http_session():
+    """🔒 Close every pooled connection; the next scan opens a fresh pool."""
+    global _session
+    with _lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+@chatbot_settings.on_reload
+def _resize_pool_on_reload(old, new):
+    if old is None or (
+            old.http_pool_connections, old.http_pool_maxsize) != (
+            new.http_pool_connections, new.http_pool_maxsize):
+        close_http_session()
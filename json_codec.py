@@ -0,0 +1,177 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                  ⚡ JSON SERIALIZER LAYER FOR SECURITY SCANS               ║
+# ║  ⚙️ SYSTEM COMPONENT: Encodes scan requests and decodes AIRS responses    ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Uses an accelerated JSON library (orjson, then ujson) when installed   ║
+# ║  • Falls back to the standard library json module otherwise               ║
+# ║  • Pre-encodes the static parts of every scan request (the ai_profile     ║
+# ║    block and the HTTP headers) once per scanner instead of per message    ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import json  # ⚙️ SYSTEM: Always-available fallback backend
+
+# Decode errors from every backend are re-raised as this type, so callers can
+# keep catching json.JSONDecodeError no matter which library is active.
+DecodeError = json.JSONDecodeError
+
+
+# One shared encoder: json.dumps() with non-default options builds a new
+# JSONEncoder on every call, which costs more than the encoding itself.
+# ASCII output is kept because the C escaping routine for it is the fastest.
+_stdlib_encoder = json.JSONEncoder(separators=(",", ":"))
+_stdlib_decoder = json.JSONDecoder()
+_encode_str = json.encoder.encode_basestring_ascii  # C-accelerated string quoting
+
+
+def _stdlib_dumps(obj):
+    if type(obj) is str:
+        return _encode_str(obj).encode("ascii")
+    return _stdlib_encoder.encode(obj).encode("ascii")
+
+
+def _stdlib_loads(data):
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return _stdlib_decoder.decode(data)
+
+
+# 📚 REGISTERED BACKENDS: name -> (dumps returning bytes, loads accepting bytes/str)
+_BACKENDS = {"stdlib": (_stdlib_dumps, _stdlib_loads)}
+
+try:
+    import orjson  # ⚡ Fastest option: native bytes output, strict UTF-8
+
+    _BACKENDS["orjson"] = (orjson.dumps, orjson.loads)
+except ImportError:
+    pass
+
+try:
+    import ujson  # ⚡ Second choice when orjson is not available
+
+    _BACKENDS["ujson"] = (
+        lambda obj: ujson.dumps(obj, ensure_ascii=False).encode("utf-8"),
+        ujson.loads,
+    )
+except ImportError:
+    pass
+
+# Preference order used when no backend has been chosen explicitly
+_PREFERRED_BACKENDS = ("orjson", "ujson", "stdlib")
+
+_active_name = next(name for name in _PREFERRED_BACKENDS if name in _BACKENDS)
+_active_dumps, _active_loads = _BACKENDS[_active_name]
+
+
+def register_backend(name, dumps, loads):
+    """
+    🔌 REGISTER A CUSTOM JSON BACKEND
+
+    - dumps: callable taking a Python object and returning UTF-8 bytes
+    - loads: callable taking bytes or str and returning Python objects
+
+    The backend is only registered; call set_backend(name) to activate it.
+    """
+    _BACKENDS[name] = (dumps, loads)
+
+
+def set_backend(name):
+    """
+    🔀 SWITCH THE ACTIVE JSON BACKEND
+
+    Raises ValueError if the backend is unknown or its library is not installed.
+    """
+    global _active_name, _active_dumps, _active_loads
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend '{name}' (available: {', '.join(sorted(_BACKENDS))})")
+    _active_name = name
+    _active_dumps, _active_loads = _BACKENDS[name]
+
+
+def get_backend():
+    """Return the name of the JSON backend currently in use."""
+    return _active_name
+
+
+def available_backends():
+    """Return the names of all registered (installed) JSON backends."""
+    return sorted(_BACKENDS)
+
+
+def dumps(obj):
+    """📤 Encode a Python object to compact UTF-8 JSON bytes."""
+    return _active_dumps(obj)
+
+
+def loads(data):
+    """
+    📥 Decode JSON bytes or text into Python objects.
+
+    Any backend-specific parse error is converted to json.JSONDecodeError.
+    """
+    try:
+        return _active_loads(data)
+    except DecodeError:
+        raise
+    except ValueError as e:
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8", errors="replace")
+        raise DecodeError(str(e), data, 0) from e
+
+
+class ScanRequestEncoder:
+    """
+    📦 PRE-ENCODED SCAN REQUEST BUILDER
+
+    Every AIRS scan request has the same shape:
+
+        {"tr_id": ..., "ai_profile": {...}, "contents": [...]}
+
+    Only tr_id and contents change between messages. This class encodes the
+    ai_profile block and builds the request headers ONCE, then splices the
+    per-message parts around them, so each scan only serializes its own content.
+    """
+
+    def __init__(self, profile_name, api_key, user_agent=None):
+        # 🛡️ The exact dict used for every request (shared, never mutated)
+        self.ai_profile = {"profile_name": profile_name}
+
+        # ⚡ Static fragments encoded once per scanner
+        self._request_prefix = b'{"tr_id":'
+        self._profile_fragment = b',"ai_profile":' + dumps(self.ai_profile)
+        self._contents_prefix = b',"contents":'
+
+        # 📋 Headers are identical for every scan request
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "x-pan-token": api_key,
+        }
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        self.headers = headers
+
+    def encode(self, tr_id, contents):
+        """📤 Encode one scan request body to bytes."""
+        return b"".join((
+            self._request_prefix,
+            dumps(tr_id),
+            self._profile_fragment,
+            self._contents_prefix,
+            dumps(contents),
+            b"}",
+        ))
+
+    def encode_request(self, request_data):
+        """
+        📤 Encode a complete {"tr_id", "ai_profile", "contents"} request dict.
+
+        The pre-encoded ai_profile fragment is reused when the request carries
+        this encoder's profile; anything else is encoded in full.
+        """
+        if request_data.keys() == {"tr_id", "ai_profile", "contents"} and (
+                request_data["ai_profile"] is self.ai_profile
+                or request_data["ai_profile"] == self.ai_profile):
+            return self.encode(request_data["tr_id"], request_data["contents"])
+        return dumps(request_data)
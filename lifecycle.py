@@ -0,0 +1,254 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                   🔚 GRACEFUL SHUTDOWN AND IN-FLIGHT DRAINING               ║
+# ║  ⚙️ SYSTEM COMPONENT: a stop (exit, Ctrl-C, SIGTERM) costs no requests    ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Scans and OpenAI calls register while they run (work_started /         ║
+# ║    work_finished), which also keeps scans_in_flight and                   ║
+# ║    completions_in_flight up to date                                       ║
+# ║  • shutdown():                                                             ║
+# ║      1. stops accepting work - new scans and completions raise            ║
+# ║         ShuttingDown, a Cancelled, so they fail closed                    ║
+# ║      2. waits up to SHUTDOWN_DRAIN_SECONDS for in-flight work to finish   ║
+# ║      3. runs the shutdown hooks, newest first: the chatbot's own (scan    ║
+# ║         threads, keep-warm pings, OpenAI client), then the traffic        ║
+# ║         recording, audit log (flushed and fsynced), endpoint probes,      ║
+# ║         pooled HTTP connections, and a final metrics snapshot             ║
+# ║         (SHUTDOWN_METRICS_PATH)                                           ║
+# ║  • SIGTERM (rolling deploys): if the chatbot is waiting for input it     ║
+# ║    stops at once; if a turn is running it stops after that turn          ║
+# ║                                                                            ║
+# ║  The completion cache and verdict-similarity index live in memory only:   ║
+# ║  there is nothing on disk to flush for them.                              ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import contextlib
+import signal
+import threading
+import time
+from collections import Counter
+
+import audit_log
+import endpoint_manager
+import http_session
+import json_codec
+import metrics
+import traffic_recorder
+from cancellation import Cancelled
+from chatbot_settings import get_settings
+
+
+class ShuttingDown(Cancelled):
+    """🔚 New work was refused because the process is shutting down."""
+
+
+class ShutdownRequested(SystemExit):
+    """
+    🔚 Raised in the main thread by SIGTERM while it waits for input.
+
+    A SystemExit, like KeyboardInterrupt is for Ctrl-C, so the chat loop's
+    `except Exception` handlers let it through.
+    """
+
+    def __init__(self):
+        super().__init__(0)
+
+
+def _write_final_metrics():
+    path = get_settings().shutdown_metrics_path
+    if path:
+        with open(path, "wb") as f:
+            f.write(json_codec.dumps(metrics.snapshot()) + b"\n")
+
+
+class Lifecycle:
+    """
+    🔚 TRACKS IN-FLIGHT WORK AND RUNS THE SHUTDOWN SEQUENCE
+
+    One per process (see the module functions below). Hooks added with
+    on_shutdown() run newest first, after the built-in ones are registered,
+    so resources are closed in the reverse order they were set up.
+    """
+
+    def __init__(self):
+        self.accepting = True
+        self._in_flight = Counter()   # kind -> running now
+        self._cond = threading.Condition()
+        self._hooks = []              # (name, fn), run in reverse
+        self._stop_requested = threading.Event()
+        self._idle = False            # main thread is waiting for input
+        self._shutdown_done = False
+        self.on_shutdown("metrics snapshot", _write_final_metrics)
+        self.on_shutdown("HTTP connection pools", http_session.close_http_session)
+        self.on_shutdown("endpoint probes", endpoint_manager.close_endpoint_managers)
+        self.on_shutdown("audit log", audit_log.close_audit_sink)
+        self.on_shutdown("traffic recording", traffic_recorder.close_traffic_recorder)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📋 IN-FLIGHT WORK
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def work_started(self, kind, **labels):
+        """
+        ▶️ Count one `kind` ("scan", "completion") as running; pair with
+        work_finished(). Raises ShuttingDown once shutdown has begun.
+        """
+        with self._cond:
+            if not self.accepting:
+                metrics.inc("work_refused_total", kind=kind)
+                raise ShuttingDown(f"{kind} refused: shutting down")
+            self._in_flight[kind] += 1
+        metrics.add_gauge(f"{kind}s_in_flight", 1, **labels)
+
+    def work_finished(self, kind, **labels):
+        metrics.add_gauge(f"{kind}s_in_flight", -1, **labels)
+        with self._cond:
+            self._in_flight[kind] -= 1
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def tracked(self, kind, **labels):
+        """⏱️ `with tracked("scan"):` - work_started/work_finished around the block."""
+        self.work_started(kind, **labels)
+        try:
+            yield
+        finally:
+            self.work_finished(kind, **labels)
+
+    def in_flight(self):
+        with self._cond:
+            return {kind: n for kind, n in self._in_flight.items() if n}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🔚 SHUTDOWN
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def on_shutdown(self, name, fn):
+        """🪝 Run fn() during shutdown, before every hook added earlier."""
+        self._hooks.append((name, fn))
+        return fn
+
+    def drain(self, timeout):
+        """⏳ Wait until nothing is in flight; returns what is still running."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while any(self._in_flight.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return {kind: n for kind, n in self._in_flight.items() if n}
+
+    def shutdown(self, drain_seconds=None):
+        """
+        🔚 Stop accepting work, drain it (SHUTDOWN_DRAIN_SECONDS), then run
+        the hooks. Safe to call more than once; only the first call acts.
+
+        Returns the work still running when the drain deadline passed.
+        """
+        with self._cond:
+            if self._shutdown_done:
+                return {}
+            self._shutdown_done = True
+            self.accepting = False
+        drain_seconds = get_settings().shutdown_drain_seconds if drain_seconds is None else drain_seconds
+        started = time.monotonic()
+
+        running = self.in_flight()
+        if running:
+            print(f"\n🔚 Finishing in-flight work: {running} (up to {drain_seconds:g}s)")
+        left = self.drain(drain_seconds)
+        metrics.observe("shutdown_drain_ms", (time.monotonic() - started) * 1000)
+        for kind, n in left.items():
+            metrics.inc("shutdown_abandoned_total", n, kind=kind)
+            print(f"⚠️  Shutdown deadline passed with {n} {kind}(s) still running")
+
+        for name, fn in reversed(self._hooks):
+            try:
+                fn()
+            except Exception as e:
+                metrics.inc("shutdown_hook_errors_total", hook=name)
+                print(f"⚠️  Shutdown step '{name}' failed: {e}")
+        return left
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📶 SIGTERM
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    @contextlib.contextmanager
+    def idle(self):
+        """
+        💤 Wrap the wait for user input: SIGTERM arriving inside the block
+        raises ShutdownRequested right away; anywhere else it only sets
+        stop_requested(), so the running turn finishes first.
+        """
+        if self._stop_requested.is_set():
+            raise ShutdownRequested()
+        self._idle = True
+        try:
+            yield
+        finally:
+            self._idle = False
+
+    def stop_requested(self):
+        return self._stop_requested.is_set()
+
+    def request_stop(self):
+        self._stop_requested.set()
+        if self._idle:
+            raise ShutdownRequested()
+
+    def install_signal_handler(self):
+        """
+        📶 Treat SIGTERM as a request to stop. Must be called from the main
+        thread. Returns False where SIGTERM cannot be handled.
+        """
+        if not hasattr(signal, "SIGTERM"):
+            return False
+
+        def handle(signum, frame):
+            print("\n🔚 SIGTERM received: shutting down")
+            self.request_stop()
+
+        signal.signal(signal.SIGTERM, handle)
+        return True
+
+
+_lifecycle = Lifecycle()
+
+
+def get_lifecycle():
+    """🔚 The process-wide Lifecycle."""
+    return _lifecycle
+
+
+def work_started(kind, **labels):
+    _lifecycle.work_started(kind, **labels)
+
+
+def work_finished(kind, **labels):
+    _lifecycle.work_finished(kind, **labels)
+
+
+def tracked(kind, **labels):
+    return _lifecycle.tracked(kind, **labels)
+
+
+def on_shutdown(name, fn):
+    return _lifecycle.on_shutdown(name, fn)
+
+
+def shutdown(drain_seconds=None):
+    return _lifecycle.shutdown(drain_seconds)
+
+
+def idle():
+    return _lifecycle.idle()
+
+
+def stop_requested():
+    return _lifecycle.stop_requested()
+
+
+def install_signal_handler():
+    return _lifecycle.install_signal_handler()
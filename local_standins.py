@@ -0,0 +1,352 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║           🧪 LOCAL STAND-INS FOR THE AIRS SCAN AND OPENAI APIS             ║
+# ║  ⚠️  FOR BENCHMARKS AND LOCAL TESTING ONLY - PERFORMS NO REAL SECURITY!   ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Runs a tiny HTTP server on 127.0.0.1 that answers like the Palo Alto   ║
+# ║    Networks scan endpoints: /v1/scan/sync/request, plus the async pair    ║
+# ║    /v1/scan/async/request and /v1/scan/results?scan_ids=...               ║
+# ║  • Blocks prompts containing a few well-known trigger phrases and allows  ║
+# ║    everything else, with an optional artificial latency                   ║
+# ║  • A second server answers OpenAI /v1/chat/completions with filler text  ║
+# ║  • Latency can be fixed or chosen per request (latency_for), which lets  ║
+# ║    benchmarks/replay_traffic.py reproduce recorded upstream latencies    ║
+# ║  • Lets benchmarks measure the chatbot without credentials or network     ║
+# ║  • Optionally serves HTTPS with a throwaway self-signed certificate,      ║
+# ║    because the aisecurity SDK only accepts https:// endpoints             ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import json_codec
+
+# 🚨 Phrases the stand-in treats as prompt injection
+DEFAULT_BLOCK_PHRASES = (
+    "ignore all instructions",
+    "ignore previous instructions",
+    "reveal secrets",
+)
+
+
+def build_scan_verdict(request_data, profile_id, block_phrases):
+    """
+    📋 Build an AIRS-shaped verdict for one scan request.
+
+    The verdict is "block" if any content item contains a block phrase.
+    """
+    text = " ".join(
+        str(item.get("prompt", "")) + " " + str(item.get("response", ""))
+        for item in request_data.get("contents", [])
+    ).lower()
+    injection = any(phrase in text for phrase in block_phrases)
+    return {
+        "action": "block" if injection else "allow",
+        "category": "malicious" if injection else "benign",
+        "profile_id": profile_id,
+        "profile_name": request_data.get("ai_profile", {}).get("profile_name"),
+        "prompt_detected": {"dlp": False, "injection": injection, "url_cats": False},
+        "response_detected": {"dlp": False, "url_cats": False},
+        "report_id": "R" + str(uuid.uuid4()),
+        "scan_id": str(uuid.uuid4()),
+        "tr_id": request_data.get("tr_id"),
+    }
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # replays open many connections at once; the default backlog is 5
+
+
+class _LocalServer:
+    """
+    🧪 SHARED PLUMBING: threaded HTTP(S) server on 127.0.0.1
+
+    Subclasses provide _make_handler(). latency_for(text) -> milliseconds (or
+    None for the fixed latency_ms) picks a per-request delay.
+    """
+
+    thread_name = "standin"
+
+    def __init__(self, latency_ms=0.0, port=0, tls=False, latency_for=None):
+        self.latency_ms = latency_ms
+        self.latency_for = latency_for
+        self.requests_served = 0
+        self.ca_bundle = None
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer(("127.0.0.1", port), self._make_handler())
+        self._thread = None
+        self._cert_dir = None
+        if tls:
+            self._enable_tls()
+
+    def _enable_tls(self):
+        if shutil.which("openssl") is None:
+            raise RuntimeError("tls=True needs the openssl command-line tool on PATH")
+        self._cert_dir = tempfile.mkdtemp(prefix="standin-")
+        cert = os.path.join(self._cert_dir, "cert.pem")
+        key = os.path.join(self._cert_dir, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=localhost", "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost",
+             "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+        self.ca_bundle = cert
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        scheme = "https" if self.ca_bundle else "http"
+        return f"{scheme}://{host}:{port}"
+
+    def _delay(self, text=None):
+        """😴 Sleep for this request's latency and count it as served."""
+        latency_ms = self.latency_for(text) if self.latency_for and text is not None else None
+        if latency_ms is None:
+            latency_ms = self.latency_ms
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        with self._lock:
+            self.requests_served += 1
+
+    def _make_handler(self):
+        raise NotImplementedError
+
+    def start(self):
+        """▶️ Start serving in a background daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name=self.thread_name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """⏹️ Stop serving and release the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self._cert_dir is not None:
+            shutil.rmtree(self._cert_dir, ignore_errors=True)
+            self._cert_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _send_json(self, status, payload):
+        body = json_codec.dumps(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json_codec.loads(self.rfile.read(length)) if length else {}
+
+
+class LocalAIRSStandIn(_LocalServer):
+    """
+    🧪 IN-PROCESS AIRS STAND-IN SERVER
+
+    Usage:
+
+        with LocalAIRSStandIn(latency_ms=20) as airs:
+            scan_prompt_with_paloalto_api("hello", "key", "profile", base_url=airs.base_url)
+
+    With tls=True the server speaks HTTPS using a self-signed certificate made
+    with the openssl command-line tool. Point requests at it with
+    REQUESTS_CA_BUNDLE=<ca_bundle> (or verify=ca_bundle).
+
+    Async scans are accepted immediately and report "pending" until
+    async_delay_ms has passed, then "complete" with the same verdict the sync
+    endpoint would give.
+
+    latency_for(prompt_text) -> ms overrides latency_ms for sync scans.
+
+    Attributes:
+    - base_url: URL to pass as base_url / api_endpoint
+    - ca_bundle: path of the certificate to trust (tls=True only)
+    - requests_served: number of HTTP requests answered so far (all endpoints)
+    - async_submissions / result_queries: async batches and result polls received
+    """
+
+    thread_name = "airs-standin"
+
+    def __init__(self, latency_ms=0.0, block_phrases=DEFAULT_BLOCK_PHRASES, port=0, tls=False,
+                 async_delay_ms=50.0, latency_for=None):
+        self.async_delay_ms = async_delay_ms
+        self.block_phrases = tuple(phrase.lower() for phrase in block_phrases)
+        self.profile_id = str(uuid.uuid4())
+        self.async_submissions = 0
+        self.result_queries = 0
+        self._async_scans = {}  # scan_id -> (ready_at, [(req_id, request_data), ...])
+        super().__init__(latency_ms, port, tls, latency_for)
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(_JSONHandler):
+            def _authorized(self):
+                if self.headers.get("x-pan-token"):
+                    return True
+                self._send_json(401, {"error": {"message": "missing x-pan-token"}})
+                return False
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                if self.path == "/v1/scan/async/request":
+                    self._submit_async(self._read_json())
+                    return
+                if self.path != "/v1/scan/sync/request":
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                request_data = self._read_json()
+                standin._delay(" ".join(str(item.get("prompt", ""))
+                                        for item in request_data.get("contents", [])))
+                self._send_json(200, build_scan_verdict(
+                    request_data, standin.profile_id, standin.block_phrases))
+
+            def _submit_async(self, items):
+                if not isinstance(items, list) or not items:
+                    self._send_json(400, {"error": {"message": "expected a non-empty list"}})
+                    return
+                standin._delay()
+                scan_id = str(uuid.uuid4())
+                ready_at = time.monotonic() + standin.async_delay_ms / 1000
+                with standin._lock:
+                    standin.async_submissions += 1
+                    standin._async_scans[scan_id] = (
+                        ready_at, [(item.get("req_id"), item.get("scan_req", {})) for item in items])
+                self._send_json(200, {"received": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                                      "scan_id": scan_id, "report_id": "R" + scan_id})
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                url = urlsplit(self.path)
+                if url.path != "/v1/scan/results":
+                    self._send_json(404, {"error": {"message": f"unknown path {url.path}"}})
+                    return
+                scan_ids = [scan_id for value in parse_qs(url.query).get("scan_ids", [])
+                            for scan_id in value.split(",") if scan_id]
+                standin._delay()
+                now = time.monotonic()
+                results = []
+                with standin._lock:
+                    standin.result_queries += 1
+                    scans = [(scan_id, standin._async_scans.get(scan_id)) for scan_id in scan_ids]
+                for scan_id, scan in scans:
+                    if scan is None:
+                        continue
+                    ready_at, items = scan
+                    for req_id, request_data in items:
+                        entry = {"req_id": req_id, "scan_id": scan_id,
+                                 "status": "complete" if now >= ready_at else "pending"}
+                        if now >= ready_at:
+                            entry["result"] = build_scan_verdict(
+                                request_data, standin.profile_id, standin.block_phrases)
+                        results.append(entry)
+                self._send_json(200, results)
+
+        return Handler
+
+
+class LocalOpenAIStandIn(_LocalServer):
+    """
+    🧠 IN-PROCESS OPENAI STAND-IN SERVER
+
+    Answers POST /v1/chat/completions (plain and stream=true) with filler
+    text of about reply_chars characters (capped by max_tokens * 4), and
+    GET /v1/models/<id> for warm-up. Point the client at it with
+    OpenAI(api_key="local", base_url=standin.base_url + "/v1").
+
+    latency_for(last_user_message) -> ms overrides latency_ms per request.
+    """
+
+    thread_name = "openai-standin"
+
+    def __init__(self, latency_ms=0.0, reply_chars=400, port=0, tls=False, latency_for=None):
+        self.reply_chars = reply_chars
+        super().__init__(latency_ms, port, tls, latency_for)
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(_JSONHandler):
+            def do_GET(self):
+                if not self.path.startswith("/v1/models/"):
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                standin._delay()
+                self._send_json(200, {"id": self.path.rsplit("/", 1)[-1], "object": "model",
+                                      "created": 0, "owned_by": "local"})
+
+            def do_POST(self):
+                if self.path != "/v1/chat/completions":
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                request = self._read_json()
+                messages = request.get("messages") or [{}]
+                standin._delay(str(messages[-1].get("content", "")))
+                limit = standin.reply_chars
+                if request.get("max_tokens"):
+                    limit = min(limit, request["max_tokens"] * 4)
+                text = ("lorem ipsum " * (limit // 12 + 1))[:limit]
+                completion_tokens = max(1, len(text) // 4)
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+                reply_id = "chatcmpl-" + uuid.uuid4().hex
+                if request.get("stream"):
+                    self._stream(reply_id, request.get("model"), text)
+                    return
+                self._send_json(200, {
+                    "id": reply_id, "object": "chat.completion", "created": int(time.time()),
+                    "model": request.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+            def _stream(self, reply_id, model, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                pieces = [text[i:i + 16] for i in range(0, len(text), 16)] + [None]
+                for piece in pieces:
+                    delta = {"content": piece} if piece is not None else {}
+                    chunk = {"id": reply_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [{"index": 0, "delta": delta,
+                                                          "finish_reason": None if piece else "stop"}]}
+                    self.wfile.write(b"data: " + json_codec.dumps(chunk) + b"\n\n")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
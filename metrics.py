@@ -0,0 +1,119 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                    📊 IN-PROCESS METRICS (COUNTERS / GAUGES / TIMINGS)      ║
+# ║  ⚙️ SYSTEM COMPONENT: Observability for scans, queues and OpenAI calls    ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • One process-wide registry any module can record into                   ║
+# ║  • Counters (things that happened), gauges (current levels) and           ║
+# ║    timings (latency samples with count, sum and percentiles)              ║
+# ║  • Every metric can carry labels, e.g. priority="interactive"             ║
+# ║  • snapshot() for code, render_text() for humans / log lines             ║
+# ║                                                                            ║
+# ║  Thread-safe and cheap: recording is a dict lookup plus an addition.      ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+from collections import deque
+
+TIMING_SAMPLES = 2048  # recent samples kept per timing series for percentiles
+
+_lock = threading.Lock()
+_counters = {}   # (name, labels) -> float
+_gauges = {}     # (name, labels) -> float
+_timings = {}    # (name, labels) -> [count, total, deque of recent samples]
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """➕ Add to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """📏 Set a gauge to its current level."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def add_gauge(name, delta, **labels):
+    """📏 Move a gauge up or down (e.g. +1 when work starts, -1 when it ends)."""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + delta
+
+
+def observe(name, value, **labels):
+    """⏱️ Record one timing sample (milliseconds by convention)."""
+    key = _key(name, labels)
+    with _lock:
+        series = _timings.get(key)
+        if series is None:
+            series = _timings[key] = [0, 0.0, deque(maxlen=TIMING_SAMPLES)]
+        series[0] += 1
+        series[1] += value
+        series[2].append(value)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers (fraction in 0..1)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _label_text(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+def snapshot():
+    """
+    📸 Copy of every metric.
+
+    Returns {"counters": {...}, "gauges": {...}, "timings": {...}} keyed by
+    "name{label=value,...}". Timings report count, avg, p50, p95 and p99.
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {key: (count, total, list(samples))
+                   for key, (count, total, samples) in _timings.items()}
+    result = {
+        "counters": {name + _label_text(labels): value for (name, labels), value in counters.items()},
+        "gauges": {name + _label_text(labels): value for (name, labels), value in gauges.items()},
+        "timings": {},
+    }
+    for (name, labels), (count, total, samples) in timings.items():
+        result["timings"][name + _label_text(labels)] = {
+            "count": count,
+            "avg": total / count if count else 0.0,
+            "p50": percentile(samples, 0.50),
+            "p95": percentile(samples, 0.95),
+            "p99": percentile(samples, 0.99),
+        }
+    return result
+
+
+def render_text():
+    """📝 One line per metric, sorted by name."""
+    data = snapshot()
+    lines = [f"{name} {value:g}" for name, value in sorted(data["counters"].items())]
+    lines += [f"{name} {value:g}" for name, value in sorted(data["gauges"].items())]
+    for name, stats in sorted(data["timings"].items()):
+        lines.append(f"{name} count={stats['count']} avg={stats['avg']:.1f} "
+                     f"p50={stats['p50']:.1f} p95={stats['p95']:.1f} p99={stats['p99']:.1f}")
+    return "\n".join(lines)
+
+
+def reset():
+    """🧹 Forget everything (tests and benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
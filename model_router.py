@@ -0,0 +1,250 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║              🧭 OPENAI MODEL ROUTING, FAILOVER AND HEDGING                  ║
+# ║  🧠 CHATBOT COMPONENT: Runs only AFTER a message passed security scanning  ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Chooses which configured OpenAI model answers each request, using      ║
+# ║    - the route's policy (which models a route may use, in what order)     ║
+# ║    - prompt size (models whose context window is too small are skipped)   ║
+# ║    - rolling latency and error stats per model                            ║
+# ║  • Fails over to the next model on a timeout, connection error, 429 or    ║
+# ║    5xx - other errors (bad request, auth) are raised straight away        ║
+# ║  • Optional hedging: if the first model is slow, a second request goes    ║
+# ║    to the next model and the first answer to arrive wins                  ║
+# ║  • A model that keeps failing is skipped for a cool-down period           ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from cancellation import CancelToken
+from chatbot_settings import get_settings
+from token_budget import context_tokens
+
+# OpenAI SDK errors worth retrying on another model (matched by name so this
+# module does not import openai)
+FAILOVER_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "InternalServerError",
+                        "RateLimitError", "Timeout", "ConnectionError"}
+STATS_WINDOW = 50            # recent calls kept per model
+COOLDOWN_ERROR_RATE = 0.5    # skip a model when at least half its recent calls failed...
+COOLDOWN_MIN_CALLS = 4       # ...over at least this many calls
+
+
+def is_failover_error(error):
+    """🔁 Should this error be retried on another model?"""
+    if isinstance(error, TimeoutError):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and (status >= 500 or status == 429):
+        return True
+    return any(cls.__name__ in FAILOVER_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class AllModelsFailed(Exception):
+    """🚨 Every candidate model failed; the last error is chained as __cause__."""
+
+
+class _ModelStats:
+    __slots__ = ("calls", "cooldown_until")
+
+    def __init__(self):
+        self.calls = deque(maxlen=STATS_WINDOW)  # (latency_ms, ok)
+        self.cooldown_until = 0.0
+
+    def error_rate(self):
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+    def typical_latency_ms(self):
+        latencies = sorted(ms for ms, ok in self.calls if ok)
+        return latencies[len(latencies) // 2] if latencies else 0.0
+
+
+class ModelRouter:
+    """
+    🧭 PICKS AND CALLS OPENAI MODELS
+
+    Usage:
+
+        router = ModelRouter()
+        text, from_cache = router.call(
+            "chat", prompt_tokens,
+            lambda model, cancel: completion_cache.complete(
+                client, "chat", verdict, model, messages, cancel=cancel, ...),
+            cancel=cancel)
+
+    Settings:
+    - OPENAI_MODEL: primary model; OPENAI_FALLBACK_MODELS: comma-separated backups
+    - MODEL_ROUTE_POLICY: per-route model order, e.g. "summary=gpt-4o-mini|gpt-4o"
+    - MODEL_CONTEXT_OVERRIDES: context windows, e.g. "gpt-3.5-turbo=16385"
+      (models not listed use MODEL_CONTEXT_TOKENS)
+    - MODEL_LATENCY_SLO_MS: models typically slower than this are tried later
+    - MODEL_HEDGE_AFTER_MS: start a backup request after this long (0 = off)
+    - MODEL_HEDGE_WORKERS: threads running hedged calls (created on first use;
+      close() stops them)
+    - MODEL_COOLDOWN_SECONDS: how long a failing model is skipped
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _stats_for(self, model):
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = _ModelStats()
+        return stats
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🧭 CHOOSING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def candidates(self, route, prompt_tokens=0):
+        """
+        📋 Models to try for this request, best first.
+
+        Starts from the route policy (or OPENAI_MODEL + OPENAI_FALLBACK_MODELS),
+        drops models whose context cannot hold the prompt, then orders them by
+        recent error rate, then whether their typical latency is inside
+        MODEL_LATENCY_SLO_MS, then the configured order. Models in cool-down
+        go last.
+        """
+        settings = get_settings()
+        policy = settings.model_route_policy.get(route)
+        models = list(policy) if policy else [settings.openai_model, *settings.openai_fallback_models]
+        models = list(dict.fromkeys(models))  # de-duplicate, keep order
+        needed = prompt_tokens + settings.completion_min_tokens
+        fitting = [m for m in models if context_tokens(m) >= needed]
+        models = fitting or models  # nothing fits: let the API report the error
+
+        now = time.monotonic()
+        slo_ms = settings.model_latency_slo_ms
+        with self._lock:
+            healthy = [m for m in models if self._stats_for(m).cooldown_until <= now]
+            cooling = [m for m in models if m not in healthy]
+
+            def rank(model):
+                stats = self._stats_for(model)
+                return (round(stats.error_rate(), 1),             # fewer errors first
+                        stats.typical_latency_ms() > slo_ms,      # then models inside the SLO
+                        models.index(model))                      # then the configured order
+            healthy.sort(key=rank)
+        return healthy + cooling
+
+    def record(self, model, latency_ms, ok):
+        """📊 Add one call's outcome to the model's rolling stats."""
+        with self._lock:
+            stats = self._stats_for(model)
+            stats.calls.append((latency_ms, ok))
+            if (not ok and len(stats.calls) >= COOLDOWN_MIN_CALLS
+                    and stats.error_rate() >= COOLDOWN_ERROR_RATE):
+                stats.cooldown_until = time.monotonic() + get_settings().model_cooldown_seconds
+                stats.calls.clear()  # start fresh after the cool-down
+                metrics.inc("model_cooldowns_total", model=model)
+        metrics.observe("model_latency_ms", latency_ms, model=model)
+        metrics.inc("model_calls_total", model=model, outcome="ok" if ok else "error")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📞 CALLING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _timed(self, request, model, cancel):
+        start = time.monotonic()
+        try:
+            result = request(model, cancel)
+        except Exception as e:
+            self.record(model, (time.monotonic() - start) * 1000, ok=not is_failover_error(e))
+            raise
+        self.record(model, (time.monotonic() - start) * 1000, ok=True)
+        return result
+
+    def call(self, route, prompt_tokens, request, cancel=None):
+        """
+        📞 Run request(model, cancel) on the best model, failing over as needed.
+
+        Returns request's result. Errors that are not worth a failover are
+        raised at once; if every model fails, AllModelsFailed is raised.
+        cancel (CancelToken, optional) is handed to request; hedged calls
+        each get their own child token, and the losing call's is cancelled.
+        """
+        models = self.candidates(route, prompt_tokens)
+        hedge_after = get_settings().model_hedge_after_ms / 1000
+        if hedge_after > 0 and len(models) > 1:
+            return self._call_hedged(models, request, hedge_after, cancel)
+
+        last_error = None
+        for index, model in enumerate(models):
+            if index:
+                metrics.inc("model_failovers_total", route=route, to_model=model)
+                print(f"🔁 Failing over to {model} after: {last_error}")
+            try:
+                return self._timed(request, model, cancel)
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                last_error = e
+        raise AllModelsFailed(f"all models failed for route {route!r}") from last_error
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=get_settings().model_hedge_workers, thread_name_prefix="model-hedge")
+        return self._pool
+
+    def close(self, wait=True):
+        """🔒 Stop the hedge threads; calls not started yet are dropped."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _call_hedged(self, models, request, hedge_after, cancel=None):
+        parent = cancel if cancel is not None else CancelToken()
+        attempts = {}   # future -> (model, that call's CancelToken)
+
+        def start(model):
+            token = parent.child()
+            attempts[self._get_pool().submit(self._timed, request, model, token)] = (model, token)
+
+        start(models[0])
+        remaining = list(models[1:])
+        last_error = None
+        try:
+            while attempts:
+                timeout = hedge_after if remaining else None
+                done, _ = wait(list(attempts), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # ⏱️ Slow: hedge with the next model, keep waiting on both
+                    model = remaining.pop(0)
+                    metrics.inc("model_hedges_total", to_model=model)
+                    start(model)
+                    continue
+                for future in done:
+                    model, token = attempts.pop(future)
+                    parent.release_child(token)
+                    try:
+                        return future.result()  # first success wins; the others are cancelled below
+                    except Exception as e:
+                        if not is_failover_error(e):
+                            raise
+                        last_error = e
+                        if remaining and not attempts:
+                            model = remaining.pop(0)
+                            metrics.inc("model_failovers_total", to_model=model)
+                            start(model)
+        finally:
+            # ⏹️ Calls still running lost (or the request failed): stop them.
+            # A call already in flight still reports its usage when it ends.
+            for future, (model, token) in attempts.items():
+                future.cancel()  # not started yet: never sent
+                metrics.inc("model_hedges_cancelled_total", model=model)
+                token.cancel("hedge_lost")
+                parent.release_child(token)
+        raise AllModelsFailed("all models failed") from last_error
@@ -0,0 +1,180 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                  🔬 ON-DEMAND CPU AND ALLOCATION PROFILING                  ║
+# ║  ⚙️ SYSTEM COMPONENT: find where a latency spike's time is going          ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • `kill -USR1 <pid>` (or start_profile()) profiles the running chatbot   ║
+# ║    for PROFILE_SECONDS, then goes back to costing nothing                 ║
+# ║  • CPU: a background thread samples every thread's Python stack each      ║
+# ║    PROFILE_SAMPLE_INTERVAL_MS - JSON work, print() reporting, executor    ║
+# ║    threads waiting on the network all show up by where they are          ║
+# ║  • Memory: tracemalloc records allocations made during the window         ║
+# ║  • Output in PROFILE_DIR, in the "collapsed stacks" format that           ║
+# ║    flamegraph.pl, speedscope and inferno read directly:                   ║
+# ║      cpu-<time>-<pid>.collapsed    samples per stack                      ║
+# ║      alloc-<time>-<pid>.collapsed  bytes still allocated, per stack       ║
+# ║      alloc-<time>-<pid>.txt        top allocation sites by size           ║
+# ║                                                                            ║
+# ║  COST WHEN OFF: none - only a signal handler is installed; no sampler     ║
+# ║  thread and no tracemalloc until a profile is requested.                  ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import functools
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+import metrics
+from chatbot_settings import get_settings
+
+TOP_ALLOCATION_SITES = 50
+
+_active = None
+_active_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_label(code):
+    parts = Path(code.co_filename).parts[-2:]
+    # No spaces: collapsed-stack readers split the count off at the last space
+    return f"{getattr(code, 'co_qualname', code.co_name)}@{'/'.join(parts)}:{code.co_firstlineno}"
+
+
+def collapse_stack(frame, root):
+    """🧱 'root;outer@file:line;...;inner@file:line' for a frame and its callers."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """
+    🔬 ONE PROFILING WINDOW
+
+    run() samples until `seconds` have passed (or stop() is called), then
+    writes the output files and returns their paths.
+    """
+
+    def __init__(self, seconds=None, interval_ms=None, directory=None):
+        settings = get_settings()
+        self.seconds = settings.profile_seconds if seconds is None else seconds
+        self.interval = (settings.profile_sample_interval_ms if interval_ms is None else interval_ms) / 1000
+        self.directory = Path(directory or settings.profile_dir)
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+
+    def run(self):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(get_settings().profile_tracemalloc_frames)
+        me = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != me:
+                        self.samples[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+                self.sample_count += 1
+                self._stop.wait(self.interval)
+            allocations = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        return self._write(allocations)
+
+    def stop(self):
+        self._stop.set()
+
+    def _write(self, allocations):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}"
+        paths = [self.directory / f"cpu-{stem}.collapsed"]
+        with open(paths[0], "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        if allocations is not None:
+            allocations = allocations.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__, all_frames=True),  # the sampler itself
+            ])
+            stats = allocations.statistics("traceback")
+            paths.append(self.directory / f"alloc-{stem}.collapsed")
+            with open(paths[-1], "w") as f:
+                for stat in stats:  # tracebacks run oldest frame first, as collapsed stacks do
+                    stack = ";".join(f"{'/'.join(Path(fr.filename).parts[-2:])}:{fr.lineno}"
+                                     for fr in stat.traceback)
+                    f.write(f"allocations;{stack.replace(' ', '_')} {stat.size}\n")
+            paths.append(self.directory / f"alloc-{stem}.txt")
+            with open(paths[-1], "w") as f:
+                total = sum(stat.size for stat in stats)
+                f.write(f"Allocated during the profile and still live: {total / 1024:.1f} KiB\n\n")
+                for stat in allocations.statistics("lineno")[:TOP_ALLOCATION_SITES]:
+                    frame = stat.traceback[0]
+                    f.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  "
+                            f"{frame.filename}:{frame.lineno}\n")
+        return paths
+
+
+def start_profile(seconds=None, interval_ms=None, directory=None):
+    """
+    🔬 Profile in the background for `seconds` (default PROFILE_SECONDS).
+
+    Returns the thread doing it, or None if a profile is already running.
+    """
+    global _active
+    with _active_lock:
+        if _active is not None:
+            return None
+        session = ProfileSession(seconds, interval_ms, directory)
+        _active = session
+
+    def run():
+        global _active
+        try:
+            paths = session.run()
+            metrics.inc("profiles_total")
+            print(f"\n🔬 Profile written ({session.sample_count} samples): "
+                  + ", ".join(str(p) for p in paths))
+        except Exception as e:
+            print(f"\n⚠️ Profiling failed: {e}")
+        finally:
+            with _active_lock:
+                _active = None
+
+    print(f"\n🔬 Profiling for {session.seconds:g}s...")
+    thread = threading.Thread(target=run, name="profiler", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_profile():
+    """⏹️ End the running profile early (its output is still written)."""
+    with _active_lock:
+        if _active is not None:
+            _active.stop()
+
+
+def install_profile_signal_handler():
+    """
+    📶 Start a profile when the process receives SIGUSR1 (POSIX only).
+
+    Must be called from the main thread. Returns False where SIGUSR1 does not exist.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    # The handler only starts a thread: it runs between two bytecodes of the
+    # main thread, which might be holding _active_lock at that moment
+    signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(
+        target=start_profile, name="profiler-start", daemon=True).start())
+    return True
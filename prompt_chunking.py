@@ -0,0 +1,138 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                🛡️ CHUNKED SCANNING FOR VERY LARGE PROMPTS                   ║
+# ║  ⚠️  SECURITY HELPER: splits text for scanning, merges the verdicts        ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Cuts a large prompt (a pasted document, say) into overlapping chunks,  ║
+# ║    preferring to cut at whitespace, so a threat that spans a boundary     ║
+# ║    is still seen whole by at least one scan                               ║
+# ║  • Reads the text chunk by chunk - from a string or a file-like object -  ║
+# ║    and never keeps more than `parallelism` chunks in memory at once       ║
+# ║  • Scans chunks in parallel and merges the verdicts: ANY block = block,   ║
+# ║    and any failed chunk fails the whole scan (fail closed)                ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# A cut is moved back to the last whitespace within this fraction of the chunk
+BOUNDARY_SEARCH_FRACTION = 0.1
+
+
+def _cut_point(text, end, chunk_chars):
+    """Move a cut at `end` back to just after the nearest whitespace, if close enough."""
+    if end >= len(text):
+        return len(text)
+    floor = end - int(chunk_chars * BOUNDARY_SEARCH_FRACTION)
+    for i in range(end, max(floor, 0), -1):
+        if text[i - 1].isspace():
+            return i
+    return end
+
+
+def iter_chunks(source, chunk_chars, overlap_chars=0):
+    """
+    ✂️ Yield overlapping chunks of at most chunk_chars characters.
+
+    source may be a str or a text file-like object with .read(n). Each chunk
+    starts overlap_chars before the previous one ended. Only the current
+    chunk (plus one read-ahead block for streams) is held in memory.
+    """
+    if chunk_chars <= 0:
+        raise ValueError("chunk_chars must be positive")
+    if not 0 <= overlap_chars < chunk_chars:
+        raise ValueError("overlap_chars must be >= 0 and smaller than chunk_chars")
+
+    if isinstance(source, str):
+        start = 0
+        while start < len(source):
+            end = _cut_point(source, start + chunk_chars, chunk_chars)
+            yield source[start:end]
+            if end >= len(source):
+                return
+            start = max(end - overlap_chars, start + 1)
+        return
+
+    # 📄 Streaming: keep a buffer of the unconsumed tail plus the next read
+    buffer = ""
+    eof = False
+    while True:
+        while not eof and len(buffer) <= chunk_chars:
+            block = source.read(chunk_chars)
+            if not block:
+                eof = True
+            buffer += block
+        if not buffer:
+            return
+        end = len(buffer) if eof and len(buffer) <= chunk_chars else _cut_point(
+            buffer, chunk_chars, chunk_chars)
+        yield buffer[:end]
+        if eof and end >= len(buffer):
+            return
+        buffer = buffer[max(end - overlap_chars, 1):]
+
+
+def merge_verdicts(verdicts):
+    """
+    🔗 Combine per-chunk verdicts into one AIRS-shaped verdict.
+
+    action is "block" if any chunk was blocked; category is "malicious" if
+    any chunk was; each prompt_detected / response_detected flag is True if
+    it was True for any chunk. The first chunk supplies the other fields.
+    """
+    merged = dict(verdicts[0])
+    merged["action"] = "block" if any(v.get("action") == "block" for v in verdicts) else (
+        verdicts[0].get("action"))
+    if any(v.get("category") == "malicious" for v in verdicts):
+        merged["category"] = "malicious"
+    for field in ("prompt_detected", "response_detected"):
+        flags = {}
+        for verdict in verdicts:
+            for name, detected in (verdict.get(field) or {}).items():
+                flags[name] = bool(flags.get(name)) or bool(detected)
+        merged[field] = flags
+    merged["chunks_scanned"] = len(verdicts)
+    merged["blocked_chunks"] = [i for i, v in enumerate(verdicts) if v.get("action") == "block"]
+    return merged
+
+
+def scan_in_chunks(source, scan_chunk, chunk_chars, overlap_chars, parallelism, cancel=None):
+    """
+    🚀 Scan every chunk with scan_chunk(index, text) and return the merged verdict.
+
+    At most `parallelism` chunks are in flight; new chunks are read only as
+    earlier scans finish. Scanning stops early at the first block, since the
+    merged verdict can no longer change. Exceptions from scan_chunk propagate,
+    and a chunk returning None makes the whole result None. A cancelled
+    `cancel` token stops reading chunks and raises Cancelled.
+    """
+    verdicts = {}
+    chunks = enumerate(iter_chunks(source, chunk_chars, overlap_chars))
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="scan-chunk") as pool:
+        in_flight = {}
+        exhausted = False
+        try:
+            while True:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()  # ⏹️ read and send no more chunks
+                while not exhausted and len(in_flight) < parallelism:
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, text = item
+                    in_flight[pool.submit(scan_chunk, index, text)] = index
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    verdict = future.result()
+                    if verdict is None:
+                        return None
+                    verdicts[index] = verdict
+                    if verdict.get("action") == "block":
+                        exhausted = True  # 🚫 verdict is final; read no more chunks
+        finally:
+            for future in in_flight:
+                future.cancel()
+    return merge_verdicts([verdicts[i] for i in sorted(verdicts)])
@@ -0,0 +1,94 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                        ⏳ TOKEN-BUCKET RATE LIMITER                         ║
+# ║  ⚙️ SYSTEM COMPONENT: Keeps us inside API quotas (requests or tokens)      ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • A bucket refills at `rate` units per second up to `capacity` units     ║
+# ║  • acquire(n) takes n units, waiting for the refill if needed             ║
+# ║  • A unit can be anything: one scan request, one OpenAI token, ...        ║
+# ║  • rate 0 means "no limit" so the limiter can stay wired in everywhere    ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """⏳ acquire() could not get the units before its timeout."""
+
+
+class TokenBucket:
+    """
+    🪣 THREAD-SAFE TOKEN BUCKET
+
+    - rate: units added per second (0 = unlimited)
+    - capacity: most units that can build up while idle (burst size);
+      defaults to one second's worth
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount=1):
+        """⚡ Take `amount` units if available right now; never waits."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._available >= amount:
+                self._available -= amount
+                return True
+            return False
+
+    def acquire(self, amount=1, timeout=None):
+        """
+        ⏳ Take `amount` units, sleeping until the bucket has them.
+
+        Requests larger than the capacity are allowed once the bucket is full
+        (the bucket goes negative), so one oversized request cannot hang forever.
+        Raises RateLimitExceeded if that would take longer than `timeout` seconds.
+        Returns the seconds spent waiting.
+        """
+        if self.rate <= 0:
+            return 0.0
+        needed = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (needed - self._available) / self.rate)
+            if timeout is not None and wait > timeout:
+                raise RateLimitExceeded(
+                    f"rate limit: {amount:g} units need {wait:.2f}s, timeout is {timeout:g}s")
+            # Reserve now so concurrent callers queue up behind this one
+            self._available -= amount
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def refund(self, amount):
+        """↩️ Give back units that were reserved but not used (e.g. an estimate was high)."""
+        if self.rate <= 0 or amount <= 0:
+            return
+        with self._lock:
+            self._available = min(self.capacity, self._available + amount)
+
+    def charge(self, amount):
+        """➖ Take units without waiting (e.g. real usage was above the estimate)."""
+        if self.rate <= 0 or amount <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= amount
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._available
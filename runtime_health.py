@@ -0,0 +1,216 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 🩺 EVENT-LOOP AND THREAD-POOL HEALTH MONITORING             ║
+# ║  ⚙️ SYSTEM COMPONENT: shows when async work is stuck behind sync work     ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Event-loop lag: a heartbeat task measures how late the loop wakes it  ║
+# ║    (event_loop_lag_ms)                                                    ║
+# ║  • Slow callbacks: a watchdog thread notices when the heartbeat stalls    ║
+# ║    longer than HEALTH_SLOW_CALLBACK_MS and looks at what the loop thread  ║
+# ║    is doing right then - the blocking call site (e.g. an OpenAI call or  ║
+# ║    input() made straight from a coroutine) is named in                   ║
+# ║    event_loop_blocked_ms{site=...} and printed once per site             ║
+# ║  • Thread pools: InstrumentedExecutor reports queue depth, busy threads   ║
+# ║    and queue wait (executor_*{executor=...}); install() makes one the    ║
+# ║    loop's default executor, so run_in_executor() work is visible. With   ║
+# ║    max_queue set it rejects work instead of queueing without limit       ║
+# ║  • In-flight scans and completions are gauges kept by lifecycle.py       ║
+# ║    (scans_in_flight, completions_in_flight)                              ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from chatbot_settings import get_settings
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ExecutorSaturated(RuntimeError):
+    """🚫 The executor's queue is full; the task was not accepted."""
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """
+    🧵 THREAD POOL THAT REPORTS ITS OWN SATURATION
+
+    Gauges executor_queue_depth, executor_active_threads and
+    executor_max_workers, timing executor_queue_wait_ms and counter
+    executor_rejected_total, all labelled executor=<name>. stats() returns
+    the same numbers.
+
+    max_queue bounds the tasks waiting for a thread: submit() raises
+    ExecutorSaturated once that many are waiting (None = no bound). Tasks an
+    idle thread will pick up do not count, so max_queue=0 still runs up to
+    max_workers tasks at once and only rejects when every thread is busy.
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix="", name=None, max_queue=None):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.name = name or thread_name_prefix or "executor"
+        self.max_queue = max_queue
+        self.queued = 0
+        self.active = 0
+        self._count_lock = threading.Lock()
+        metrics.set_gauge("executor_max_workers", self._max_workers, executor=self.name)
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted = time.monotonic()
+        started = []
+
+        def run():
+            started.append(True)
+            self._moved(queued=-1, active=+1)
+            metrics.observe("executor_queue_wait_ms", (time.monotonic() - submitted) * 1000,
+                            executor=self.name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._moved(active=-1)
+
+        # Check and count under one lock, so concurrent submits cannot overshoot
+        with self._count_lock:
+            waiting = self.waiting()
+            # This task would wait only if every idle thread is already spoken for
+            full = self.max_queue is not None and self.waiting(extra=1) > self.max_queue
+            if not full:
+                self.queued += 1
+        if full:
+            metrics.inc("executor_rejected_total", executor=self.name)
+            raise ExecutorSaturated(f"{self.name}: {waiting} tasks already waiting for a thread")
+        self._moved()
+        try:
+            future = super().submit(run)
+        except BaseException:
+            self._moved(queued=-1)
+            raise
+        # A queued task cancelled before it ran (e.g. shutdown(cancel_futures=True))
+        future.add_done_callback(lambda f: self._moved(queued=-1) if not started else None)
+        return future
+
+    def waiting(self, extra=0):
+        """Queued tasks (plus `extra`) that no idle or not yet started thread can pick up."""
+        return max(0, self.queued + extra - (self._max_workers - self.active))
+
+    def _moved(self, queued=0, active=0):
+        with self._count_lock:
+            self.queued += queued
+            self.active += active
+            depth, busy = self.queued, self.active
+        metrics.set_gauge("executor_queue_depth", depth, executor=self.name)
+        metrics.set_gauge("executor_active_threads", busy, executor=self.name)
+
+    def stats(self):
+        return {"queued": self.queued, "active": self.active, "waiting": self.waiting(),
+                "threads": len(self._threads), "max_workers": self._max_workers,
+                "max_queue": self.max_queue}
+
+
+def call_site(frame):
+    """
+    📍 Describe where `frame` is: the innermost line of this application's
+    own code, plus the innermost function when that is library code.
+    """
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename != __file__ and "site-packages" not in filename:
+            break
+        frame = frame.f_back
+    if frame is None:
+        frame = innermost
+    site = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+    detail = site
+    if innermost is not frame:
+        detail += (f" -> {innermost.f_code.co_name} "
+                   f"({os.path.basename(innermost.f_code.co_filename)}:{innermost.f_lineno})")
+    return site, detail
+
+
+class LoopMonitor:
+    """
+    🩺 EVENT-LOOP LAG AND BLOCKING-CALL DETECTOR
+
+    start() must run inside the loop (e.g. first thing in async main()).
+    - interval_ms: heartbeat period (HEALTH_LOOP_INTERVAL_MS)
+    - slow_ms: a stall this long counts as blocked (HEALTH_SLOW_CALLBACK_MS)
+    """
+
+    def __init__(self, interval_ms=None, slow_ms=None):
+        settings = get_settings()
+        self.interval = (settings.health_loop_interval_ms if interval_ms is None else interval_ms) / 1000
+        self.slow = (settings.health_slow_callback_ms if slow_ms is None else slow_ms) / 1000
+        self.blocked_sites = {}   # site -> times seen
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - expected) * 1000
+            metrics.observe("event_loop_lag_ms", lag_ms)
+            metrics.set_gauge("event_loop_lag_ms_last", lag_ms)
+            self._beat = time.monotonic()
+
+    def _watch(self):
+        stalled_site, stalled_since = None, None
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled >= self.slow and stalled_site is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+                stalled_site, detail = call_site(frame)
+                stalled_since = beat
+                del frame
+                if stalled_site not in self.blocked_sites:
+                    print(f"\n🩺 Event loop blocked for over {self.slow * 1000:.0f}ms at {detail}")
+                self.blocked_sites[stalled_site] = self.blocked_sites.get(stalled_site, 0) + 1
+            elif stalled_site is not None and self._beat != stalled_since:
+                # The loop is running again: record how long the block lasted
+                blocked_ms = (self._beat - stalled_since - self.interval) * 1000
+                metrics.observe("event_loop_blocked_ms", blocked_ms, site=stalled_site)
+                metrics.inc("event_loop_blocked_total", site=stalled_site)
+                stalled_site = None
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+
+
+def install(max_workers=None):
+    """
+    🩺 Monitor the running event loop and give it an instrumented default
+    executor (used by run_in_executor(None, ...)). Call from inside the loop.
+
+    Returns the LoopMonitor, or None when HEALTH_MONITOR_ENABLED is false.
+    """
+    if not get_settings().health_monitor_enabled:
+        return None
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(InstrumentedExecutor(
+        max_workers=max_workers, thread_name_prefix="asyncio-default", name="default"))
+    return LoopMonitor().start()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 📦 COLUMNAR EXPORT OF SCAN RESULTS FOR ANALYSIS             ║
+# ║  📊 DATA TOOLING: verdict history for notebooks and data pipelines        ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Streams the audit log (audit_log.iter_records) into a columnar file,   ║
+# ║    one row per scan, with every prompt_detected / response_detected flag ║
+# ║    flattened into its own boolean column (prompt_injection, ...)         ║
+# ║  • Parquet (.parquet) or Arrow IPC (.arrow) when pyarrow is installed     ║
+# ║    (auto-detected); otherwise a zlib-compressed columnar file (.scol)    ║
+# ║    that read_scol() turns back into columns                              ║
+# ║  • Rows are buffered only up to one row group (ROW_GROUP_ROWS), written,  ║
+# ║    then dropped - exports of any size run in constant memory             ║
+# ║                                                                            ║
+# ║  Usage: python scan_export.py scans.parquet [--since 7d] [--profile P]    ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import importlib.util
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+import audit_log
+import json_codec
+from scan_index import parse_time
+from threat_report import filter_records
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+ROW_GROUP_ROWS = 131072
+
+# Detection names AIRS reports in prompt_detected / response_detected. Each gets
+# a prompt_<name> and response_<name> column; names not listed here end up in
+# the other_detections column so the schema never changes mid-export.
+DETECTIONS = ("injection", "dlp", "url_cats", "toxic_content", "malicious_code",
+              "agent", "topic_violation", "db_security", "ungrounded")
+
+# (column, type) - types: str, float, int, bool
+SCHEMA = (
+    [("ts", "float"), ("tr_id", "str"), ("report_id", "str"), ("scan_id", "str"),
+     ("profile", "str"), ("source", "str"), ("action", "str"), ("category", "str"),
+     ("prompt_hash", "str"), ("prompt_chars", "int"), ("scan_ms", "float"),
+     ("reused", "bool"), ("chunks", "int"), ("error", "str")]
+    + [(f"prompt_{name}", "bool") for name in DETECTIONS]
+    + [(f"response_{name}", "bool") for name in DETECTIONS]
+    + [("other_detections", "str")]
+)
+
+_BASE_COLUMNS = [name for name, _ in SCHEMA[:14]]
+_DEFAULTS = {"reused": False, "chunks": 0}   # only written to the audit log when set
+
+
+def flatten(record):
+    """🧱 One audit record -> one row (tuple in SCHEMA order)."""
+    row = [record.get(name, _DEFAULTS.get(name)) for name in _BASE_COLUMNS]
+    prompt = record.get("prompt_detected") or {}
+    response = record.get("response_detected") or {}
+    row.extend(bool(prompt.get(name)) for name in DETECTIONS)
+    row.extend(bool(response.get(name)) for name in DETECTIONS)
+    other = [f"{side}.{name}" for side, flags in (("prompt", prompt), ("response", response))
+             for name, hit in flags.items() if hit and name not in DETECTIONS]
+    row.append(",".join(other) or None)
+    return row
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ✍️ WRITERS - write_row_group(columns) takes {column: list of values}
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class ArrowWriter:
+    """🏹 Parquet (zstd) or Arrow IPC file through pyarrow."""
+
+    def __init__(self, path, fmt="parquet"):
+        import pyarrow as pa
+        types = {"str": pa.string(), "float": pa.float64(), "int": pa.int64(), "bool": pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in SCHEMA])
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema,
+                                           options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    def write_row_group(self, columns):
+        self._writer.write_batch(
+            self.pa.record_batch([columns[name] for name, _ in SCHEMA], schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+SCOL_MAGIC = b"SCOL1\n"
+
+
+class ScolWriter:
+    """
+    🗜️ FALLBACK COLUMNAR FILE (no pyarrow needed)
+
+    Layout: SCOL_MAGIC, one JSON line with the schema, then one block per row
+    group: <u32 length><zlib data>. Inside a block each column is
+    <u32 length><bytes>: float64 / int64 / int8 arrays in native byte order
+    (NaN / -1 for missing values), strings dictionary-encoded as a JSON list of
+    distinct values followed by uint32 indexes.
+    """
+
+    def __init__(self, path, level=6):
+        self.level = level
+        self._file = open(path, "wb")
+        self._file.write(SCOL_MAGIC)
+        header = {"schema": SCHEMA, "byteorder": sys.byteorder}
+        self._file.write(json_codec.dumps(header) + b"\n")
+
+    def write_row_group(self, columns):
+        parts = []
+        for name, kind in SCHEMA:
+            values = columns[name]
+            if kind == "str":
+                index = {}
+                codes = array("I", (index.setdefault(v, len(index)) for v in values))
+                dictionary = json_codec.dumps(list(index))
+                data = struct.pack("<I", len(dictionary)) + dictionary + codes.tobytes()
+            elif kind == "float":
+                data = array("d", (float("nan") if v is None else v for v in values)).tobytes()
+            elif kind == "int":
+                data = array("q", (-1 if v is None else v for v in values)).tobytes()
+            else:
+                data = array("b", values).tobytes()
+            parts.append(struct.pack("<I", len(data)))
+            parts.append(data)
+        block = zlib.compress(b"".join(parts), self.level)
+        self._file.write(struct.pack("<I", len(block)))
+        self._file.write(block)
+
+    def close(self):
+        self._file.close()
+
+
+def read_scol(path):
+    """📖 Yield each row group of a .scol file as {column: list of values}."""
+    codes = {"float": "d", "int": "q", "bool": "b"}
+    with open(path, "rb") as f:
+        if f.read(len(SCOL_MAGIC)) != SCOL_MAGIC:
+            raise ValueError(f"{path} is not a scan export (.scol) file")
+        header = json_codec.loads(f.readline())
+        swap = header["byteorder"] != sys.byteorder
+        while True:
+            size = f.read(4)
+            if len(size) < 4:
+                return
+            block = zlib.decompress(f.read(struct.unpack("<I", size)[0]))
+            columns, offset = {}, 0
+            for name, kind in header["schema"]:
+                length = struct.unpack_from("<I", block, offset)[0]
+                data = block[offset + 4:offset + 4 + length]
+                offset += 4 + length
+                if kind == "str":
+                    size_dict = struct.unpack_from("<I", data)[0]
+                    dictionary = json_codec.loads(data[4:4 + size_dict])
+                    indexes = array("I", data[4 + size_dict:])
+                    if swap:
+                        indexes.byteswap()
+                    columns[name] = [dictionary[i] for i in indexes]
+                else:
+                    values = array(codes[kind], data)
+                    if swap:
+                        values.byteswap()
+                    columns[name] = [bool(v) for v in values] if kind == "bool" else values.tolist()
+            yield columns
+
+
+def open_writer(path, fmt=None):
+    """
+    ✍️ Writer for `path`. fmt: parquet, arrow or scol (default from the file
+    extension; parquet/arrow fall back to scol when pyarrow is missing).
+    """
+    fmt = fmt or {"arrow": "arrow", "feather": "arrow", "scol": "scol"}.get(
+        str(path).rsplit(".", 1)[-1], "parquet")
+    if fmt in ("parquet", "arrow") and PYARROW_AVAILABLE:
+        return ArrowWriter(path, fmt), fmt
+    if fmt != "scol":
+        print(f"⚠️  pyarrow is not installed - writing the compressed .scol format instead of {fmt}")
+    return ScolWriter(path), "scol"
+
+
+def export(records, writer, row_group_rows=ROW_GROUP_ROWS):
+    """📦 Write records through `writer` one row group at a time. Returns rows written."""
+    names = [name for name, _ in SCHEMA]
+    rows = 0
+    buffer = []
+    for record in records:
+        buffer.append(flatten(record))
+        if len(buffer) >= row_group_rows:
+            writer.write_row_group(dict(zip(names, map(list, zip(*buffer)))))
+            rows += len(buffer)
+            buffer = []
+    if buffer:
+        writer.write_row_group(dict(zip(names, map(list, zip(*buffer)))))
+        rows += len(buffer)
+    writer.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export scan results to a columnar file")
+    parser.add_argument("output", help="output file (.parquet, .arrow or .scol)")
+    parser.add_argument("--format", choices=("parquet", "arrow", "scol"))
+    parser.add_argument("--audit-dir", help="audit segments (default AUDIT_DIR)")
+    parser.add_argument("--since", type=parse_time, help="e.g. 24h, 7d, 2025-01-31")
+    parser.add_argument("--until", type=parse_time)
+    parser.add_argument("--profile")
+    parser.add_argument("--row-group-rows", type=int, default=ROW_GROUP_ROWS)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    writer, fmt = open_writer(args.output, args.format)
+    records = filter_records(audit_log.iter_records(args.audit_dir), args.since, args.until, args.profile)
+    rows = export(records, writer, args.row_group_rows)
+    print(f"📦 Exported {rows:,} scans to {args.output} ({fmt}) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
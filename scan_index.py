@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 🔎 QUERYABLE INDEX OF THE SCAN AUDIT HISTORY                ║
+# ║  🛡️ SECURITY TOOLING: incident investigation over past scan verdicts      ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Loads the audit log segments (audit_log.py) into a local SQLite file   ║
+# ║    (SCAN_INDEX_PATH, next to the audit output in logs/)                   ║
+# ║  • WAL mode and large batched transactions keep loading fast; each        ║
+# ║    segment's read position is saved in the same transaction, so loading  ║
+# ║    again (or following a live log) never adds a scan twice               ║
+# ║  • Indexes on time, verdict, category, profile, threat type and prompt    ║
+# ║    hash answer "blocked injection scans for profile X last week" without ║
+# ║    reading the whole history                                              ║
+# ║                                                                            ║
+# ║  Usage:                                                                    ║
+# ║    python scan_index.py ingest [--follow 5]                               ║
+# ║    python scan_index.py query --since 24h --action block --group-by threat║
+# ║    python scan_index.py query --prompt-hash <hash> --list                 ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import calendar
+import gzip
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import json_codec
+from chatbot_settings import get_settings
+
+INGEST_BATCH_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id           INTEGER PRIMARY KEY,
+    ts           REAL NOT NULL,
+    tr_id        TEXT,
+    profile      TEXT,
+    source       TEXT,
+    action       TEXT,
+    category     TEXT,
+    threats      TEXT,
+    prompt_hash  TEXT,
+    prompt_chars INTEGER,
+    scan_ms      REAL,
+    error        TEXT
+);
+CREATE TABLE IF NOT EXISTS scan_threats (
+    scan_id  INTEGER NOT NULL,
+    threat   TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    profile  TEXT,
+    action   TEXT
+);
+CREATE TABLE IF NOT EXISTS ingested_segments (
+    name      TEXT PRIMARY KEY,
+    offset    INTEGER NOT NULL,
+    complete  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scans_ts          ON scans(ts);
+CREATE INDEX IF NOT EXISTS scans_action_ts   ON scans(action, ts);
+CREATE INDEX IF NOT EXISTS scans_category_ts ON scans(category, ts);
+CREATE INDEX IF NOT EXISTS scans_profile_ts  ON scans(profile, ts);
+CREATE INDEX IF NOT EXISTS scans_prompt_hash ON scans(prompt_hash);
+CREATE INDEX IF NOT EXISTS threats_threat_ts ON scan_threats(threat, ts);
+"""
+
+# --group-by choices -> SQL expression
+GROUPS = {
+    "profile": "s.profile",
+    "action": "s.action",
+    "category": "s.category",
+    "source": "s.source",
+    "threat": "t.threat",
+    "prompt_hash": "s.prompt_hash",
+    "hour": "CAST(s.ts / 3600 AS INTEGER) * 3600",
+    "day": "CAST(s.ts / 86400 AS INTEGER) * 86400",
+}
+
+
+class ScanIndex:
+    """
+    🗄️ SQLITE INDEX OF AUDITED SCANS
+
+    - path: database file (default SCAN_INDEX_PATH)
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or get_settings().scan_index_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")     # readers never block the loader
+        self.db.execute("PRAGMA synchronous=NORMAL")   # safe with WAL, far fewer fsyncs
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-65536")    # 64 MiB page cache
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📥 LOADING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def ingest(self, audit_dir=None):
+        """
+        📥 Load every audit record not indexed yet. Returns the number of scans added.
+
+        Open (still growing) segments are read up to their last complete
+        line; the rest is picked up next time.
+        """
+        audit_dir = Path(audit_dir or get_settings().audit_dir)
+        progress = {name: (offset, complete) for name, offset, complete in
+                    self.db.execute("SELECT name, offset, complete FROM ingested_segments")}
+        added = 0
+        for segment in sorted(audit_dir.glob("audit-*.jsonl*")):
+            if segment.name.endswith(".tmp"):
+                continue
+            compressed = segment.suffix == ".gz"
+            name = segment.name[:-3] if compressed else segment.name
+            offset, complete = progress.get(name, (0, False))
+            if complete:
+                continue
+            try:
+                count, offset = self._ingest_segment(segment, name, offset, compressed)
+            except FileNotFoundError:
+                continue  # compressed while we were listing; the .gz follows
+            added += count
+            progress[name] = (offset, compressed)
+        return added
+
+    def _ingest_segment(self, segment, name, offset, compressed):
+        added = 0
+        with (gzip.open(segment, "rb") if compressed else open(segment, "rb")) as f:
+            if compressed:
+                _skip(f, offset)       # gzip cannot seek cheaply; read past what we have
+            else:
+                f.seek(offset)
+            next_id = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM scans").fetchone()[0]
+            scans, threats = [], []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break              # torn line of a segment still being written
+                offset += len(line)
+                try:
+                    record = json_codec.loads(line)
+                except ValueError:
+                    continue
+                scans.append(_scan_row(next_id, record))
+                threats.extend((next_id, threat, record.get("ts", 0.0), record.get("profile"),
+                                record.get("action")) for threat in record.get("threats") or ())
+                next_id += 1
+                if len(scans) >= INGEST_BATCH_ROWS:
+                    self._insert(scans, threats, name, offset, False)
+                    added += len(scans)
+                    scans, threats = [], []
+            self._insert(scans, threats, name, offset, compressed)
+            added += len(scans)
+        return added, offset
+
+    def _insert(self, scans, threats, name, offset, complete):
+        # One transaction per batch: the rows and the new read position commit together
+        with self.db:
+            self.db.executemany("INSERT INTO scans VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", scans)
+            self.db.executemany("INSERT INTO scan_threats VALUES (?,?,?,?,?)", threats)
+            self.db.execute(
+                "INSERT INTO ingested_segments (name, offset, complete) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET offset = excluded.offset, complete = excluded.complete",
+                (name, offset, int(complete)))
+
+    def follow(self, interval, audit_dir=None):
+        """🔁 Keep loading new audit records every `interval` seconds (Ctrl+C stops)."""
+        while True:
+            added = self.ingest(audit_dir)
+            if added:
+                print(f"📥 Indexed {added} scans")
+            time.sleep(interval)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🔎 QUERYING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _where(self, since=None, until=None, profile=None, action=None, category=None,
+               threat=None, prompt_hash=None):
+        clauses, params = [], []
+        for column, value in (("s.ts >=", since), ("s.ts <", until), ("s.profile =", profile),
+                              ("s.action =", action), ("s.category =", category),
+                              ("t.threat =", threat), ("s.prompt_hash =", prompt_hash)):
+            if value is not None:
+                clauses.append(f"{column} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def aggregate(self, group_by=None, limit=50, **filters):
+        """
+        📊 Scans, blocks and average scan time per group.
+
+        group_by: one of GROUPS (None = one overall row). Filters: since,
+        until (epoch seconds), profile, action, category, threat, prompt_hash.
+        Returns (column names, rows), largest groups first.
+        """
+        uses_threats = group_by == "threat" or filters.get("threat") is not None
+        source = "scans s JOIN scan_threats t ON t.scan_id = s.id" if uses_threats else "scans s"
+        where, params = self._where(**filters)
+        key = GROUPS[group_by] if group_by else "'all'"
+        sql = (f"SELECT {key} AS grp, COUNT(*) AS scans, "
+               f"SUM(s.action = 'block') AS blocked, ROUND(AVG(s.scan_ms), 1) AS avg_scan_ms "
+               f"FROM {source}{where} GROUP BY grp ORDER BY scans DESC LIMIT ?")
+        rows = self.db.execute(sql, params + [limit]).fetchall()
+        if group_by in ("hour", "day"):
+            rows = [(_format_ts(r[0]),) + tuple(r[1:]) for r in rows]
+        return [group_by or "all", "scans", "blocked", "avg_scan_ms"], rows
+
+    def find(self, limit=50, **filters):
+        """📋 The matching scans themselves, newest first."""
+        uses_threats = filters.get("threat") is not None
+        source = "scans s JOIN scan_threats t ON t.scan_id = s.id" if uses_threats else "scans s"
+        where, params = self._where(**filters)
+        columns = ["ts", "tr_id", "profile", "action", "category", "threats", "scan_ms", "prompt_hash"]
+        sql = (f"SELECT {', '.join('s.' + c for c in columns)} FROM {source}{where} "
+               f"ORDER BY s.ts DESC LIMIT ?")
+        rows = [(_format_ts(r[0]),) + tuple(r[1:]) for r in self.db.execute(sql, params + [limit])]
+        return columns, rows
+
+
+def _skip(f, count):
+    while count > 0:
+        chunk = f.read(min(count, 1 << 20))
+        if not chunk:
+            break
+        count -= len(chunk)
+
+
+def _scan_row(row_id, record):
+    return (row_id, record.get("ts", 0.0), record.get("tr_id"), record.get("profile"),
+            record.get("source"), record.get("action"), record.get("category"),
+            ",".join(record.get("threats") or ()), record.get("prompt_hash"),
+            record.get("prompt_chars"), record.get("scan_ms"), record.get("error"))
+
+
+def _format_ts(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+
+def parse_time(value):
+    """⏰ '24h', '30m', '7d' (that long ago), epoch seconds or ISO 'YYYY-MM-DD[THH:MM]' (UTC)."""
+    if value is None:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return time.time() - seconds
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return float(calendar.timegm(time.strptime(value, fmt)))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"unrecognised time: {value!r}")
+
+
+def print_table(columns, rows):
+    """🖨️ Print rows as an aligned text table."""
+    cells = [[("" if v is None else str(v)) for v in row] for row in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and query the scan audit history")
+    parser.add_argument("--db", help="index file (default SCAN_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="load new audit records into the index")
+    ingest.add_argument("--audit-dir", help="audit segments (default AUDIT_DIR)")
+    ingest.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="keep loading new records at this interval")
+
+    query = commands.add_parser("query", help="aggregate or list indexed scans")
+    query.add_argument("--since", type=parse_time, help="e.g. 24h, 7d, 2025-01-31")
+    query.add_argument("--until", type=parse_time)
+    query.add_argument("--profile")
+    query.add_argument("--action", help="allow or block")
+    query.add_argument("--category", help="benign or malicious")
+    query.add_argument("--threat", help="e.g. prompt.injection, response.dlp")
+    query.add_argument("--prompt-hash")
+    query.add_argument("--group-by", choices=sorted(GROUPS))
+    query.add_argument("--list", action="store_true", help="show matching scans instead of totals")
+    query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    index = ScanIndex(args.db)
+    try:
+        if args.command == "ingest":
+            start = time.perf_counter()
+            added = index.ingest(args.audit_dir)
+            print(f"📥 Indexed {added} scans in {time.perf_counter() - start:.2f}s ({index.path})")
+            if args.follow:
+                index.follow(args.follow, args.audit_dir)
+            return 0
+
+        filters = dict(since=args.since, until=args.until, profile=args.profile,
+                       action=args.action, category=args.category, threat=args.threat,
+                       prompt_hash=args.prompt_hash)
+        start = time.perf_counter()
+        if args.list:
+            columns, rows = index.find(limit=args.limit, **filters)
+        else:
+            columns, rows = index.aggregate(group_by=args.group_by, limit=args.limit, **filters)
+        print_table(columns, rows)
+        print(f"\n⏱️  {len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return 0
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                  📋 HUMAN-READABLE REPORT FOR ONE SCAN VERDICT              ║
+# ║  🛡️ SECURITY REPORTING: explains a verdict - never changes it            ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Prints the verdict any scanner returns (HTTP, SDK or mock backend):   ║
+# ║    classification, action, IDs and scan time                             ║
+# ║  • Names each threat found in the USER'S MESSAGE and each threat Palo    ║
+# ║    Alto predicts in the AI's RESPONSE, with a hint on how to rephrase    ║
+# ║  • Used by both chatbots, so they explain verdicts the same way          ║
+# ║                                                                            ║
+# ║  For the aggregate view over many scans see threat_report.py.            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+# 📚 Security codes in AIRS verdicts -> names people understand
+THREAT_CATEGORIES = {
+    # Prompt-based threats
+    'prompt_injection': 'Prompt Injection Attack',
+    'injection': 'Prompt Injection Attack',
+    'jailbreak': 'Jailbreak Attempt',
+    'agent': 'AI Agent Manipulation',
+    'malicious_code': 'Malicious Code Generation',
+    'sensitive_data': 'Sensitive Data Exposure',
+    'toxic_content': 'Toxic Content',
+    'toxicity': 'Toxic Content',
+    'bias': 'Bias Detection',
+    'harmful_content': 'Harmful Content',
+
+    # Response-based threats
+    'url_cats': 'Malicious URL Detection',
+    'malware': 'Malware Detection',
+    'db_security': 'Database Security Threat',
+    'dlp': 'Data Loss Prevention',
+    'pii': 'Personal Identifiable Information',
+    'financial_data': 'Financial Data Exposure',
+    'intellectual_property': 'Intellectual Property Risk',
+    'code_injection': 'Code Injection',
+    'resource_overload': 'Resource Overload/DoS',
+    'hallucination': 'AI Hallucination',
+}
+
+# 💡 threat code -> (what is wrong, how to fix it), for threats in the user's message
+PROMPT_GUIDANCE = {
+    'injection': ("Malicious AI instruction patterns detected",
+                  "Rephrase without command-like language"),
+    'agent': ("AI agent manipulation attempt detected",
+              "Remove role-playing or identity claims"),
+    'toxicity': ("Harmful or offensive content identified",
+                 "Use respectful, appropriate language"),
+    'url_cats': ("Malicious URL detected in message",
+                 "Remove suspicious links"),
+    'dlp': ("Sensitive data exposure risk",
+            "Remove personal/confidential information"),
+}
+PROMPT_GUIDANCE['prompt_injection'] = PROMPT_GUIDANCE['injection']
+PROMPT_GUIDANCE['toxic_content'] = PROMPT_GUIDANCE['toxicity']
+
+# 🔮 threat code -> (what the AI might do, how to fix it), for predicted response threats
+RESPONSE_GUIDANCE = {
+    'url_cats': ("🌐 AI might generate malicious URLs",
+                 "Rephrase to avoid requesting potentially harmful links"),
+    'db_security': ("🗄️ AI might expose database security information",
+                    "Avoid questions about system internals or security"),
+    'dlp': ("🔒 AI might leak sensitive data in its response",
+            "Rephrase without requesting personal or confidential info"),
+    'toxicity': ("💬 AI might generate harmful or offensive content",
+                 "Rephrase using respectful, appropriate language"),
+    'injection': ("⚡ AI might be tricked into malicious behavior",
+                  "Remove command-like or instructional language"),
+}
+RESPONSE_GUIDANCE['prompt_injection'] = RESPONSE_GUIDANCE['injection']
+RESPONSE_GUIDANCE['toxic_content'] = RESPONSE_GUIDANCE['toxicity']
+DEFAULT_RESPONSE_GUIDANCE = ("⚠️ AI response might violate security policies",
+                             "Modify your question to be safer and more appropriate")
+
+
+def threat_name(threat_type):
+    """📚 Readable name for a threat code ('url_cats' -> 'Malicious URL Detection')."""
+    return THREAT_CATEGORIES.get(threat_type, threat_type.replace('_', ' ').title())
+
+
+def print_scan_report(scan_result, title="📋 PALO ALTO NETWORKS SECURITY SCAN RESULTS"):
+    """
+    🖨️ Print the verdict and every threat in it. Returns True when a threat
+    (or a "malicious" classification) was reported.
+    """
+    print(f"\n{title}:")
+    print("=" * 50)
+    print(f"🛡️ Security Classification: {scan_result.get('category', 'Unknown')}")
+    print(f"🚦 Security Action: {scan_result.get('action', 'Unknown')}")
+    print(f"📋 Security Profile: {scan_result.get('profile_name', 'Unknown')}")
+    print(f"🆔 Profile ID: {scan_result.get('profile_id', 'Unknown')}")
+    print(f"⏱️ Security Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")
+    print(f"🆔 Transaction ID: {scan_result.get('tr_id', 'Unknown')}")
+    print(f"📄 Report ID: {scan_result.get('report_id', 'Unknown')}")
+    print(f"🔍 Scan ID: {scan_result.get('scan_id', 'Unknown')}")
+    if scan_result.get('chunks_scanned'):
+        print(f"✂️ Scanned as {scan_result['chunks_scanned']} chunks")
+    if scan_result.get('verdict_reused'):
+        print("♻️ Verdict reused from an earlier scan of the same message")
+
+    print("\n🚨 DETAILED SECURITY THREAT ANALYSIS:")
+    print("=" * 50)
+    print(f"   🎯 INPUT Threats: {scan_result.get('prompt_detected', {})}")      # Threats in user's message
+    print(f"   📤 OUTPUT Threats: {scan_result.get('response_detected', {})}")   # Predicted threats in AI response
+    threats_found = False
+
+    # 🎯 THREATS IN THE USER'S MESSAGE
+    detected = [t for t, hit in (scan_result.get('prompt_detected') or {}).items() if hit]
+    if detected:
+        print("\n🎯 USER MESSAGE SECURITY THREATS:")
+    for threat_type in detected:
+        threats_found = True
+        print(f"   🔴 {threat_name(threat_type)} detected in user's message")
+        if threat_type in PROMPT_GUIDANCE:
+            issue, fix = PROMPT_GUIDANCE[threat_type]
+            print(f"      └─ 🚫 SECURITY ISSUE: {issue}")
+            print(f"      └─ 💡 SECURITY FIX: {fix}")
+
+    # 📤 THREATS PALO ALTO PREDICTS IN THE AI'S RESPONSE
+    # AIRS also predicts what the chatbot might answer, and blocks questions
+    # whose likely answers are dangerous before the AI ever sees them.
+    detected = [t for t, hit in (scan_result.get('response_detected') or {}).items() if hit]
+    if detected:
+        print("\n📤 PREDICTED AI RESPONSE THREATS:")
+    for threat_type in detected:
+        threats_found = True
+        issue, fix = RESPONSE_GUIDANCE.get(threat_type, DEFAULT_RESPONSE_GUIDANCE)
+        print(f"   🔴 RESPONSE THREAT: {threat_name(threat_type)} predicted in AI output")
+        print(f"      └─ PREDICTION: {issue}")
+        print(f"      └─ 💡 SECURITY FIX: {fix}")
+
+    # 🚦 OVERALL ASSESSMENT
+    if scan_result.get('category') == 'malicious' and not threats_found:
+        print("   🔴 GENERAL SECURITY POLICY VIOLATION")
+        print("      └─ 🛡️ SECURITY: Content flagged as malicious by Palo Alto policies")
+        threats_found = True
+    if not threats_found:
+        print("   ✅ No security threats detected by Palo Alto Networks")
+    print("=" * 50)
+    return threats_found
@@ -0,0 +1,257 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║           🚦 PRIORITY + FAIR-SHARE SCHEDULER IN FRONT OF THE SCANNER        ║
+# ║  ⚙️ SYSTEM COMPONENT: decides WHICH scan runs next - never WHETHER a       ║
+# ║     prompt is safe (that is still Palo Alto's job)                         ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Three priority classes: interactive (people waiting), batch (bulk      ║
+# ║    re-screening) and background (anything that can wait)                  ║
+# ║  • Weighted fair queuing: each class gets a share of the scan workers     ║
+# ║    proportional to its weight, and inside a class every tenant/profile    ║
+# ║    gets its fair share, so one big job cannot starve everyone else        ║
+# ║  • Bounded queues: when a class's queue is full, new work is SHED         ║
+# ║    (rejected at once) instead of queueing forever                         ║
+# ║  • Work that waited longer than its class allows is shed, not scanned     ║
+# ║  • Queue wait, scan time and total latency go to metrics per class        ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import metrics
+from chatbot_settings import get_settings
+
+PRIORITY_CLASSES = ("interactive", "batch", "background")
+
+
+class ScanRejected(Exception):
+    """🚫 The scheduler shed this scan (queue full, waited too long, or shut down)."""
+
+
+def _settle(future, result=None, error=None):
+    """Complete `future` unless the caller already cancelled it."""
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass  # cancelled between the check and here
+
+
+class _ClassQueue:
+    """One priority class: its tenant-fair heap and fair-queuing clocks."""
+    __slots__ = ("heap", "finish", "virtual_time", "tenant_finish")
+
+    def __init__(self):
+        self.heap = []            # (stamp, seq, item), fair across tenants
+        self.finish = 0.0         # class's last virtual finish time among classes
+        self.virtual_time = 0.0   # stamp of the last item taken from this class
+        self.tenant_finish = {}   # tenant -> last stamp given to that tenant
+
+
+class ScanScheduler:
+    """
+    🚦 RUNS scan_func(prompt) ON A FIXED SET OF WORKERS, IN FAIR ORDER
+
+    Usage:
+
+        scheduler = ScanScheduler(scanner.sync_scan)
+        future = scheduler.submit(prompt, priority="interactive", tenant="team-a")
+        verdict = future.result()
+
+    Fair queuing uses virtual finish times at two levels. Between classes, a
+    free worker serves the non-empty class whose next finish time
+    (max(virtual now, class's last finish) + 1 / class weight) is smallest, so
+    busy classes share workers in proportion to their weights. Inside a class,
+    each scan is stamped max(class clock, tenant's last stamp) + 1 / tenant
+    weight and the smallest stamp goes first: a tenant that has queued a lot
+    gets later stamps, so light tenants overtake it.
+
+    Settings (defaults for the constructor arguments):
+    - SCHEDULER_WORKERS: scans running at once
+    - SCHEDULER_WEIGHT_INTERACTIVE / _BATCH / _BACKGROUND: class shares
+    - SCHEDULER_QUEUE_INTERACTIVE / _BATCH / _BACKGROUND: queue bounds
+    - SCHEDULER_MAX_WAIT_INTERACTIVE_SECONDS: interactive work older than this is shed
+    """
+
+    def __init__(self, scan_func, workers=None, weights=None, queue_limits=None,
+                 max_wait_seconds=None, tenant_weights=None):
+        settings = get_settings()
+        self.scan_func = scan_func
+        self.workers = workers or settings.scheduler_workers
+        self.weights = weights or {
+            "interactive": settings.scheduler_weight_interactive,
+            "batch": settings.scheduler_weight_batch,
+            "background": settings.scheduler_weight_background,
+        }
+        self.queue_limits = queue_limits or {
+            "interactive": settings.scheduler_queue_interactive,
+            "batch": settings.scheduler_queue_batch,
+            "background": settings.scheduler_queue_background,
+        }
+        self.max_wait_seconds = max_wait_seconds or {
+            "interactive": settings.scheduler_max_wait_interactive_seconds,
+        }
+        self.tenant_weights = dict(tenant_weights or {})
+
+        self._classes = {name: _ClassQueue() for name in PRIORITY_CLASSES}
+        self._queued = {name: 0 for name in PRIORITY_CLASSES}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"scan-scheduler-{i}", daemon=True)
+            for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📥 SUBMITTING WORK
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def submit(self, prompt, priority="interactive", tenant="default"):
+        """
+        📤 Queue a scan and return a concurrent.futures.Future for its verdict.
+
+        If the class's queue is full the future fails at once with
+        ScanRejected - callers should treat that like a failed scan (do NOT
+        let the prompt through unscanned).
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
+        future = Future()
+        with self._cond:
+            if self._closed:
+                reason = "scheduler is shut down"
+            elif self._queued[priority] >= self.queue_limits[priority]:
+                reason = f"{priority} queue full ({self.queue_limits[priority]})"
+            else:
+                reason = None
+                queue = self._classes[priority]
+                stamp = max(queue.virtual_time, queue.tenant_finish.get(tenant, 0.0)) + (
+                    1.0 / self.tenant_weights.get(tenant, 1.0))
+                queue.tenant_finish[tenant] = stamp
+                item = (prompt, priority, tenant, future, time.monotonic())
+                heapq.heappush(queue.heap, (stamp, next(self._seq), item))
+                self._queued[priority] += 1
+                metrics.set_gauge("scan_queue_depth", self._queued[priority], priority=priority)
+                self._cond.notify()
+        if reason is not None:
+            metrics.inc("scans_shed_total", priority=priority, reason="queue_full")
+            future.set_exception(ScanRejected(reason))
+        return future
+
+    def queue_depths(self):
+        """📏 Scans waiting per priority class."""
+        with self._cond:
+            return dict(self._queued)
+
+    def shutdown(self, wait=True):
+        """
+        🔒 Stop accepting work. Queued scans still run when wait=True;
+        otherwise they are shed with ScanRejected.
+        """
+        with self._cond:
+            self._closed = True
+            if not wait:
+                for queue in self._classes.values():
+                    while queue.heap:
+                        _, _, item = heapq.heappop(queue.heap)
+                        self._shed(item, "shutdown")
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # ⚙️ WORKERS
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _shed(self, item, reason):
+        # Caller holds self._cond
+        _, priority, _, future, _ = item
+        self._queued[priority] -= 1
+        metrics.set_gauge("scan_queue_depth", self._queued[priority], priority=priority)
+        metrics.inc("scans_shed_total", priority=priority, reason=reason)
+        _settle(future, error=ScanRejected(f"{priority} scan shed: {reason}"))
+
+    def _pick_class(self):
+        # Caller holds self._cond. Returns the class queue to serve next, or None.
+        best, best_finish = None, None
+        for name, queue in self._classes.items():
+            if not queue.heap:
+                continue
+            finish = max(self._virtual_time, queue.finish) + 1.0 / self.weights[name]
+            if best is None or finish < best_finish:
+                best, best_finish = queue, finish
+        if best is not None:
+            best.finish = self._virtual_time = best_finish
+        return best
+
+    def _next_item(self):
+        with self._cond:
+            while True:
+                while True:
+                    queue = self._pick_class()
+                    if queue is None:
+                        break
+                    stamp, _, item = heapq.heappop(queue.heap)
+                    queue.virtual_time = max(queue.virtual_time, stamp)
+                    prompt, priority, tenant, future, queued_at = item
+                    if queue.tenant_finish.get(tenant, 0.0) <= queue.virtual_time:
+                        queue.tenant_finish.pop(tenant, None)  # nothing queued: forget the tenant
+                    max_wait = self.max_wait_seconds.get(priority)
+                    if max_wait and time.monotonic() - queued_at > max_wait:
+                        self._shed(item, "waited_too_long")
+                        continue
+                    if not future.set_running_or_notify_cancel():
+                        self._queued[priority] -= 1  # cancelled by the caller
+                        metrics.set_gauge("scan_queue_depth", self._queued[priority], priority=priority)
+                        continue
+                    self._queued[priority] -= 1
+                    metrics.set_gauge("scan_queue_depth", self._queued[priority], priority=priority)
+                    return item
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _worker(self):
+        # 🔁 Never dies: a dead worker would leave every later future hanging
+        while True:
+            try:
+                item = self._next_item()
+            except Exception as e:
+                print(f"⚠️ Scan scheduler error: {e}")
+                continue
+            if item is None:
+                return
+            try:
+                self._run(item)
+            except Exception as e:
+                print(f"⚠️ Scan scheduler error: {e}")
+                _settle(item[3], error=e)
+
+    def _run(self, item):
+        prompt, priority, tenant, future, queued_at = item
+        started = time.monotonic()
+        wait_ms = (started - queued_at) * 1000
+        metrics.observe("scan_queue_wait_ms", wait_ms, priority=priority)
+        try:
+            result = self.scan_func(prompt)
+        except BaseException as e:
+            metrics.inc("scans_failed_total", priority=priority)
+            _settle(future, error=e)
+            return
+        finished = time.monotonic()
+        metrics.observe("scan_service_ms", (finished - started) * 1000, priority=priority)
+        metrics.observe("scan_latency_ms", (finished - queued_at) * 1000, priority=priority)
+        metrics.inc("scans_completed_total", priority=priority, tenant=tenant)
+        if isinstance(result, dict):
+            result.setdefault("queue_wait_ms", wait_ms)
+        _settle(future, result)
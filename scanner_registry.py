@@ -0,0 +1,177 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║           🛡️ MANY SECURITY PROFILES AND API KEYS IN ONE PROCESS             ║
+# ║  ⚠️  SECURITY COMPONENT: picks WHICH security policy scans each request    ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Holds one SDKSecurityScanner per (API key, profile, endpoint)          ║
+# ║  • Routes each tenant to its scanner - an unknown tenant is an error,     ║
+# ║    never a silent fallback to someone else's policy                       ║
+# ║  • Shares what can be shared: the HTTP connection pool (http_session),    ║
+# ║    one verdict cache with keys namespaced per API key + profile, and one  ║
+# ║    scan scheduler                                                         ║
+# ║  • One rate limiter per API KEY, shared by all profiles using that key    ║
+# ║  • Per-tenant metrics: scans, verdicts and latency                        ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import hashlib
+import os
+import threading
+import time
+
+import json_codec
+import metrics
+from chatbot_settings import get_settings
+from rate_limit import TokenBucket
+from scan_scheduler import ScanScheduler
+from verdict_similarity import VerdictSimilarityIndex
+
+
+class UnknownTenant(KeyError):
+    """🚫 No security profile is registered for this tenant."""
+
+
+def _key_fingerprint(api_key):
+    # Identifies a key in cache namespaces and metrics without exposing it
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class ScannerRegistry:
+    """
+    🗂️ TENANT -> SECURITY PROFILE ROUTING
+
+    Usage:
+
+        registry = ScannerRegistry()
+        registry.register("team-a", profile_name="chat-strict", api_key=KEY_A)
+        registry.register("team-b", profile_name="chat-relaxed", api_key=KEY_A)
+        verdict = registry.scan("team-a", prompt)
+
+    Or load tenants from the JSON file named by TENANT_CONFIG_FILE:
+
+        {"tenants": {"team-a": {"profile_name": "chat-strict",
+                                "api_key_env": "TEAM_A_PANW_KEY"}}}
+
+    API keys are read from the named environment variables, never stored in
+    the file. SCAN_RATE_LIMIT_PER_SECOND limits each API key (0 = no limit).
+    """
+
+    def __init__(self, rate_limit_per_second=None):
+        settings = get_settings()
+        self.rate_limit_per_second = (settings.scan_rate_limit_per_second
+                                      if rate_limit_per_second is None else rate_limit_per_second)
+        self.similar_verdicts = VerdictSimilarityIndex()  # one index, namespaced per key + profile
+        self._scanners = {}   # (key fingerprint, profile, endpoint) -> SDKSecurityScanner
+        self._tenants = {}    # tenant -> SDKSecurityScanner
+        self._limiters = {}   # key fingerprint -> TokenBucket
+        self._scheduler = None
+        self._lock = threading.Lock()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 📝 REGISTRATION
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def register(self, tenant, profile_name, api_key=None, api_endpoint=None):
+        """
+        ➕ Route `tenant` to `profile_name`, scanned with `api_key`.
+
+        api_key and api_endpoint default to the PANW_AI_SEC_* settings.
+        Tenants with the same key, profile and endpoint share one scanner.
+        """
+        from secure_chatbot_openai_sdk import SDKSecurityScanner
+
+        settings = get_settings()
+        api_key = api_key or settings.panw_ai_sec_api_key
+        if not api_key:
+            raise ValueError(f"No API key for tenant {tenant!r}")
+        api_endpoint = (api_endpoint or settings.panw_ai_sec_endpoint).rstrip("/")
+        fingerprint = _key_fingerprint(api_key)
+        scanner_key = (fingerprint, profile_name, api_endpoint)
+
+        with self._lock:
+            scanner = self._scanners.get(scanner_key)
+            if scanner is None:
+                scanner = SDKSecurityScanner(api_key, profile_name, api_endpoint=api_endpoint)
+                scanner.similar_verdicts = self.similar_verdicts
+                scanner.cache_namespace = f"{fingerprint}:{profile_name}"
+                limiter = self._limiters.get(fingerprint)
+                if limiter is None and self.rate_limit_per_second > 0:
+                    limiter = self._limiters[fingerprint] = TokenBucket(self.rate_limit_per_second)
+                scanner.rate_limiter = limiter
+                self._scanners[scanner_key] = scanner
+            self._tenants[tenant] = scanner
+        return scanner
+
+    @classmethod
+    def from_config(cls, path=None):
+        """📄 Build a registry from a tenant JSON file (default: TENANT_CONFIG_FILE)."""
+        path = path or get_settings().tenant_config_file
+        if not path:
+            raise ValueError("No tenant config file given and TENANT_CONFIG_FILE is not set")
+        with open(path, "rb") as f:
+            config = json_codec.loads(f.read())
+        registry = cls(rate_limit_per_second=config.get("rate_limit_per_second"))
+        for tenant, entry in config.get("tenants", {}).items():
+            api_key = os.environ.get(entry["api_key_env"]) if entry.get("api_key_env") else None
+            if entry.get("api_key_env") and not api_key:
+                raise ValueError(f"Tenant {tenant!r}: environment variable "
+                                 f"{entry['api_key_env']} is not set")
+            registry.register(tenant, entry["profile_name"], api_key=api_key,
+                              api_endpoint=entry.get("api_endpoint"))
+        return registry
+
+    def tenants(self):
+        """📋 Tenant -> profile name."""
+        with self._lock:
+            return {tenant: scanner.profile_name for tenant, scanner in self._tenants.items()}
+
+    def scanner_for(self, tenant):
+        """🔀 The scanner that serves `tenant` (raises UnknownTenant)."""
+        scanner = self._tenants.get(tenant)
+        if scanner is None:
+            raise UnknownTenant(tenant)
+        return scanner
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🔍 SCANNING
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def scan(self, tenant, prompt):
+        """🔍 Scan with the tenant's profile and record per-tenant metrics."""
+        scanner = self.scanner_for(tenant)
+        start = time.monotonic()
+        try:
+            result = scanner.sync_scan(prompt)
+        except Exception:
+            metrics.inc("tenant_scans_total", tenant=tenant, profile=scanner.profile_name,
+                        action="error")
+            raise
+        metrics.observe("tenant_scan_ms", (time.monotonic() - start) * 1000, tenant=tenant)
+        metrics.inc("tenant_scans_total", tenant=tenant, profile=scanner.profile_name,
+                    action=result.get("action", "unknown"))
+        return result
+
+    def submit_scan(self, tenant, prompt, priority="interactive"):
+        """
+        🚦 Queue a scan in the shared scheduler; returns a Future.
+
+        Tenants are the fair-share unit, so a tenant running a bulk job does
+        not slow down other tenants' chats.
+        """
+        self.scanner_for(tenant)  # fail fast for unknown tenants
+        scheduler = self._scheduler
+        if scheduler is None:
+            with self._lock:
+                if self._scheduler is None:
+                    self._scheduler = ScanScheduler(lambda job: self.scan(*job))
+                scheduler = self._scheduler
+        return scheduler.submit((tenant, prompt), priority=priority, tenant=tenant)
+
+    def close(self):
+        """🔒 Stop the shared scheduler and every scanner's threads (queued scans still finish)."""
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+            scanners = list(self._scanners.values())
+        if scheduler is not None:
+            scheduler.shutdown()
+        for scanner in scanners:
+            scanner.close()
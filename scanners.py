@@ -0,0 +1,644 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║            🛡️ ONE SCANNER INTERFACE, INTERCHANGEABLE BACKENDS               ║
+# ║  ⚠️  SECURITY COMPONENT: every backend answers with the same AIRS-shaped   ║
+# ║     verdict dict, so callers never care which one is behind it           ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • SecurityScanner: the protocol every scanner follows                    ║
+# ║      scan(prompt, cancel=None)          -> verdict (blocking)             ║
+# ║      await ascan(prompt, cancel=None)   -> verdict (on the scanner's own  ║
+# ║                                            bounded thread pool)           ║
+# ║      batch_scan(prompts, cancel=None)   -> verdicts, in order             ║
+# ║      submit_scan(prompt, priority)      -> Future (ScanScheduler)         ║
+# ║  • Backends:                                                               ║
+# ║      HTTPScanner   REST calls: request building, retries, failover,       ║
+# ║                    parsing, chunking and auditing for every AIRS backend  ║
+# ║      SDKSecurityScanner (secure_chatbot_openai_sdk.py) - an HTTPScanner   ║
+# ║                    configured by the SDK, with near-duplicate reuse       ║
+# ║      MockScanner   local phrase matching, no network (benchmarks, demos)  ║
+# ║  • Layers wrap any scanner and are stacked with stack():                  ║
+# ║      CachedScanner       exact-prompt verdict cache (SCAN_CACHE_*)        ║
+# ║      DedupScanner        identical prompts in flight share one scan       ║
+# ║      RateLimitedScanner  token bucket (SCAN_RATE_LIMIT_PER_SECOND)        ║
+# ║      MeteredScanner      scanner_scans_total / scanner_scan_ms            ║
+# ║  • build_scanner() makes a backend and stacks the layers the settings     ║
+# ║    turn on. Every scan method of a stack (scan, sync_scan, ascan,         ║
+# ║    async_scan, batch_scan, submit_scan) goes through all its layers       ║
+# ║  • Verdicts are printed for people by scan_report.print_scan_report()     ║
+# ║                                                                            ║
+# ║  🛡️ A scan that raises is a FAILED scan: the prompt never goes to OpenAI. ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import audit_log
+import json_codec
+import lifecycle
+import metrics
+from cancellation import CancelToken, Cancelled, record_cancellation
+from chatbot_settings import get_settings
+from endpoint_manager import get_endpoint_manager
+from rate_limit import TokenBucket
+from runtime_health import InstrumentedExecutor
+from scan_scheduler import ScanScheduler
+
+SCAN_PATH = "/v1/scan/sync/request"
+
+
+class SecurityScanner:
+    """
+    🛡️ THE SCANNER PROTOCOL
+
+    Subclasses implement scan(); ascan() and batch_scan() come for free and
+    run scan() on this scanner's own thread pool: SCAN_EXECUTOR_WORKERS
+    threads, with at most SCAN_EXECUTOR_QUEUE scans waiting for one (more
+    raise runtime_health.ExecutorSaturated). Its saturation is in metrics
+    under executor="<backend>-scan:<profile>".
+
+    Attributes every scanner has:
+    - backend: "http", "sdk", "mock" (metrics label)
+    - profile_name: the AI security profile its verdicts come from
+    - source: the audit log "source" of its scans
+    """
+
+    backend = "scanner"
+    source = None
+
+    def __init__(self, profile_name):
+        self.profile_name = profile_name
+        self.cache_namespace = profile_name  # 🗂️ Cache key prefix (ScannerRegistry adds the API key)
+        self._scan_slots = None              # 🚦 Limits concurrent ascan() calls (SCAN_CONCURRENCY)
+        self._scan_slots_limit = None
+        self._executor = None                # 🧵 Created on first ascan() / batch_scan()
+        self._executor_lock = threading.Lock()
+        self._scheduler = None               # 🚦 Created by the first submit_scan() call
+        self._scheduler_lock = threading.Lock()
+
+    def scan(self, prompt, cancel=None):
+        """🔍 Scan one prompt and return its verdict; raises if the scan failed."""
+        raise NotImplementedError
+
+    def probe(self, prompt, cancel=None):
+        """
+        🧪 Health-check scan (the warm-up canary): the backend's own verdict,
+        without layers, auditing, verdict reuse or progress output. Never use
+        it for user prompts.
+        """
+        return self.scan(prompt, cancel)
+
+    async def ascan(self, prompt, cancel=None):
+        """
+        ⚡ scan() without blocking the event loop.
+
+        At most SCAN_CONCURRENCY scans run at once; the rest wait here. If
+        the awaiting task is cancelled, `cancel` (created if not given) is
+        cancelled too, so the worker thread stops retrying.
+        """
+        limit = get_settings().scan_concurrency
+        if self._scan_slots is None or self._scan_slots_limit != limit:
+            self._scan_slots, self._scan_slots_limit = asyncio.Semaphore(limit), limit
+        slots = self._scan_slots
+
+        cancel = cancel or CancelToken()
+        try:
+            async with slots:
+                cancel.raise_if_cancelled()
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor(), self.scan, prompt, cancel)
+        except asyncio.CancelledError:
+            cancel.cancel("caller cancelled")  # ⏹️ Stop the worker thread's retries too
+            raise
+
+    def batch_scan(self, prompts, cancel=None):
+        """
+        📦 Scan many prompts on the thread pool; returns verdicts in order.
+
+        Never queues more than the pool has threads, so a big batch does not
+        crowd out interactive ascan() calls. The first failure cancels the
+        rest and is raised.
+        """
+        cancel = cancel or CancelToken()
+        pool = self.executor()
+        window = pool.stats()["max_workers"]
+        verdicts = [None] * len(prompts)
+        pending = iter(enumerate(prompts))
+        in_flight = {}
+        try:
+            while True:
+                cancel.raise_if_cancelled()
+                while len(in_flight) < window:
+                    item = next(pending, None)
+                    if item is None:
+                        break
+                    index, prompt = item
+                    in_flight[pool.submit(self.scan, prompt, cancel)] = index
+                if not in_flight:
+                    return verdicts
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    verdicts[in_flight.pop(future)] = future.result()
+        except BaseException:
+            cancel.cancel("batch failed")
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def submit_scan(self, prompt, priority="interactive", tenant=None):
+        """
+        🚦 Queue scan() in this scanner's ScanScheduler; returns a Future.
+
+        Interactive chat gets ahead of "batch" and "background" jobs, and
+        each tenant (default: this security profile) gets a fair share. If
+        the queue is full the future raises scan_scheduler.ScanRejected:
+        treat that like any other failed scan.
+        """
+        scheduler = self._scheduler
+        if scheduler is None:
+            with self._scheduler_lock:
+                if self._scheduler is None:  # 🔒 One scheduler, even if threads race here
+                    self._scheduler = ScanScheduler(self.scan)
+                scheduler = self._scheduler
+        return scheduler.submit(prompt, priority=priority, tenant=tenant or self.profile_name)
+
+    def executor(self):
+        """🧵 This scanner's thread pool (see the class docstring)."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    settings = get_settings()
+                    self._executor = InstrumentedExecutor(
+                        max_workers=settings.scan_executor_workers,
+                        thread_name_prefix=f"{self.backend}-scan",
+                        name=f"{self.backend}-scan:{self.profile_name}",
+                        max_queue=settings.scan_executor_queue)
+        return self._executor
+
+    def close(self, wait=True):
+        """
+        🔒 Stop this scanner's threads and scheduler. With wait=True, scans
+        already queued or running finish first; otherwise queued scans are
+        cancelled.
+        """
+        self._close_scheduler(wait)
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _close_scheduler(self, wait):
+        with self._scheduler_lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler is not None:
+            scheduler.shutdown(wait=wait)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 🔌 BACKENDS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class HTTPScanner(SecurityScanner):
+    """
+    🌐 REST CALLS TO /v1/scan/sync/request
+
+    Requests go over the pooled session to the fastest healthy endpoint
+    (PANW_AI_SEC_FAILOVER_ENDPOINTS fail over). Prompts longer than
+    SCAN_CHUNK_CHARS are scanned as overlapping chunks. Every scan, failed
+    or not, is audited with this scanner's source ("api").
+
+    - retries: extra attempts per request after connection errors, timeouts
+      and HTTP errors other than 401/404, with 1s, 2s, 4s... back-off that a
+      cancel cuts short (default 0: one attempt)
+    - user_agent: optional User-Agent header
+    - rate_limiter: optional TokenBucket taken before every attempt
+      (ScannerRegistry shares one per API key); a wait that would outlast
+      the cancel token's deadline raises rate_limit.RateLimitExceeded
+
+    HTTP, connection, timeout and JSON errors are raised as they are
+    (requests exceptions) once the retries are used up.
+    """
+
+    backend = "http"
+    source = "api"
+    NO_RETRY_STATUSES = (401, 404)   # bad key / unknown profile: retrying cannot help
+
+    def __init__(self, api_key, profile_name, base_url=None, retries=0, user_agent=None):
+        super().__init__(profile_name)
+        self.endpoints = get_endpoint_manager(base_url or get_settings().panw_ai_sec_endpoint)
+        self.api_endpoint = self.endpoints.endpoints[0]
+        self.retries = retries
+        self.rate_limiter = None
+        # ⚡ The ai_profile block and the headers are encoded once, not per scan
+        self.request_encoder = json_codec.ScanRequestEncoder(profile_name, api_key, user_agent=user_agent)
+
+    def post(self, request_id, text, cancel=None, quiet=False):
+        """
+        📡 Send one scan request (retrying as configured) and return the
+        parsed verdict. The body is encoded once; retries resend the same bytes.
+        quiet=True skips the retry messages.
+        """
+        import requests  # loaded on the first scan, not at startup
+
+        settings = get_settings()
+        body = self.request_encoder.encode(request_id, [{"prompt": text}])
+        for attempt in range(self.retries + 1):
+            if attempt:
+                wait_time = 2 ** (attempt - 1)
+                if not quiet:
+                    print(f"   🔄 Security retry attempt {attempt}/{self.retries} (waiting {wait_time}s)")
+                if cancel is None:
+                    time.sleep(wait_time)
+                else:
+                    try:
+                        cancel.sleep(wait_time)  # ⏰ a cancel wakes it at once
+                    except Cancelled:
+                        # ⏹️ Abandoned: count the retries and back-off we no longer spend
+                        record_cancellation(
+                            "scan_retry", cancel, retries=self.retries - attempt + 1,
+                            backoff_seconds=sum(2 ** (a - 1) for a in range(attempt, self.retries + 1)))
+                        raise
+            if cancel is not None and cancel.cancelled:
+                record_cancellation("scan", cancel, retries=self.retries - attempt)
+                raise Cancelled(cancel.reason)
+            if self.rate_limiter is not None:
+                # ⏰ Never wait past the request deadline: RateLimitExceeded fails the scan
+                waited = self.rate_limiter.acquire(timeout=cancel.bound_timeout(None) if cancel else None)
+                if waited:
+                    metrics.observe("scan_rate_limit_wait_ms", waited * 1000, backend=self.backend)
+            try:
+                # ⏰ Every HTTP timeout is cut so it ends by the request deadline (if any)
+                response = self.endpoints.post(
+                    SCAN_PATH, headers=self.request_encoder.headers, data=body,
+                    timeout=cancel.bound_timeout(settings.http_timeout) if cancel else settings.http_timeout)
+                response.raise_for_status()
+                return json_codec.loads(response.content)
+            except requests.exceptions.HTTPError as e:
+                if attempt == self.retries or e.response.status_code in self.NO_RETRY_STATUSES:
+                    raise
+            except requests.exceptions.ConnectionError:
+                if attempt == self.retries:
+                    raise
+            except requests.exceptions.Timeout as e:
+                if cancel is not None and cancel.cancelled:
+                    # ⏹️ Cut short by the request deadline - no point retrying
+                    record_cancellation("scan", cancel, retries=self.retries - attempt)
+                    raise Cancelled(cancel.reason) from e
+                if attempt == self.retries:
+                    raise
+
+    def probe(self, prompt, cancel=None):
+        # One plain request: not chunked, audited or reported (see SecurityScanner.probe)
+        return self.post(str(uuid.uuid4()), prompt, cancel, quiet=True)
+
+    def scan(self, prompt, cancel=None):
+        from prompt_chunking import scan_in_chunks
+
+        settings = get_settings()
+        tr_id = str(uuid.uuid4())
+        started = time.monotonic()
+        scan_result, error = None, None
+        try:
+            with lifecycle.tracked("scan", source=self.source):  # 🔚 drained on shutdown
+                if cancel is not None:
+                    cancel.raise_if_cancelled()  # ⏹️ Abandoned before we even started
+
+                if len(prompt) > settings.scan_chunk_chars:
+                    def scan_chunk(index, chunk):
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        return self.post(f"{tr_id}-{index}", chunk, cancel)
+
+                    scan_result = scan_in_chunks(
+                        prompt, scan_chunk, settings.scan_chunk_chars,
+                        settings.scan_chunk_overlap_chars, settings.scan_chunk_parallelism, cancel=cancel)
+                    scan_result["tr_id"] = tr_id
+                else:
+                    scan_result = self.post(tr_id, prompt, cancel)
+            scan_result["scan_time_ms"] = (time.monotonic() - started) * 1000
+            return scan_result
+        except BaseException as e:
+            error, scan_result = e, None
+            raise
+        finally:
+            # 📜 Every scan - allowed, blocked or failed - is audited (prompt hash only)
+            audit_log.record_scan(tr_id, self.profile_name, prompt, scan_result,
+                                  (time.monotonic() - started) * 1000, source=self.source,
+                                  error=error)
+
+
+class MockScanner(SecurityScanner):
+    """
+    🧪 LOCAL VERDICTS, NO NETWORK - PERFORMS NO REAL SECURITY!
+
+    Blocks prompts containing one of `block_phrases` (the local stand-in's
+    rules) after `latency_ms`. For benchmarks, demos and tests; nothing is
+    audited.
+    """
+
+    backend = "mock"
+    source = "mock"
+
+    def __init__(self, profile_name="mock", block_phrases=None, latency_ms=0.0):
+        from local_standins import DEFAULT_BLOCK_PHRASES
+
+        super().__init__(profile_name)
+        self.block_phrases = tuple(block_phrases or DEFAULT_BLOCK_PHRASES)
+        self.latency = latency_ms / 1000
+
+    def scan(self, prompt, cancel=None):
+        from local_standins import build_scan_verdict
+
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if self.latency:
+            if cancel is not None:
+                cancel.sleep(self.latency)
+            else:
+                time.sleep(self.latency)
+        request_data = {"tr_id": str(uuid.uuid4()), "ai_profile": {"profile_name": self.profile_name},
+                        "contents": [{"prompt": prompt}]}
+        return build_scan_verdict(request_data, "mock-profile", self.block_phrases)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 🧅 LAYERS (stack onto any scanner)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class ScannerLayer(SecurityScanner):
+    """
+    🧅 WRAPS ANOTHER SCANNER
+
+    scan() passes through by default. Every scan method (sync_scan,
+    async_scan, ascan, batch_scan, submit_scan) goes through this layer's
+    scan(), so none of them can skip a layer. Other attributes a layer does
+    not define (api_endpoint, endpoints, ...) are read from the scanner
+    underneath, and the whole stack shares the innermost scanner's pool.
+    """
+
+    # Scan methods of the scanner underneath: reading them through
+    # __getattr__ would scan without this layer
+    _SCAN_METHODS = frozenset({"sync_scan", "async_scan", "scan", "ascan", "batch_scan", "submit_scan"})
+
+    def __init__(self, inner):
+        super().__init__(inner.profile_name)
+        self.inner = inner
+
+    def __getattr__(self, name):
+        # Only called for attributes this layer does not have
+        if name == "inner" or name in self._SCAN_METHODS:
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    @property
+    def backend(self):
+        return self.inner.backend
+
+    @property
+    def source(self):
+        return self.inner.source
+
+    @property
+    def cache_namespace(self):
+        return self.inner.cache_namespace
+
+    @cache_namespace.setter
+    def cache_namespace(self, value):
+        pass  # always the inner scanner's
+
+    def scan(self, prompt, cancel=None):
+        return self.inner.scan(prompt, cancel)
+
+    def sync_scan(self, prompt, cancel=None):
+        return self.scan(prompt, cancel)
+
+    def probe(self, prompt, cancel=None):
+        return self.inner.probe(prompt, cancel)  # 🧪 health checks skip every layer
+
+    async def async_scan(self, prompt, cancel=None):
+        return await self.ascan(prompt, cancel)
+
+    def executor(self):
+        return self.inner.executor()
+
+    def close(self, wait=True):
+        self._close_scheduler(wait)
+        self.inner.close(wait)
+
+    def _record_reuse(self, prompt, verdict, started):
+        # 📜 A verdict served without a scan is still audited, marked reused
+        audit_log.record_scan(verdict.get("tr_id"), self.profile_name, prompt, verdict,
+                              (time.monotonic() - started) * 1000, source=self.source)
+
+
+class CachedScanner(ScannerLayer):
+    """
+    🗂️ EXACT-PROMPT VERDICT CACHE
+
+    Serves a verdict this scanner's profile gave for the same prompt within
+    SCAN_CACHE_TTL_SECONDS, least recently used first out past
+    SCAN_CACHE_MAX_ENTRIES. Keys are SHA-256 hashes (the prompt is not kept)
+    namespaced by profile and API key. "allow" and "block" are both cached:
+    a policy change on the server is seen after at most the TTL. Hits are
+    audited with reused=true.
+    """
+
+    def __init__(self, inner, ttl_seconds=None, max_entries=None):
+        super().__init__(inner)
+        settings = get_settings()
+        self.ttl = settings.scan_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.scan_cache_max_entries if max_entries is None else max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, verdict)
+        self._lock = threading.Lock()
+
+    def _key(self, prompt):
+        return self.cache_namespace, hashlib.sha256(prompt.encode("utf-8")).digest()
+
+    def scan(self, prompt, cancel=None):
+        started = time.monotonic()
+        key = self._key(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= started:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            metrics.inc("scan_cache_total", result="hit")
+            verdict = dict(entry[1], verdict_reused=True)
+            verdict["scan_time_ms"] = (time.monotonic() - started) * 1000
+            self._record_reuse(prompt, verdict, started)
+            return verdict
+
+        metrics.inc("scan_cache_total", result="miss")
+        verdict = self.inner.scan(prompt, cancel)
+        if verdict.get("action") in ("allow", "block") and not verdict.get("verdict_reused"):
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, verdict)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return verdict
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DedupScanner(ScannerLayer):
+    """
+    👯 IDENTICAL PROMPTS IN FLIGHT SHARE ONE SCAN
+
+    While a prompt is being scanned, the same prompt arriving again waits
+    for that scan instead of sending another. The followers get a copy of
+    the verdict marked reused (and audited so), or the same exception.
+    """
+
+    def __init__(self, inner):
+        super().__init__(inner)
+        self._in_flight = {}   # key -> (done Event, [verdict or exception])
+        self._lock = threading.Lock()
+
+    def scan(self, prompt, cancel=None):
+        started = time.monotonic()
+        key = hashlib.sha256(prompt.encode("utf-8")).digest()
+        with self._lock:
+            shared = self._in_flight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._in_flight[key] = (threading.Event(), [])
+        done, outcome = shared
+
+        if leader:
+            try:
+                verdict = self.inner.scan(prompt, cancel)
+                outcome.append(verdict)
+                return verdict
+            except BaseException as e:
+                outcome.append(e)
+                raise
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                done.set()
+
+        metrics.inc("scan_dedup_total")
+        if cancel is None:
+            done.wait()
+        else:
+            while not done.wait(0.05):
+                cancel.raise_if_cancelled()
+        result = outcome[0]
+        if isinstance(result, BaseException):
+            raise result
+        verdict = dict(result, verdict_reused=True)
+        verdict["scan_time_ms"] = (time.monotonic() - started) * 1000
+        self._record_reuse(prompt, verdict, started)
+        return verdict
+
+
+class RateLimitedScanner(ScannerLayer):
+    """
+    ⏳ TOKEN-BUCKET LIMIT ON SCANS REACHING THE SCANNER UNDERNEATH
+
+    - rate: scans per second (default SCAN_RATE_LIMIT_PER_SECOND, 0 = none),
+      or pass a shared `bucket`
+    - timeout: longest wait for a token before rate_limit.RateLimitExceeded
+    """
+
+    def __init__(self, inner, rate=None, bucket=None, timeout=None):
+        super().__init__(inner)
+        self.bucket = bucket or TokenBucket(
+            get_settings().scan_rate_limit_per_second if rate is None else rate)
+        self.timeout = timeout
+
+    def scan(self, prompt, cancel=None):
+        timeout = self.timeout
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+            timeout = cancel.bound_timeout(timeout)  # ⏰ never wait past the request deadline
+        waited = self.bucket.acquire(timeout=timeout)
+        if waited:
+            metrics.observe("scan_rate_limit_wait_ms", waited * 1000, backend=self.backend)
+        return self.inner.scan(prompt, cancel)
+
+
+class MeteredScanner(ScannerLayer):
+    """📊 scanner_scans_total{backend,action} and scanner_scan_ms{backend} for every scan."""
+
+    def scan(self, prompt, cancel=None):
+        started = time.monotonic()
+        try:
+            verdict = self.inner.scan(prompt, cancel)
+        except BaseException:
+            metrics.inc("scanner_scans_total", backend=self.backend, action="error")
+            raise
+        metrics.observe("scanner_scan_ms", (time.monotonic() - started) * 1000, backend=self.backend)
+        metrics.inc("scanner_scans_total", backend=self.backend,
+                    action=verdict.get("action", "unknown"))
+        return verdict
+
+
+def stack(scanner, *layers):
+    """
+    🧅 Wrap `scanner` in `layers`, innermost first:
+
+        stack(HTTPScanner(key, profile), RateLimitedScanner, CachedScanner, MeteredScanner)
+
+    Each layer is called with the scanner built so far (use functools.partial
+    or a lambda to pass options).
+    """
+    for layer in layers:
+        scanner = layer(scanner)
+    return scanner
+
+
+def layers_from_settings():
+    """🧅 The layers the settings turn on, innermost first."""
+    settings = get_settings()
+    layers = []
+    if settings.scan_rate_limit_per_second > 0:
+        layers.append(RateLimitedScanner)
+    if settings.scan_dedup_enabled:
+        layers.append(DedupScanner)
+    if settings.scan_cache_ttl_seconds > 0:
+        layers.append(CachedScanner)
+    layers.append(MeteredScanner)
+    return layers
+
+
+def build_scanner(backend, api_key=None, profile_name=None, base_url=None, **options):
+    """
+    🏗️ A `backend` scanner ("http", "sdk" or "mock") with the layers the
+    settings turn on (rate limit, dedup, cache, metrics).
+
+    The "sdk" backend retries MAX_RETRIES times; pass retries=N to give the
+    "http" backend the same policy.
+
+    api_key, profile_name and base_url default to the PANW_AI_SEC_* settings;
+    `options` go to the backend's constructor.
+    """
+    settings = get_settings()
+    api_key = api_key or settings.panw_ai_sec_api_key
+    profile_name = profile_name or settings.panw_ai_sec_profile_name
+    if backend == "http":
+        scanner = HTTPScanner(api_key, profile_name, base_url=base_url, **options)
+    elif backend == "sdk":
+        from secure_chatbot_openai_sdk import SDKSecurityScanner
+        scanner = SDKSecurityScanner(api_key, profile_name, api_endpoint=base_url, **options)
+    elif backend == "mock":
+        scanner = MockScanner(profile_name or "mock", **options)
+    else:
+        raise ValueError(f"Unknown scanner backend {backend!r} (use http, sdk or mock)")
+    return stack(scanner, *layers_from_settings())
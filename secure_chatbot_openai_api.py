@@ -13,31 +13,43 @@
 # ===========================================================================
 
 # Import required libraries
-import requests  # For making HTTP requests to web APIs
+# The heavy network libraries (requests, openai) are NOT imported here.
+# They are loaded on first use so the program starts quickly; see
+# scan_prompt_with_paloalto_api() and main().
 import json      # For converting Python data to/from JSON format
-import os        # For reading environment variables from system
-import uuid      # For generating unique transaction IDs
-import httpx     # Special HTTP client for requests
-from openai import OpenAI  # Official OpenAI library for GPT models
-
-# Load environment variables from .env file if it exists
-try:
-    from pathlib import Path
-    env_file = Path(".env")
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key] = value
-        print("✅ Loaded environment variables from .env file")
-except Exception as e:
-    print(f"⚠️ Could not load .env file: {e}")
-
-# OpenAI model to use. Override with the OPENAI_MODEL environment variable
-# (or a line in .env) if you want a different model without editing the code.
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+import functools # For building each scanner once per API key + profile
+import chatbot_settings  # Typed settings from .env + environment (loaded once, reloadable)
+from chatbot_settings import get_settings
+from conversation import ConversationStore  # Bounded in-memory chat history
+from completion_cache import CompletionCache  # Opt-in reuse of repeated OpenAI answers
+from token_budget import TokenShaper, install_token_counter  # Token counting, max_tokens budgets, quota
+from model_router import ModelRouter  # Model choice, failover and hedging across OpenAI models
+from rate_limit import RateLimitExceeded  # Raised when SCAN_RATE_LIMIT_PER_SECOND allows no scan in time
+from cancellation import CancelToken, Cancelled  # Request deadlines: abandon work nobody will wait for
+import warmup  # Connect and probe-scan before the first user message
+import traffic_recorder  # Opt-in recording of traffic shape for replay benchmarks
+import profiling  # On-demand CPU and allocation profiling (kill -USR1 <pid>)
+import lifecycle  # Graceful shutdown: drain in-flight work, flush logs, close pools
+import scan_report  # Human-readable verdict report shared with the SDK chatbot
+
+# Settings (API keys, OPENAI_MODEL, REQUEST_TIMEOUT, MAX_RETRIES,
+# PANW_AI_SEC_ENDPOINT, pool sizes...) come from get_settings(). The .env file
+# is read the first time settings are needed, never overriding variables that
+# are already set in your environment.
+
+
+@functools.lru_cache(maxsize=32)
+def get_api_scanner(api_key, ai_profile_name, base_url=None):
+    """
+    Return the raw-HTTP scanner (scanners.HTTPScanner plus the layers the
+    settings turn on) for one API key + profile pair.
+
+    It is built once and reused for every scan: the ai_profile block and the
+    request headers never change between messages, so they are encoded once.
+    """
+    import scanners  # Loaded on the first scan, like requests
+    return scanners.build_scanner("http", api_key=api_key, profile_name=ai_profile_name,
+                                  base_url=base_url)
 
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
@@ -54,7 +66,7 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 # ║ Think of it like: SECURITY CHECKPOINT → Then maybe chatbot                ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
-def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url="https://service.api.aisecurity.paloaltonetworks.com"):
+def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url=None, cancel=None):
     """
     🛡️ SECURITY SCANNER FUNCTION - THE GUARDIAN OF YOUR CHATBOT
     
@@ -81,6 +93,9 @@ def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url="ht
     - api_key: Your secret password to access Palo Alto's security service
     - ai_profile_name: The name of your security ruleset/configuration
     - base_url: The web address of Palo Alto's security servers
+      (defaults to PANW_AI_SEC_ENDPOINT from your settings)
+    - cancel: optional CancelToken - once it is cancelled (or its deadline
+      passes) nothing more is sent, and the scan counts as FAILED
 
     WHAT YOU GET BACK:
     - A detailed report telling you if the message is safe or dangerous
@@ -88,217 +103,65 @@ def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url="ht
     - A recommendation to either "allow" or "block" the message
     """
 
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # 🌐 STEP 1: BUILD THE SECURITY API CONNECTION
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # This part figures out WHERE to send your message for security scanning.
-    # It's like writing the address on an envelope before mailing it.
-    url = f"{base_url}/v1/scan/sync/request"
-
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # 🏷️ STEP 2: CREATE A TRACKING NUMBER FOR THIS SECURITY SCAN
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # Every security scan gets a unique ID number, like a tracking number for a package.
-    # This helps Palo Alto's servers keep track of your specific security request.
-    # If something goes wrong, support can use this ID to find exactly what happened.
-    transaction_id = str(uuid.uuid4())
-    print(f"Generated transaction ID: {transaction_id}")
-
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # 📋 STEP 3: PREPARE THE SECURITY REQUEST HEADERS  
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # Headers are like the "delivery instructions" on a package.
-    # They tell Palo Alto's security servers how to handle our request.
-    headers = {
-        "Content-Type": "application/json",  # 📄 "This package contains JSON data"
-        "Accept": "application/json",        # 📨 "Please send JSON data back to me"
-        "x-pan-token": api_key              # 🔐 "Here's my secret password to prove I'm authorized"
-    }
-
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # 📦 STEP 4: PACKAGE YOUR MESSAGE FOR SECURITY ANALYSIS
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # This creates the actual "package" we're sending to Palo Alto's security service.
-    # It contains your message plus information about what security rules to apply.
-    payload = {
-        "tr_id": transaction_id,           # 🏷️ The tracking number we created above
-        "ai_profile": {                    # 🛡️ Which security ruleset to use
-            "profile_name": ai_profile_name  # This tells Palo Alto which security rules you want applied
-        },
-        "contents": [                      # 📝 The actual content to be scanned
-            {
-                "prompt": prompt           # 💬 Your actual message that needs security checking
-            }
-        ]
-    }
+    # Loaded on the first scan instead of at program start (cached afterwards)
+    import requests  # For the HTTP error types handled below
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # 🌐 STEP 1: PICK THE SCANNER FOR THIS API KEY + PROFILE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # The conversation with Palo Alto's servers lives in scanners.HTTPScanner,
+    # the same "raw HTTP" scanner the benchmarks and other tools use. It is
+    # built once per API key + profile, and for every message it:
+    # - sends the scan to the fastest healthy region (and to the next one if a
+    #   region is down, see PANW_AI_SEC_FAILOVER_ENDPOINTS), reusing pooled
+    #   keep-alive connections, with CONNECT_TIMEOUT / REQUEST_TIMEOUT limits
+    # - gives the scan a unique tracking number (tr_id), like a tracking number
+    #   for a package - support can use it to find exactly what happened
+    # - reuses the pre-encoded headers (x-pan-token, ...) and ai_profile block,
+    #   so only the tracking number and your message are converted to JSON
+    # - cuts VERY LARGE prompts (longer than SCAN_CHUNK_CHARS, e.g. pasted
+    #   documents) into overlapping chunks scanned in parallel
+    #   (SCAN_CHUNK_PARALLELISM at a time): if ANY chunk is blocked the whole
+    #   prompt is blocked, and if any chunk fails the whole scan fails
+    # - writes every scan - allowed, blocked or failed - to the audit log
+    #   (a hash of the message, never the message itself)
+    # Optional layers from your settings sit on top: exact-repeat verdict
+    # reuse (SCAN_CACHE_TTL_SECONDS), sharing one scan between identical
+    # messages sent at the same time (SCAN_DEDUP_ENABLED) and a scan rate
+    # limit (SCAN_RATE_LIMIT_PER_SECOND).
+    scanner = get_api_scanner(api_key, ai_profile_name, base_url)
 
     # Display what we're about to scan
     print(f"\n🔍 Scanning prompt for security threats...")
     print(f"   Content: '{prompt[:50]}...' ({len(prompt)} characters)")
 
     try:
-        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # 🚀 STEP 5: SEND YOUR MESSAGE TO PALO ALTO'S SECURITY INSPECTION
-        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        # 🚀 STEP 2: SEND YOUR MESSAGE TO PALO ALTO'S SECURITY INSPECTION
+        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # This is the actual moment where your message gets sent to Palo Alto Networks
         # for security analysis. Think of it like putting your package in the mail
         # and sending it to a security inspection facility.
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-
-        # ✅ Check if Palo Alto's servers responded successfully
-        # If they return an error code (like 401 Unauthorized or 500 Server Error),
-        # this line will detect it and trigger the error handling below.
-        response.raise_for_status()
-
-        # 📊 Convert Palo Alto's response from JSON text back to Python data
-        # Palo Alto sends back their analysis results as JSON text. This line
-        # converts that text back into a Python dictionary we can work with.
-        scan_result = response.json()
+        # If `cancel` is cancelled (or its deadline passes) nothing more is sent,
+        # and every HTTP timeout is cut so it ends by the deadline.
+        # Any error (401 Unauthorized, 500 Server Error, no connection, ...) is
+        # raised and handled below: the scan then counts as FAILED.
+        scan_result = scanner.scan(prompt, cancel)
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # 📊 STEP 6: PROCESS PALO ALTO'S SECURITY ANALYSIS RESULTS
+        # 📊 STEP 3: PROCESS PALO ALTO'S SECURITY ANALYSIS RESULTS
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # At this point, Palo Alto Networks has analyzed your message and sent back
         # a detailed "report card" about any security threats they found.
-        # Let's display this information in a human-readable format.
-        
-        print("\n📋 SECURITY SCAN RESULTS:")
-        print("=" * 40)
-        # 🏷️ OVERALL CLASSIFICATION: This is Palo Alto's main verdict about your message
-        # - "benign" = SAFE: Your message is okay to send to the AI
-        # - "malicious" = DANGEROUS: Your message contains threats and should be blocked
-        print(f"Overall Classification: {scan_result.get('category', 'Unknown')}")
-        
-        # 🚦 RECOMMENDED ACTION: This is what Palo Alto thinks you should do
-        # - "allow" = GO AHEAD: Send this message to the AI chatbot
-        # - "block" = STOP: Do not send this message to the AI chatbot
-        print(f"Recommended Action: {scan_result.get('action', 'Unknown')}")
-
-        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # 🔍 STEP 7: ANALYZE SPECIFIC THREATS DETECTED BY PALO ALTO  
-        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # If Palo Alto found specific threats, this section will explain exactly
-        # what they found and why it's dangerous. This helps you understand
-        # what to change in your message to make it safe.
-        print("\n⚠️  SPECIFIC THREATS IDENTIFIED:")
-        print("=" * 40)
-
-        # Define threat category mappings for better display
-        threat_categories = {
-            # Prompt-based threats
-            'prompt_injection': 'Prompt Injection Attack',
-            'injection': 'Prompt Injection Attack',  # Alternative naming
-            'jailbreak': 'Jailbreak Attempt',
-            'malicious_code': 'Malicious Code Generation',
-            'sensitive_data': 'Sensitive Data Exposure',
-            'toxicity': 'Toxic Content',
-            'bias': 'Bias Detection',
-            'harmful_content': 'Harmful Content',
-
-            # Response-based threats
-            'url_cats': 'Malicious URL Detection',
-            'malware': 'Malware Detection',
-            'db_security': 'Database Security Threat',
-            'dlp': 'Data Loss Prevention',
-            'pii': 'Personal Identifiable Information',
-            'financial_data': 'Financial Data Exposure',
-            'intellectual_property': 'Intellectual Property Risk',
-            'code_injection': 'Code Injection',
-            'resource_overload': 'Resource Overload/DoS',
-            'hallucination': 'AI Hallucination',
-        }
-
-        threats_found = False
-
-        # ╔══════════════════════════════════════════════════════════════════════════╗
-        # ║                    📊 RESPONSE DETECTION EXPLANATION                     ║
-        # ║  ⚠️  CRITICAL: Understanding how Palo Alto detects response threats      ║
-        # ║                                                                          ║
-        # ║  WHAT IS RESPONSE DETECTION?                                             ║
-        # ║  Palo Alto Networks doesn't just scan user inputs - it also predicts    ║
-        # ║  what threats might appear in the AI's response and flags them early.   ║
-        # ║                                                                          ║
-        # ║  HOW RESPONSE DETECTION WORKS:                                           ║
-        # ║  1. 🧠 AI analyzes the user's message                                    ║
-        # ║  2. 🔮 Predicts what type of response the chatbot might generate         ║
-        # ║  3. 🚨 Identifies if that predicted response could contain threats       ║
-        # ║  4. 🛡️ Blocks messages that might lead to dangerous AI responses        ║
-        # ║                                                                          ║
-        # ║  EXAMPLE: User asks "How to hack a website" →                            ║
-        # ║  → Response detection flags that the AI might provide hacking info      ║
-        # ║  → Message gets blocked before AI even processes it                     ║
-        # ╚══════════════════════════════════════════════════════════════════════════╝
-        
-        # 🔍 PALO ALTO API RESPONSE STRUCTURE DEBUG
-        print(f"🔍 PALO ALTO SECURITY API RESPONSE:")
-        print(f"   🛡️ Security Category: {scan_result.get('category')}")                  # Overall security verdict
-        print(f"   📋 Security Action: {scan_result.get('action')}")                       # What should happen next
-        print(f"   🎯 INPUT Threats: {scan_result.get('prompt_detected', {})}")           # Threats in user's message
-        print(f"   📤 OUTPUT Threats: {scan_result.get('response_detected', {})}")        # Threats in predicted AI response
-
-        # Check for prompt-based threats
-        prompt_detected = scan_result.get('prompt_detected', {})
-        if prompt_detected:
-            for threat_type, detected in prompt_detected.items():
-                if detected:
-                    threat_name = threat_categories.get(
-                        threat_type, threat_type.replace('_', ' ').title())
-                    print(f"🔴 PROMPT THREAT: {threat_name}")
-                    threats_found = True
-
-        # ╔══════════════════════════════════════════════════════════════════════════╗
-        # ║                📤 RESPONSE THREAT DETECTION ANALYSIS                    ║
-        # ║  ⚠️  ADVANCED SECURITY: Palo Alto predicts threats in AI responses      ║
-        # ║                                                                          ║
-        # ║  HOW THIS PROTECTS YOU:                                                  ║
-        # ║  • 🔮 Analyzes what the AI might say before it says it                   ║
-        # ║  • 🚫 Blocks questions that could lead to dangerous answers             ║
-        # ║  • 🛡️ Prevents AI from accidentally providing harmful information       ║
-        # ║  • 📊 Shows you exactly why a message was flagged                       ║
-        # ║                                                                          ║
-        # ║  EXAMPLE SCENARIOS:                                                      ║
-        # ║  • User: "How to make explosives" → Response detection: AI might       ║
-        # ║    provide dangerous instructions → Message blocked                     ║
-        # ║  • User: "What's my password" → Response detection: AI might leak      ║
-        # ║    sensitive data → Message blocked                                     ║
-        # ╚══════════════════════════════════════════════════════════════════════════╝
-        
-        # 📤 ANALYZE PREDICTED AI RESPONSE FOR SECURITY THREATS
-        response_detected = scan_result.get('response_detected', {})  # 🔮 Threats Palo Alto predicts in AI response
-        if response_detected:
-            print(f"\n📤 PREDICTED AI RESPONSE THREATS:")
-            for threat_type, detected in response_detected.items():
-                if detected:
-                    threat_name = threat_categories.get(
-                        threat_type, threat_type.replace('_', ' ').title())
-                    print(f"🔴 RESPONSE THREAT: {threat_name}")
-                    threats_found = True
-
-                    # 💡 PROVIDE SPECIFIC GUIDANCE FOR RESPONSE-LEVEL THREATS
-                    if threat_type == 'url_cats' and detected:
-                        print(f"   └─ 🌐 RESPONSE ISSUE: AI might generate malicious URLs")
-                        print(f"   └─ 💡 SOLUTION: Rephrase to avoid requesting potentially harmful links")
-                    elif threat_type == 'db_security' and detected:
-                        print(f"   └─ 🗄️ RESPONSE ISSUE: AI might expose database security information")
-                        print(f"   └─ 💡 SOLUTION: Avoid questions about system internals or security")
-                    elif threat_type == 'dlp' and detected:
-                        print(f"   └─ 🔒 RESPONSE ISSUE: AI might leak sensitive data in its response")
-                        print(f"   └─ 💡 SOLUTION: Rephrase without requesting personal or confidential info")
-                    elif threat_type in ['toxicity', 'toxic_content'] and detected:
-                        print(f"   └─ 💬 RESPONSE ISSUE: AI might generate harmful or offensive content")
-                        print(f"   └─ 💡 SOLUTION: Rephrase using respectful, appropriate language")
-                    else:
-                        print(f"   └─ ⚠️ RESPONSE ISSUE: AI response might violate security policies")
-                        print(f"   └─ 💡 SOLUTION: Modify your question to be safer and more appropriate")
-
-        # Check for additional threat indicators
-        if scan_result.get('category') == 'malicious' and not threats_found:
-            print(f"🔴 GENERAL THREAT: Content classified as malicious")
-            threats_found = True
-
-        if not threats_found:
-            print("✅ No specific threats detected")
-        print("=" * 40)
+        # Let's display this information in a human-readable format:
+        # - Overall Classification: "benign" (SAFE) or "malicious" (DANGEROUS)
+        # - Recommended Action: "allow" (send it to the AI) or "block" (don't)
+        # - Each threat found in YOUR message, and each threat Palo Alto
+        #   PREDICTS in the AI's answer (questions whose likely answers are
+        #   dangerous are blocked before the AI ever sees them), with a hint
+        #   on how to rephrase
+        # The SDK chatbot prints its verdicts with the same function.
+        scan_report.print_scan_report(scan_result)
         return scan_result
 
     # Handle different types of HTTP and network errors
@@ -315,8 +178,16 @@ def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url="ht
         print("   Check your internet connection and firewall settings")
         return None
 
+    except Cancelled as cancelled:
+        # The request was abandoned (deadline passed) - treated as a failed scan
+        print(f"⏹️ Scan cancelled: {cancelled}")
+        return None
+
     except requests.exceptions.Timeout as timeout_err:
         # Request took too long to complete
+        if cancel is not None and cancel.cancelled:
+            print(f"⏹️ Scan cancelled: {cancel.reason}")
+            return None
         print(f"❌ Timeout Error: {timeout_err}")
         print("   The API server is not responding within the expected time")
         return None
@@ -330,10 +201,14 @@ def scan_prompt_with_paloalto_api(prompt, api_key, ai_profile_name, base_url="ht
     except json.JSONDecodeError as json_err:
         # Server response was not valid JSON
         print(f"❌ JSON Decode Error: {json_err}")
-        print(f"   Raw Response: {response.text}")
         print("   The server returned malformed data")
         return None
 
+    except RateLimitExceeded as limited:
+        # Over SCAN_RATE_LIMIT_PER_SECOND for longer than the request may wait
+        print(f"⏳ Scan not sent: {limited}")
+        return None
+
 
 def main():
     """
@@ -365,7 +240,8 @@ def main():
     - EVERY message goes through security scanning first (no exceptions!)
     - Dangerous messages are immediately blocked (better safe than sorry!)  
     - Only verified-safe messages get processed by OpenAI
-    - No chat history is saved (keeps things private and secure)
+    - Chat history is kept in memory only, for this session, within a token budget
+    - Blocked messages are dropped from the history and never reach OpenAI
     
     WHY THIS APPROACH MATTERS:
     - Prevents malicious users from tricking the AI into harmful behavior
@@ -380,8 +256,8 @@ def main():
     print("🛡️ Security Layer: Palo Alto Networks Runtime Security API (testing)")
     print("🧠 AI Processing: OpenAI GPT Models")
     print("=" * 60)
-    print("\nConfiguration: Each message is independently scanned")
-    print("No conversation history is stored for enhanced security")
+    print("\nConfiguration: Each new message is scanned with a short context window")
+    print("Conversation history is kept in memory for this session only")
 
     # ╔════════════════════════════════════════════════════════════════════════════╗
     # ║              🔐 PALO ALTO NETWORKS CREDENTIAL VALIDATION                   ║
@@ -394,9 +270,21 @@ def main():
     # ╚════════════════════════════════════════════════════════════════════════════╝
     print("\n🔑 VALIDATING SECURITY CREDENTIALS...")
 
-    # Retrieve Palo Alto Networks API credentials from environment
-    pan_api_key = os.getenv("PANW_AI_SEC_API_KEY")
-    pan_ai_profile_name = os.getenv("PANW_AI_SEC_PROFILE_NAME")
+    # Load and validate all settings once (.env + environment variables)
+    try:
+        settings = get_settings()
+    except Exception as e:
+        print(f"❌ ERROR: Invalid configuration: {e}")
+        return
+
+    # Send SIGHUP (kill -HUP <pid>) to re-read .env without restarting
+    chatbot_settings.install_reload_signal_handler()
+    profiling.install_profile_signal_handler()  # kill -USR1 <pid>: profile for PROFILE_SECONDS
+    lifecycle.install_signal_handler()  # SIGTERM: finish the running turn, drain, flush, exit
+
+    # Retrieve Palo Alto Networks API credentials from settings
+    pan_api_key = settings.panw_ai_sec_api_key
+    pan_ai_profile_name = settings.panw_ai_sec_profile_name
 
     # Validate Palo Alto Networks credentials are present
     if not pan_api_key:
@@ -428,7 +316,7 @@ def main():
     print("\n🔑 VALIDATING OPENAI CREDENTIALS...")
 
     # OpenAI API key
-    openai_key = os.getenv("OPENAI_API_KEY")
+    openai_key = settings.openai_api_key
 
     # Validate OpenAI API key is present
     if not openai_key:
@@ -459,10 +347,13 @@ def main():
 
     try:
         # Initialize the OpenAI client using official library
+        # (imported here, not at program start, to keep startup fast)
+        from openai import OpenAI
         openai_client = OpenAI(
             api_key=openai_key
         )
         print("✅ OpenAI client initialized successfully")
+        lifecycle.on_shutdown("OpenAI client", openai_client.close)
 
     except Exception as e:
         # Handle client initialization failures
@@ -471,6 +362,43 @@ def main():
         print("   Note: The security scanning will still work perfectly!")
         openai_client = None
 
+    # 🔥 WARM-UP (on unless WARMUP_ENABLED=false)
+    # The first message would otherwise pay for DNS lookups, TCP/TLS handshakes
+    # and first-use imports. We connect to Palo Alto and OpenAI now, run one
+    # scan of a harmless canary prompt (WARMUP_CANARY_PROMPT), and then ping
+    # the open connections every WARMUP_KEEPALIVE_SECONDS so they stay open.
+    if settings.warmup_enabled:
+        warmup.warm_up(
+            settings.panw_ai_sec_endpoint,
+            scan=get_api_scanner(pan_api_key, pan_ai_profile_name, None).probe,  # 🧪 not audited or cached
+            openai_client=openai_client)
+        keep_warm = warmup.KeepWarm(settings.panw_ai_sec_endpoint, openai_client).start()
+        lifecycle.on_shutdown("keep-warm pings", keep_warm.stop)
+
+    # 💬 CONVERSATION HISTORY
+    # One in-memory session for this terminal. The store trims old messages to
+    # CONVERSATION_MAX_TOKENS and never writes anything to disk.
+    conversations = ConversationStore()
+    conversation = conversations.get("cli")
+
+    # 🧠 COMPLETION CACHE (off unless COMPLETION_CACHE_ENABLED=true)
+    # Repeated, security-approved questions can reuse a recent answer instead
+    # of calling OpenAI again - only when the temperature or route policy allows.
+    completion_cache = CompletionCache()
+
+    # 🧮 TOKEN BUDGETS
+    # Prompt tokens are counted locally (tiktoken when installed) so each answer
+    # gets a max_tokens that fits the route's budget and the model's context,
+    # and OPENAI_TOKENS_PER_MINUTE (if set) keeps us under the OpenAI quota.
+    token_shaper = TokenShaper()
+    install_token_counter()
+
+    # 🧭 MODEL ROUTER
+    # Answers come from OPENAI_MODEL unless it is failing or too slow; then
+    # OPENAI_FALLBACK_MODELS are tried (on timeouts, rate limits and 5xx errors).
+    model_router = ModelRouter()
+    lifecycle.on_shutdown("model hedge threads", model_router.close)
+
     # INTERACTIVE CHAT LOOP INITIALIZATION
     print("\n" + "=" * 60)
     print("CHATBOT READY FOR INTERACTION")
@@ -501,8 +429,15 @@ def main():
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # 👤 STEP 1: GET USER'S MESSAGE
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        # SIGTERM during the previous turn: stop now that it has finished
+        if lifecycle.stop_requested():
+            print("\n👋 Session stopped for shutdown. Goodbye!")
+            break
+
         # Wait for the user to type something and clean up any extra spaces
-        user_input = input("\n👤 You: ").strip()
+        # (SIGTERM while waiting here stops at once)
+        with lifecycle.idle():
+            user_input = input("\n👤 You: ").strip()
 
         # Check for exit command - allows user to quit gracefully
         if user_input.lower() == 'exit':
@@ -530,11 +465,29 @@ def main():
         print("\n🔒 SECURITY SCANNING PHASE")
         print("=" * 50)
 
+        # 💬 ADD THE MESSAGE TO THE CONVERSATION, THEN PICK WHAT TO SCAN
+        # Only the NEW message is scanned, plus a short tail of the earlier
+        # conversation (SCAN_CONTEXT_CHARS) so multi-turn tricks are still
+        # visible. Rescanning the whole transcript every turn would make each
+        # scan slower and more expensive as the conversation grows.
+        conversation.add_user(user_input)
+        scan_text = conversation.scan_window(get_settings().scan_context_chars)
+
+        # ⏰ ONE DEADLINE FOR THE WHOLE TURN (REQUEST_DEADLINE_SECONDS, 0 = none)
+        # The scan and the OpenAI call share it: once it passes, scan retries
+        # stop and no OpenAI request is started for an answer nobody waits for.
+        cancel = CancelToken(deadline_seconds=get_settings().request_deadline_seconds or None)
+
+        # 🎙️ TRAFFIC SHAPE FOR REPLAY (TRAFFIC_RECORD_PATH; a no-op when not recording)
+        # Arrival time, sizes, verdict and stage latencies - never the prompt text.
+        turn = traffic_recorder.start_turn(scan_text)
+
         # 🛡️ SEND MESSAGE TO PALO ALTO NETWORKS FOR THREAT ANALYSIS
         # This function call is what actually performs the security scanning.
         # Everything that happens inside scan_prompt_with_paloalto_api() is pure security.
-        scan_result = scan_prompt_with_paloalto_api(
-            user_input, pan_api_key, pan_ai_profile_name)
+        with turn.stage("scan"):
+            scan_result = scan_prompt_with_paloalto_api(
+                scan_text, pan_api_key, pan_ai_profile_name, cancel=cancel)
 
         # ╔══════════════════════════════════════════════════════════════════════════╗
         # ║                    📊 SECURITY DECISION PROCESSING                       ║
@@ -561,6 +514,7 @@ def main():
             
             # 🚦 ACTION: What should we do with this message?
             action = scan_result.get('action')      # Expected: 'allow' (send to AI) or 'block' (stop here)
+            turn.note(action=action, category=category)
 
             print(f"\n🚦 SECURITY ASSESSMENT:")
             print(f"   Classification: {category}")
@@ -573,6 +527,7 @@ def main():
             # This is the security "firewall" in action - protecting the AI from harmful input.
             if category == "malicious" or action == "block":
                 # MESSAGE BLOCKED - Security threat detected
+                conversation.discard_unscanned()  # blocked text never becomes history
                 print("\n🚫 MESSAGE BLOCKED BY SECURITY")
                 print("=" * 40)
                 print(f"Security Status: {category.upper()}")
@@ -584,6 +539,7 @@ def main():
 
             elif category == "benign" and action == "allow":
                 # MESSAGE APPROVED - Safe to process
+                conversation.mark_scanned()
                 print("\n✅ SECURITY CHECK PASSED")
                 print("=" * 40)
                 print(f"Security Status: {category.upper()}")
@@ -618,24 +574,41 @@ def main():
                         # This is where we finally send your security-approved message to 
                         # OpenAI. OpenAI will generate an intelligent response using their
                         # advanced GPT models and comprehensive training data.
-                        response = openai_client.chat.completions.create(
-                            model=OPENAI_MODEL,  # 🧠 OpenAI chat model, defaults to gpt-4o-mini
-                            messages=[
-                                {
-                                    "role": "user",           # 👤 This identifies the message as coming from a user
-                                    "content": user_input     # 💬 Your actual (security-approved) message
-                                }
-                            ],
-                            max_tokens=800,      # 📏 Maximum length of AI response
-                            temperature=0.7      # 🎚️ Controls creativity (0.0=factual, 1.0=creative)
-                        )
+                        # The conversation so far (all security-approved) is sent
+                        # so OpenAI can answer follow-up questions in context.
+                        # The completion cache returns a stored answer when this exact
+                        # request (model, messages, parameters, verdict) was seen recently.
+                        # The token budget is reserved first and settled with the real
+                        # usage OpenAI reports (a cache hit gives the reservation back).
+                        model = get_settings().openai_model  # 🧠 OpenAI chat model (OPENAI_MODEL), defaults to gpt-4o-mini
+                        messages = list(conversation.messages)  # 💬 [{"role": "user"/"assistant", "content": ...}, ...]
+                        with turn.stage("completion"), token_shaper.reserve("chat", model, messages) as budget:
+                            ai_response, from_cache = model_router.call(
+                                "chat", budget.prompt_tokens,  # 🧭 Picks the model; fails over if it errors
+                                lambda routed_model, call_cancel: completion_cache.complete(
+                                    openai_client,
+                                    route="chat",        # 🚦 Per-route cache policy (COMPLETION_CACHE_ROUTES)
+                                    verdict=scan_result, # 🛡️ Cached answers are tied to the scan verdict
+                                    model=routed_model,
+                                    messages=messages,
+                                    max_tokens=budget.max_tokens_for(routed_model),  # 📏 Route budget, capped by this model's context room
+                                    temperature=0.7,     # 🎚️ Controls creativity (0.0=factual, 1.0=creative)
+                                    usage_callback=budget.settle,  # 🧾 Real token usage -> quota + metrics
+                                    cancel=call_cancel   # ⏰ Not sent / cut short once the deadline passes
+                                ),
+                                cancel=cancel)      # 🧭 Hedged calls get child tokens; the loser is cancelled
 
                         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                        # 📤 EXTRACT AND DISPLAY OPENAI'S RESPONSE
+                        # 📤 DISPLAY OPENAI'S RESPONSE
                         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                        # OpenAI sends back a complex response object. We need to extract
-                        # just the actual text response that the user wants to see.
-                        ai_response = response.choices[0].message.content
+                        # The cache wrapper already extracted just the text the user wants to see.
+                        if from_cache:
+                            print("⚡ Served from completion cache (no OpenAI call)")
+                        turn.note(response_chars=len(ai_response or ""), from_cache=from_cache)
+
+                        # 💬 Remember the answer for the next turn
+                        conversation.add_assistant(ai_response or "")
+                        conversation.mark_scanned()
 
                         # 🎉 SUCCESS! Display the final AI response to the user
                         # At this point, your message has been:
@@ -648,6 +621,10 @@ def main():
                         print(ai_response)
                         print("=" * 60)
 
+                    except Cancelled as cancelled:
+                        print(f"\n⏹️ Request abandoned: {cancelled}")
+                        print("🤖 Response: No answer was generated in time. Please try again.")
+
                     except Exception as openai_err:
                         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
                         # ❌ HANDLE OPENAI ERRORS
@@ -672,6 +649,7 @@ def main():
 
             else:
                 # UNEXPECTED SECURITY RESULT
+                conversation.discard_unscanned()
                 print(f"\n⚠️  UNEXPECTED SECURITY RESULT")
                 print(f"   Category: {category}")
                 print(f"   Action: {action}")
@@ -680,11 +658,14 @@ def main():
 
         else:
             # SECURITY SCAN FAILURE
+            conversation.discard_unscanned()
             print("\n❌ SECURITY SCAN FAILED")
             print("🤖 Response: Unable to complete security scanning.")
             print("   Please check your Palo Alto Networks API configuration")
             print("   and network connectivity.")
 
+        turn.finish()
+
 
 # PROGRAM ENTRY POINT
 if __name__ == "__main__":
@@ -694,4 +675,13 @@ if __name__ == "__main__":
     This conditional ensures main() only runs when this file is executed
     directly, not when imported as a module by other Python scripts.
     """
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 Chatbot terminated by user. Goodbye!")
+    except lifecycle.ShutdownRequested:
+        print("\n👋 Chatbot stopped (SIGTERM). Goodbye!")
+    finally:
+        # 🔚 Refuse new work, drain in-flight scans and completions
+        # (SHUTDOWN_DRAIN_SECONDS), flush the audit log, close connection pools
+        lifecycle.shutdown()
\ No newline at end of file
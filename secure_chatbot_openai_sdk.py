@@ -17,45 +17,46 @@
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
 # ║                        📦 IMPORT DECLARATIONS                             ║
-# ║   🛡️ Security imports (requests, uuid) for Palo Alto Networks scanning   ║
+# ║   🛡️ Security imports (requests) for Palo Alto Networks scanning         ║
 # ║   🧠 AI imports (openai) for OpenAI chatbot functionality                ║
 # ║   ⚙️ System imports (os, json, asyncio, time) for core operations         ║
+# ║                                                                            ║
+# ║   ⚡ requests, openai and aisecurity are heavy: they are imported on       ║
+# ║      first use, not here, so the chatbot and worker processes start fast  ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
-import requests      # 🛡️ SECURITY: HTTP requests for Palo Alto Networks API
 import json          # ⚙️ SYSTEM: JSON data processing for both security and AI
-import os            # ⚙️ SYSTEM: Environment variable management
-import uuid          # 🛡️ SECURITY: Unique transaction IDs for security scans
 import asyncio       # ⚙️ SYSTEM: Asynchronous processing capabilities
 import time          # ⚙️ SYSTEM: Performance timing for security scans
-from openai import OpenAI  # 🧠 AI: Official OpenAI client for GPT models
+import importlib.util  # ⚙️ SYSTEM: Cheap "is it installed?" check for the SDK
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
-# ║                    ⚙️ ENVIRONMENT VARIABLE LOADER                         ║
+# ║                    ⚙️ SETTINGS (.env + ENVIRONMENT)                        ║
 # ║  NOT SECURITY OR CHATBOT - THIS IS BASIC SYSTEM CONFIGURATION             ║
 # ║                                                                            ║
 # ║  WHAT THIS DOES:                                                           ║
-# ║  Automatically loads API keys and settings from a .env file if present    ║
-# ║  This includes BOTH security credentials AND chatbot credentials           ║
+# ║  get_settings() loads API keys and settings from a .env file (if present) ║
+# ║  plus the environment, validates them once and caches the result.         ║
+# ║  This includes BOTH security credentials AND chatbot credentials,         ║
+# ║  OPENAI_MODEL, timeouts, retries, pool sizes and concurrency limits.      ║
+# ║  Real environment variables always win over the .env file.               ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
-
-# Load environment variables from .env file if it exists
-try:
-    from pathlib import Path  # ⚙️ SYSTEM: File path handling
-    env_file = Path(".env")
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key] = value  # Loads BOTH security AND AI credentials
-        print("✅ Loaded environment variables from .env file")
-except Exception as e:
-    print(f"⚠️ Could not load .env file: {e}")
-
-# OpenAI model to use. Override with the OPENAI_MODEL environment variable
-# (or a line in .env) if you want a different model without editing the code.
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+import chatbot_settings  # ⚙️ SYSTEM: Typed, cached, SIGHUP-reloadable settings
+from chatbot_settings import get_settings
+from conversation import ConversationStore  # 🧠 AI: Bounded in-memory chat history
+from completion_cache import CompletionCache  # 🧠 AI: Opt-in reuse of repeated OpenAI answers
+from token_budget import TokenShaper, install_token_counter  # 🧠 AI: Token counting, budgets, quota
+from model_router import ModelRouter  # 🧠 AI: Model choice, failover and hedging
+from cancellation import CancelToken, Cancelled  # ⚙️ SYSTEM: Abandon requests mid-way
+import warmup        # ⚙️ SYSTEM: Connect and probe-scan before the first user message
+import audit_log     # 🛡️ SECURITY: Append-only record of every scan verdict (prompt hashes only)
+from verdict_similarity import VerdictSimilarityIndex  # 🛡️ SECURITY: Opt-in reuse of near-duplicate "allow" verdicts
+import scanners      # 🛡️ SECURITY: Scanner protocol (scan/ascan/batch_scan) and stackable layers
+from scanners import HTTPScanner  # 🛡️ SECURITY: Shared AIRS request, retry and parse path
+import scan_report   # 🛡️ SECURITY: Human-readable verdict report shared with the API chatbot
+import traffic_recorder  # ⚙️ SYSTEM: Opt-in recording of traffic shape for replay benchmarks
+import profiling     # ⚙️ SYSTEM: On-demand CPU/allocation profiling (kill -USR1)
+import runtime_health  # ⚙️ SYSTEM: Event-loop lag, blocking-call sites, pool saturation
+import lifecycle     # ⚙️ SYSTEM: Graceful shutdown - drain in-flight work, flush, close
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
 # ║                🛡️ PALO ALTO NETWORKS SECURITY SDK IMPORT                  ║
@@ -68,18 +69,38 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 # ║  • Completely separate from any AI chatbot functionality                   ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
-# Import the real Palo Alto Networks AI Security SDK
-try:
-    import aisecurity  # 🛡️ SECURITY: Main SDK for threat detection
-    from aisecurity.generated_openapi_client import AiProfile, ScanRequestContentsInner  # 🛡️ SECURITY: Data models
-    from aisecurity.exceptions import AISecSDKException  # 🛡️ SECURITY: Error handling
+# Import the real Palo Alto Networks AI Security SDK - LAZILY
+# Checking that the package is installed is cheap; actually importing it (and
+# its generated OpenAPI client) is not, so the import happens in
+# load_aisecurity_sdk() the first time a scanner is created.
+SDK_AVAILABLE = importlib.util.find_spec("aisecurity") is not None
+
+aisecurity = None          # 🛡️ SECURITY: Main SDK for threat detection (set on first use)
+AISecSDKException = None   # 🛡️ SECURITY: Error handling (set on first use)
+
+
+def load_aisecurity_sdk():
+    """
+    📦 IMPORT THE PALO ALTO NETWORKS SDK ON FIRST USE
+
+    Returns True when the SDK is importable. The import only happens once;
+    later calls return immediately.
+    """
+    global aisecurity, AISecSDKException, SDK_AVAILABLE
+    if aisecurity is not None:
+        return True
+    try:
+        import aisecurity as _aisecurity
+        from aisecurity.exceptions import AISecSDKException as _AISecSDKException
+    except ImportError as e:
+        SDK_AVAILABLE = False
+        print(f"❌ Failed to import Palo Alto Networks AI Security SDK: {e}")
+        print("   Install with: pip install pan-aisecurity")
+        return False
+    aisecurity, AISecSDKException = _aisecurity, _AISecSDKException
     SDK_AVAILABLE = True
     print("✅ Palo Alto Networks AI Security SDK imported successfully")
-except ImportError as e:
-    SDK_AVAILABLE = False
-    print(f"❌ Failed to import Palo Alto Networks AI Security SDK: {e}")
-    print("   Install with: pip install pan-aisecurity")
-
+    return True
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
 # ║              🛡️ PALO ALTO NETWORKS SECURITY SCANNER CLASS                 ║
@@ -95,7 +116,7 @@ except ImportError as e:
 # ║  THIS IS NOT THE CHATBOT - this protects the chatbot from attacks!        ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
-class SDKSecurityScanner:
+class SDKSecurityScanner(HTTPScanner):
     """
     🛡️ PALO ALTO NETWORKS SDK SECURITY SCANNER - ENTERPRISE THREAT DETECTION
     
@@ -120,10 +141,15 @@ class SDKSecurityScanner:
     - 🔒 Enterprise-grade reliability (used by Fortune 500 companies)
     - 🚀 Async processing (handles multiple security scans simultaneously)
 
-    Uses the Palo Alto Networks Python SDK for secure configuration and authentication.
+    Uses the Palo Alto Networks Python SDK for secure configuration and authentication;
+    requests, retries, failover and auditing are scanners.HTTPScanner's, so both
+    chatbots scan the same way. Adds near-duplicate verdict reuse and SDK errors.
     """
 
-    def __init__(self, api_key, profile_name, api_endpoint=None, num_retries=3):
+    backend = "sdk"   # 📊 metrics label, and the "sdk-scan_N" thread names
+    source = "sdk"    # 📜 audit log source
+
+    def __init__(self, api_key, profile_name, api_endpoint=None, num_retries=None):
         """
         🏗️ SECURITY SCANNER INITIALIZATION - PALO ALTO NETWORKS SETUP
         
@@ -139,172 +165,53 @@ class SDKSecurityScanner:
         Parameters (ALL SECURITY-RELATED):
         - api_key: Your Palo Alto Networks API key for authentication
         - profile_name: Your custom security profile (defines what threats to detect)
-        - api_endpoint: Palo Alto's security service URL
-        - num_retries: How many times to retry if security scan fails
+        - api_endpoint: Palo Alto's security service URL (default: PANW_AI_SEC_ENDPOINT)
+        - num_retries: How many times to retry if security scan fails (default: MAX_RETRIES)
         """
-        # 🛡️ PALO ALTO NETWORKS SECURITY CONFIGURATION
+        settings = get_settings()
         self.api_key = api_key  # 🔑 Security authentication key
-        self.profile_name = profile_name  # 📋 Security policy profile
-        self.api_endpoint = api_endpoint or "https://service.api.aisecurity.paloaltonetworks.com"  # 🌐 Security service URL
-        self.num_retries = num_retries  # 🔄 Retry policy for security reliability
+        self.num_retries = settings.max_retries if num_retries is None else num_retries  # 🔄 Retry policy
 
         # 🏗️ INITIALIZE PALO ALTO NETWORKS SDK (SECURITY ONLY)
+        if not load_aisecurity_sdk():
+            raise ImportError("Palo Alto Networks AI Security SDK is not installed")
         aisecurity.init(
             api_key=api_key,                    # 🔑 Your security credentials
-            api_endpoint=self.api_endpoint,      # 🌐 Palo Alto's security servers
-            num_retries=num_retries              # 🔄 Reliability configuration
+            api_endpoint=api_endpoint or settings.panw_ai_sec_endpoint,  # 🌐 Palo Alto's security servers
+            num_retries=self.num_retries         # 🔄 Reliability configuration
         )
 
         # 📊 GET SECURITY CONFIGURATION FROM SDK
+        # aisecurity.init() configures ONE global object, so the endpoint and key
+        # are copied here: another scanner (another profile or API key) in the
+        # same process must not change where or as whom this one scans.
         self.config = aisecurity.global_configuration  # 🛡️ Security settings and endpoints
 
-        # 📚 THREAT CATEGORIES DICTIONARY - TRANSLATES SECURITY CODES TO HUMAN LANGUAGE
-        # ⚠️  NOTE: This maps technical threat codes to user-friendly descriptions
-        self.threat_categories = {
-            'prompt_injection': 'Prompt Injection Attack',    # 🚫 Malicious AI instructions
-            'injection': 'Prompt Injection Attack',           # 🚫 Command injection attempts  
-            'agent': 'AI Agent Manipulation',                 # 🚫 AI behavior manipulation
-            'url_cats': 'Malicious URL Detection',           # 🚫 Suspicious links and websites
-            'dlp': 'Data Loss Prevention',                   # 🚫 Sensitive data exposure
-            'toxic_content': 'Toxic Content',                # 🚫 Harmful or offensive material
-            'toxicity': 'Toxic Content',                     # 🚫 Harassment and hate speech
-        }
-
-    def create_scan_request(self, prompt):
-        """
-        📋 SECURITY REQUEST BUILDER - PALO ALTO NETWORKS FORMAT
-        
-        ⚠️  THIS IS PURE SECURITY FUNCTIONALITY - NO CHATBOT CODE!
-        
-        SECURITY PURPOSE:
-        Takes a user's message and packages it into the exact format required
-        by Palo Alto Networks security servers for comprehensive threat analysis.
-        
-        WHAT GETS SCANNED FOR SECURITY:
-        • Prompt injection attempts (malicious instructions)
-        • Toxic content (harassment, hate speech)
-        • Malicious URLs (phishing, malware links)
-        • Data leakage attempts (trying to extract sensitive info)
-        • AI manipulation techniques (jailbreaking, role-playing)
-        
-        Returns a structured security scan request with unique transaction ID.
-        """
-        try:
-            # 🛡️ SECURITY PROFILE CONFIGURATION
-            # This tells Palo Alto which security rules to apply
-            ai_profile_data = {"profile_name": self.profile_name}  # 📋 Your custom security policy
-            
-            # 📝 CONTENT TO BE SECURITY SCANNED
-            # This packages the user's message for threat analysis
-            content_data = {"prompt": prompt}  # 💬 User message to scan for threats
-
-            # 📦 COMPLETE SECURITY SCAN REQUEST STRUCTURE
-            # This creates the full request that Palo Alto's servers expect
-            request_data = {
-                "tr_id": str(uuid.uuid4()),        # 🆔 Unique security transaction ID
-                "ai_profile": ai_profile_data,     # 📋 Security policy to apply
-                "contents": [content_data]         # 💬 Content to scan for threats
-            }
-
-            return request_data  # 📤 Ready for Palo Alto security analysis
-
-        except Exception as e:
-            # 🚨 SECURITY ERROR HANDLING
-            raise AISecSDKException(f"Failed to create scan request: {e}")
-
-    def execute_scan_request(self, request_data):
+        # 🌐 SAME REQUEST PATH AS THE RAW-HTTP BACKEND
+        # scanners.HTTPScanner builds, sends (with num_retries retries and
+        # regional failover), chunks, parses and audits every scan; the SDK only
+        # supplies the configuration. Pre-encoded ai_profile block and headers,
+        # scan thread pool, SCAN_CONCURRENCY slots and cache namespace included.
+        super().__init__(
+            self.config.api_key,
+            profile_name,
+            base_url=self.config.api_endpoint.rstrip("/"),
+            retries=self.num_retries,
+            user_agent="PAN-AI-Security-SDK/1.0.0",
+        )
+        self.similar_verdicts = VerdictSimilarityIndex()  # ♻️ Recent "allow" verdicts (SIMILARITY_CACHE_*)
+
+    def warm_up(self, openai_client=None):
         """
-        🚀 SECURITY SCAN EXECUTOR - PALO ALTO NETWORKS THREAT ANALYSIS
-        
-        ⚠️  THIS IS PURE SECURITY SCANNING - NO CHATBOT PROCESSING HERE!
-        
-        SECURITY OPERATIONS:
-        1. 📡 Sends user message to Palo Alto's threat detection servers
-        2. 🔄 Implements testing-grade retry logic (up to 3 attempts)
-        3. ⏱️ Uses exponential backoff (waits longer between retries)
-        4. 🛡️ Handles authentication, network, and security policy errors
-        5. 📊 Returns comprehensive threat analysis results
-        
-        WHAT PALO ALTO SCANS FOR:
-        • Malicious instructions trying to hijack the AI
-        • Toxic or harmful content that violates policies
-        • Suspicious URLs that could be phishing or malware
-        • Attempts to extract sensitive data or bypass security
-        • Social engineering attacks targeting the AI system
+        🔥 PAY THE COLD-START COSTS NOW, NOT ON THE FIRST USER MESSAGE
+
+        Resolves and connects to the security endpoint (and OpenAI, if a
+        client is given) and probe-scans WARMUP_CANARY_PROMPT through this
+        scanner. Failures are reported, not raised. Returns the step report.
         """
-        # 🌐 PALO ALTO NETWORKS SECURITY API ENDPOINT
-        # This is the URL where all security scans are processed
-        url = f"{self.config.api_endpoint}/v1/scan/sync/request"  # 🛡️ Security scanning endpoint
-
-        # 📋 SECURITY API HEADERS
-        # These headers authenticate and identify our security requests
-        headers = {
-            "Content-Type": "application/json",              # 📄 Data format specification
-            "Accept": "application/json",                    # 📥 Expected response format
-            "x-pan-token": self.config.api_key,             # 🔑 SECURITY: Palo Alto API authentication
-            "User-Agent": "PAN-AI-Security-SDK/1.0.0"       # 🏷️ SDK identification for security logs
-        }
+        return warmup.warm_up(self.api_endpoint, scan=self.probe, openai_client=openai_client)
 
-        # ╔══════════════════════════════════════════════════════════════════════╗
-        # ║           🔄 ENTERPRISE SECURITY SCAN EXECUTION LOOP                 ║
-        # ║  ⚠️  CRITICAL: ALL CODE BELOW IS PURE SECURITY - NO CHATBOT!        ║
-        # ╚══════════════════════════════════════════════════════════════════════╝
-        
-        # 🔄 INTELLIGENT RETRY LOOP - ENTERPRISE-GRADE RELIABILITY
-        # If security scanning fails, this automatically retries with increasing delays
-        for attempt in range(self.num_retries + 1):
-            try:
-                # ⏱️ EXPONENTIAL BACKOFF FOR FAILED SECURITY ATTEMPTS
-                if attempt > 0:
-                    wait_time = 2 ** (attempt - 1)  # 📈 Wait longer each retry (1s, 2s, 4s)
-                    print(f"   🔄 Security retry attempt {attempt}/{self.num_retries} (waiting {wait_time}s)")
-                    time.sleep(wait_time)  # ⏰ Pause before retry
-
-                # 📡 SEND MESSAGE TO PALO ALTO SECURITY SERVERS
-                print(f"   📡 Sending security scan to Palo Alto (attempt {attempt + 1})")
-                response = requests.post(
-                    url,                    # 🌐 Palo Alto security endpoint
-                    headers=headers,        # 🔑 Security authentication headers
-                    json=request_data,      # 💬 User message packaged for scanning
-                    timeout=30              # ⏰ 30-second timeout for security response
-                )
-                response.raise_for_status()  # 🚨 Raise exception if security API fails
-
-                # 📊 PARSE SECURITY SCAN RESULTS
-                result = response.json()  # 📄 Convert security response to data
-                print(f"   ✅ Palo Alto security scan completed successfully")
-                return result  # 📤 Return threat analysis results
-
-            # ╔══════════════════════════════════════════════════════════════════════╗
-            # ║                🚨 SECURITY ERROR HANDLING                          ║
-            # ║  These errors are ALL related to security scanning failures        ║
-            # ╚══════════════════════════════════════════════════════════════════════╝
-            
-            except requests.exceptions.HTTPError as e:
-                # 🔑 SECURITY AUTHENTICATION ERRORS
-                if e.response.status_code == 401:
-                    raise AISecSDKException(
-                        f"Security authentication failed: Invalid Palo Alto API key")
-                elif e.response.status_code == 404:
-                    raise AISecSDKException(
-                        f"Security profile not found: {self.profile_name}")
-                elif attempt == self.num_retries:
-                    raise AISecSDKException(
-                        f"Security HTTP Error after {self.num_retries} retries: {e}")
-
-            except requests.exceptions.ConnectionError as e:
-                # 🌐 SECURITY NETWORK CONNECTION ERRORS
-                if attempt == self.num_retries:
-                    raise AISecSDKException(
-                        f"Security connection failed after {self.num_retries} retries: {e}")
-
-            except requests.exceptions.Timeout as e:
-                # ⏰ SECURITY REQUEST TIMEOUT ERRORS
-                if attempt == self.num_retries:
-                    raise AISecSDKException(
-                        f"Security request timeout after {self.num_retries} retries: {e}")
-
-    def sync_scan(self, prompt):
+    def scan(self, prompt, cancel=None):
         """
         🔍 SYNCHRONOUS SECURITY SCAN - COMPREHENSIVE THREAT ANALYSIS
         
@@ -325,10 +232,14 @@ class SDKSecurityScanner:
 
         Args:
             prompt (str): The user's message to scan for security threats
+            cancel (CancelToken): optional; cancelling it abandons the scan
+                (raises Cancelled - treat like a failed scan)
 
         Returns:
             dict: Detailed security analysis with threat categories and recommendations
         """
+        import requests  # 🛡️ SECURITY: HTTP error types, loaded on the first scan (cached afterwards)
+
         # ⏱️ SECURITY PERFORMANCE MONITORING
         start_time = time.time()  # 🕐 Start timing the security scan
 
@@ -336,24 +247,60 @@ class SDKSecurityScanner:
         print(f"🔍 Palo Alto Networks SDK Security Scan Starting...")
         print(f"   Content: '{prompt[:50]}...' ({len(prompt)} characters)")  # 📝 Preview of content being scanned
         print(f"   Security Profile: {self.profile_name}")                    # 📋 Which security rules are active
-        print(f"   Security Endpoint: {self.config.api_endpoint}")             # 🌐 Palo Alto security server
-
-        # 📋 CREATE SECURITY SCAN REQUEST
-        # Step 1: Package the user's message for Palo Alto analysis
-        request_data = self.create_scan_request(prompt)  # 🛡️ SECURITY: Format message for scanning
-        print(f"   Security Transaction ID: {request_data['tr_id']}")  # 🆔 Unique ID for this security check
-
-        # 🚀 EXECUTE SECURITY SCAN
-        # Step 2: Send to Palo Alto servers for comprehensive threat analysis
-        scan_result = self.execute_scan_request(request_data)  # 🛡️ SECURITY: Actual threat detection
+        print(f"   Security Endpoint: {self.api_endpoint}")             # 🌐 Palo Alto security server
+
+        # ♻️ NEAR-DUPLICATE VERDICT REUSE (only when SIMILARITY_CACHE_ENABLED)
+        # A prompt contained in one this profile recently ALLOWED reuses that
+        # verdict. Block verdicts are never reused and the index is keyed by
+        # profile, so a different policy always gets a fresh scan.
+        reused, similarity = self.similar_verdicts.lookup(self.cache_namespace, prompt)
+        if reused is not None:
+            scan_result = dict(reused)
+            scan_result['verdict_reused'] = True
+            scan_result['similarity'] = similarity
+            scan_result['scan_time_ms'] = (time.time() - start_time) * 1000
+            print(f"   ♻️ Reusing verdict of transaction {reused.get('tr_id')} (similarity {similarity:.2f})")
+            audit_log.record_scan(reused.get('tr_id'), self.profile_name, prompt, scan_result,
+                                  scan_result['scan_time_ms'], source=self.source)
+            return scan_result
+
+        # 🚀 EXECUTE SECURITY SCAN (retries, failover, chunking, audit: HTTPScanner.scan)
+        try:
+            scan_result = super().scan(prompt, cancel)  # 🛡️ SECURITY: Actual threat detection
 
-        # ⏱️ CALCULATE SECURITY SCAN PERFORMANCE
-        scan_time = (time.time() - start_time) * 1000  # 📊 Convert to milliseconds
-        scan_result['scan_time_ms'] = scan_time         # 📈 Add timing to results
+        # ╔══════════════════════════════════════════════════════════════════════╗
+        # ║                🚨 SECURITY ERROR HANDLING                          ║
+        # ║  Reached once the retries are used up (401/404 are never retried)  ║
+        # ╚══════════════════════════════════════════════════════════════════════╝
+        except requests.exceptions.HTTPError as e:
+            # 🔑 SECURITY AUTHENTICATION ERRORS
+            if e.response.status_code == 401:
+                raise AISecSDKException(
+                    f"Security authentication failed: Invalid Palo Alto API key") from e
+            elif e.response.status_code == 404:
+                raise AISecSDKException(
+                    f"Security profile not found: {self.profile_name}") from e
+            raise AISecSDKException(
+                f"Security HTTP Error after {self.num_retries} retries: {e}") from e
+        except requests.exceptions.ConnectionError as e:
+            # 🌐 SECURITY NETWORK CONNECTION ERRORS
+            raise AISecSDKException(
+                f"Security connection failed after {self.num_retries} retries: {e}") from e
+        except requests.exceptions.Timeout as e:
+            # ⏰ SECURITY REQUEST TIMEOUT ERRORS
+            raise AISecSDKException(
+                f"Security request timeout after {self.num_retries} retries: {e}") from e
+
+        print(f"   Security Transaction ID: {scan_result.get('tr_id')}")  # 🆔 Unique ID for this security check
+        print(f"   ✅ Palo Alto security scan completed successfully")
+
+        self.similar_verdicts.add(self.cache_namespace, prompt, scan_result)  # ♻️ Ignored unless "allow"
 
         return scan_result  # 📤 Return complete security analysis
 
-    async def async_scan(self, prompt):
+    sync_scan = scan  # 🛡️ The name this chatbot has always used for the same scan
+
+    async def async_scan(self, prompt, cancel=None):
         """
         ⚡ ASYNCHRONOUS SECURITY SCAN - HIGH-PERFORMANCE THREAT DETECTION
         
@@ -373,194 +320,16 @@ class SDKSecurityScanner:
 
         Args:
             prompt (str): The user's message to scan for security threats
+            cancel (CancelToken): optional; one is created if not given. If the
+                awaiting task is cancelled (e.g. the client went away) the
+                token is cancelled too, so the worker thread stops retrying.
 
         Returns:
             dict: Complete security analysis results (same as sync_scan)
         """
-        # 🔄 ASYNC SECURITY EXECUTION
-        # Runs the security scan without blocking other operations
-        loop = asyncio.get_event_loop()  # ⚙️ Get async event loop
-        return await loop.run_in_executor(None, self.sync_scan, prompt)  # 🛡️ SECURITY: Non-blocking threat scan
-
-    def display_enhanced_results(self, scan_result):
-        """
-        📊 SECURITY RESULTS FORMATTER - HUMAN-READABLE THREAT REPORT
-        
-        ⚠️  THIS IS SECURITY REPORTING - NOT CHATBOT FUNCTIONALITY!
-        
-        SECURITY REPORTING PURPOSE:
-        Takes raw security scan data from Palo Alto Networks and transforms it
-        into a beautiful, easy-to-understand security report that shows:
-        
-        WHAT THE SECURITY REPORT SHOWS:
-        • 🚦 Overall security classification (benign, suspicious, malicious)
-        • 📋 Recommended security action (allow, warn, block)
-        • 🕐 Security scan performance metrics
-        • 🔍 Detailed breakdown of specific threats found
-        • 💡 Security recommendations for threat remediation
-        • 📊 Complete audit trail for security compliance
-        
-        This helps non-technical users understand what security threats
-        were detected and how to fix their messages to be safe.
-        """
-
-        # ╔══════════════════════════════════════════════════════════════════════╗
-        # ║              📊 SECURITY SCAN RESULTS HEADER                         ║
-        # ║  Shows high-level security classification and metadata               ║
-        # ╚══════════════════════════════════════════════════════════════════════╝
-        
-        print("\n📋 PALO ALTO NETWORKS SDK SECURITY RESULTS:")
-        print("=" * 50)
-        print(f"🛡️ Security Classification: {scan_result.get('category', 'Unknown')}")     # 🚦 Safe or dangerous?
-        print(f"🚦 Security Action: {scan_result.get('action', 'Unknown')}")                # 🔄 Allow or block?
-        print(f"📋 Security Profile: {scan_result.get('profile_name', 'Unknown')}")         # 📝 Which security rules used?
-        print(f"🆔 Profile ID: {scan_result.get('profile_id', 'Unknown')}")                # 🔢 Internal security profile ID
-        print(f"⏱️ Security Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")        # 📈 Performance metrics
-        print(f"🆔 Transaction ID: {scan_result.get('tr_id', 'Unknown')}")                 # 🔗 Unique security scan ID
-        print(f"📄 Report ID: {scan_result.get('report_id', 'Unknown')}")                  # 📊 Security report reference
-        print(f"🔍 Scan ID: {scan_result.get('scan_id', 'Unknown')}")                      # 🆔 Internal scan reference
-
-        # ╔══════════════════════════════════════════════════════════════════════╗
-        # ║              🚨 DETAILED SECURITY THREAT ANALYSIS                    ║
-        # ║  This section breaks down exactly what security threats were found   ║
-        # ╚══════════════════════════════════════════════════════════════════════╝
-        
-        print(f"\n🚨 DETAILED SECURITY THREAT ANALYSIS:")
-        print("=" * 50)
-
-        threats_found = False  # 🔍 Track if any security threats were detected
-
-        # ╔══════════════════════════════════════════════════════════════════════════╗
-        # ║                    📊 RESPONSE DETECTION EXPLANATION                     ║
-        # ║  ⚠️  ADVANCED SECURITY: Understanding Palo Alto's response prediction    ║
-        # ║                                                                          ║
-        # ║  WHAT IS RESPONSE DETECTION?                                             ║
-        # ║  Palo Alto's AI doesn't just scan your message - it also uses machine   ║
-        # ║  learning to predict what the chatbot might respond with, and blocks    ║
-        # ║  messages that could lead to dangerous or inappropriate AI answers.     ║
-        # ║                                                                          ║
-        # ║  SOPHISTICATED AI PROTECTION PROCESS:                                   ║
-        # ║  1. 🧠 Advanced AI analyzes your message content                         ║
-        # ║  2. 🔮 Predicts multiple possible chatbot response scenarios            ║
-        # ║  3. 🚨 Identifies which predicted responses might contain threats        ║
-        # ║  4. 🛡️ Proactively blocks risky messages before AI processing           ║
-        # ║                                                                          ║
-        # ║  ENTERPRISE EXAMPLE:                                                     ║
-        # ║  User: "How do I break into systems?" →                                  ║
-        # ║  → Response detection: "AI might provide hacking instructions"          ║
-        # ║  → Message blocked before chatbot ever sees it                         ║
-        # ║  → Prevents accidental security information disclosure                  ║
-        # ╚══════════════════════════════════════════════════════════════════════════╝
-        
-        # 🔍 PALO ALTO NETWORKS SECURITY SCAN DEBUG INFORMATION
-        print(f"🛡️ PALO ALTO NETWORKS SECURITY SCAN DETAILS:")
-        print(f"   🚦 Security Category: {scan_result.get('category')}")                    # 🛡️ Overall security classification
-        print(f"   📋 Security Action: {scan_result.get('action')}")                        # 🚦 Recommended security action
-        print(f"   🎯 INPUT Threats: {scan_result.get('prompt_detected', {})}")           # 🚨 Threats in user's message
-        print(f"   📤 OUTPUT Threats: {scan_result.get('response_detected', {})}")        # 🚨 Predicted threats in AI response
-
-        # ╔══════════════════════════════════════════════════════════════════════╗
-        # ║            🎯 INPUT SECURITY THREAT ANALYSIS                         ║
-        # ║  Analyzes threats found in the USER'S MESSAGE (not the chatbot)     ║
-        # ╚══════════════════════════════════════════════════════════════════════╝
-        
-        # 🎯 ANALYZE USER INPUT FOR SECURITY THREATS
-        prompt_detected = scan_result.get('prompt_detected', {})  # 🚨 Security threats in user's message
-        if prompt_detected:
-            print(f"\n🎯 USER MESSAGE SECURITY THREATS:")
-            for threat_type, detected in prompt_detected.items():
-                if detected:
-                    # 📚 TRANSLATE SECURITY CODES TO HUMAN LANGUAGE
-                    threat_name = self.threat_categories.get(
-                        threat_type, threat_type.replace('_', ' ').title())
-                    print(f"   🔴 {threat_name} detected in user's message")
-                    threats_found = True  # 🚨 Flag that security threats exist
-
-                    # 💡 PROVIDE SPECIFIC SECURITY GUIDANCE FOR EACH THREAT
-                    if threat_type in ['injection', 'prompt_injection']:
-                        print(f"      └─ 🚫 SECURITY ISSUE: Malicious AI instruction patterns detected")
-                        print(f"      └─ 💡 SECURITY FIX: Rephrase without command-like language")
-                    elif threat_type == 'agent':
-                        print(f"      └─ 🚫 SECURITY ISSUE: AI agent manipulation attempt detected")
-                        print(f"      └─ 💡 SECURITY FIX: Remove role-playing or identity claims")
-                    elif threat_type in ['toxicity', 'toxic_content']:
-                        print(f"      └─ 🚫 SECURITY ISSUE: Harmful or offensive content identified")
-                        print(f"      └─ 💡 SECURITY FIX: Use respectful, appropriate language")
-                    elif threat_type == 'url_cats':
-                        print(f"      └─ 🚫 SECURITY ISSUE: Malicious URL detected in message")
-                        print(f"      └─ 💡 SECURITY FIX: Remove suspicious links")
-                    elif threat_type == 'dlp':
-                        print(f"      └─ 🚫 SECURITY ISSUE: Sensitive data exposure risk")
-                        print(f"      └─ 💡 SECURITY FIX: Remove personal/confidential information")
-
-        # ╔══════════════════════════════════════════════════════════════════════════╗
-        # ║                📤 RESPONSE THREAT DETECTION ANALYSIS                    ║
-        # ║  ⚠️  ADVANCED SECURITY: Palo Alto's AI response prediction system       ║
-        # ║                                                                          ║
-        # ║  RESPONSE DETECTION PURPOSE:                                             ║
-        # ║  This is Palo Alto's most advanced security feature - it uses AI to    ║
-        # ║  predict what your chatbot might say and blocks dangerous questions     ║
-        # ║  before they can lead to harmful AI responses.                         ║
-        # ║                                                                          ║
-        # ║  HOW RESPONSE PREDICTION WORKS:                                         ║
-        # ║  1. 🤖 Palo Alto's AI simulates what OpenAI might respond               ║
-        # ║  2. 🔍 Analyzes those simulated responses for security violations       ║
-        # ║  3. 🚫 Blocks your original message if responses would be dangerous     ║
-        # ║  4. 💡 Provides specific guidance on how to fix your message            ║
-        # ║                                                                          ║
-        # ║  ENTERPRISE SECURITY EXAMPLE:                                           ║
-        # ║  User: "How do criminals launder money?" →                              ║
-        # ║  → Palo Alto predicts: "AI might explain money laundering techniques"  ║
-        # ║  → Result: Message blocked to prevent financial crime information       ║
-        # ║  → User gets guidance: "Ask about legal financial compliance instead"  ║
-        # ╚══════════════════════════════════════════════════════════════════════════╝
-        
-        # 📤 ANALYZE PREDICTED AI RESPONSE FOR SECURITY THREATS
-        response_detected = scan_result.get('response_detected', {})  # 🔮 Threats Palo Alto predicts in AI response
-        if response_detected:
-            print(f"\n📤 PREDICTED OPENAI RESPONSE THREATS:")
-            for threat_type, detected in response_detected.items():
-                if detected:
-                    # 📚 TRANSLATE SECURITY CODES TO HUMAN-FRIENDLY LANGUAGE
-                    threat_name = self.threat_categories.get(
-                        threat_type, threat_type.replace('_', ' ').title())
-                    print(f"   🔴 RESPONSE THREAT: {threat_name} predicted in AI output")
-                    threats_found = True  # 🚨 Flag that security threats were predicted
-                    
-                    # 💡 PROVIDE DETAILED GUIDANCE FOR RESPONSE-LEVEL THREATS
-                    if threat_type == 'url_cats' and detected:
-                        print(f"      └─ 🌐 PREDICTION: OpenAI might generate malicious URLs")
-                        print(f"      └─ 💡 SECURITY FIX: Rephrase to avoid requesting potentially harmful links")
-                    elif threat_type == 'dlp' and detected:
-                        print(f"      └─ 🔒 PREDICTION: OpenAI might leak sensitive data")
-                        print(f"      └─ 💡 SECURITY FIX: Avoid requesting personal or confidential information")
-                    elif threat_type in ['toxicity', 'toxic_content'] and detected:
-                        print(f"      └─ 💬 PREDICTION: OpenAI might generate harmful content")
-                        print(f"      └─ 💡 SECURITY FIX: Use respectful, appropriate language in your question")
-                    elif threat_type in ['injection', 'prompt_injection'] and detected:
-                        print(f"      └─ ⚡ PREDICTION: AI might be tricked into malicious behavior")
-                        print(f"      └─ 💡 SECURITY FIX: Remove command-like or instructional language")
-                    else:
-                        print(f"      └─ ⚠️ PREDICTION: AI response might violate security policies")
-                        print(f"      └─ 💡 SECURITY FIX: Modify your question to be safer and more appropriate")
-
-        # ╔══════════════════════════════════════════════════════════════════════╗
-        # ║              🚦 FINAL SECURITY ASSESSMENT                           ║
-        # ║  Overall security verdict from Palo Alto Networks analysis          ║
-        # ╚══════════════════════════════════════════════════════════════════════╝
-        
-        # 🚦 OVERALL SECURITY THREAT ASSESSMENT
-        if scan_result.get('category') == 'malicious' and not threats_found:
-            print(f"   🔴 GENERAL SECURITY POLICY VIOLATION")
-            print(f"      └─ 🛡️ SECURITY: Content flagged as malicious by Palo Alto policies")
-            threats_found = True  # 🚨 Mark that security threats were found
-
-        # ✅ SECURITY ALL-CLEAR STATUS
-        if not threats_found:
-            print("   ✅ No security threats detected by Palo Alto Networks")
-            print("   ✅ Content approved for safe AI processing")
-
-        print("=" * 50)  # 📊 Close security results section
+        # 🚦 At most SCAN_CONCURRENCY scans run at once, on this scanner's own
+        # threads (SCAN_EXECUTOR_*): see scanners.SecurityScanner.ascan
+        return await self.ascan(prompt, cancel)  # 🛡️ SECURITY: Non-blocking threat scan
 
 
 async def main():
@@ -583,7 +352,7 @@ async def main():
     print("Features: Python SDK, Async/Sync, Enhanced Error Handling")
     print("=" * 60)
 
-    if not SDK_AVAILABLE:
+    if not SDK_AVAILABLE or not load_aisecurity_sdk():
         print("\n❌ PYTHON SDK UNAVAILABLE")
         print("   Install with: pip install pan-aisecurity")
         return
@@ -591,8 +360,22 @@ async def main():
     # CREDENTIAL VALIDATION
     print("\n🔑 VALIDATING CREDENTIALS...")
 
-    pan_api_key = os.getenv("PANW_AI_SEC_API_KEY")
-    pan_ai_profile_name = os.getenv("PANW_AI_SEC_PROFILE_NAME")
+    try:
+        settings = get_settings()
+    except Exception as e:
+        print(f"❌ ERROR: Invalid configuration: {e}")
+        return
+
+    # Send SIGHUP (kill -HUP <pid>) to re-read .env without restarting
+    chatbot_settings.install_reload_signal_handler()
+    profiling.install_profile_signal_handler()  # kill -USR1 <pid>: profile for PROFILE_SECONDS
+    lifecycle.install_signal_handler()  # SIGTERM: finish the running turn, drain, flush, exit
+
+    # Event-loop lag, blocking calls on the loop and executor saturation (HEALTH_*)
+    runtime_health.install()
+
+    pan_api_key = settings.panw_ai_sec_api_key
+    pan_ai_profile_name = settings.panw_ai_sec_profile_name
 
     if not pan_api_key:
         print("❌ ERROR: Missing PANW_AI_SEC_API_KEY environment variable")
@@ -605,7 +388,7 @@ async def main():
     print("✅ Palo Alto Networks credentials validated")
 
     # OPENAI VALIDATION
-    openai_key = os.getenv("OPENAI_API_KEY")
+    openai_key = settings.openai_api_key
 
     if not openai_key:
         print("❌ ERROR: Missing OPENAI_API_KEY environment variable")
@@ -618,15 +401,18 @@ async def main():
     print("\n🛡️ INITIALIZING PYTHON SDK SCANNER...")
 
     try:
-        scanner = SDKSecurityScanner(
+        # The SDK scanner plus the layers the settings turn on (SCAN_CACHE_*,
+        # SCAN_DEDUP_ENABLED, SCAN_RATE_LIMIT_PER_SECOND, metrics)
+        scanner = scanners.build_scanner(
+            "sdk",
             api_key=pan_api_key,
             profile_name=pan_ai_profile_name,
-            num_retries=3
         )
         print("✅ Python SDK Scanner initialized successfully")
-        print(f"   API Endpoint: {scanner.config.api_endpoint}")
+        print(f"   API Endpoint: {scanner.api_endpoint}")
         print(f"   Profile: {scanner.profile_name}")
-        print(f"   Retries: {scanner.config.num_retries}")
+        print(f"   Retries: {scanner.num_retries}")
+        lifecycle.on_shutdown("SDK scan threads", scanner.close)
     except Exception as e:
         print(f"❌ Failed to initialize SDK Scanner: {e}")
         return
@@ -637,16 +423,40 @@ async def main():
     openai_client = None
 
     try:
+        from openai import OpenAI  # 🧠 AI: imported on first use to keep startup fast
         openai_client = OpenAI(
             api_key=openai_key
         )
         print("✅ OpenAI client initialized successfully")
+        lifecycle.on_shutdown("OpenAI client", openai_client.close)
     except Exception as e:
         print(f"❌ Failed to initialize OpenAI client: {e}")
         print("   OpenAI functionality will be unavailable")
         print("   Note: The security scanning will still work perfectly!")
         openai_client = None
 
+    # WARM-UP (WARMUP_ENABLED): connect and probe-scan before the first message,
+    # then keep the pooled connections open with pings (WARMUP_KEEPALIVE_SECONDS)
+    if settings.warmup_enabled:
+        scanner.warm_up(openai_client)
+        keep_warm = warmup.KeepWarm(scanner.api_endpoint, openai_client).start()
+        lifecycle.on_shutdown("keep-warm pings", keep_warm.stop)
+
+    # CONVERSATION HISTORY (in memory only, trimmed to CONVERSATION_MAX_TOKENS)
+    conversations = ConversationStore()
+    conversation = conversations.get("cli")
+
+    # COMPLETION CACHE (off unless COMPLETION_CACHE_ENABLED=true)
+    completion_cache = CompletionCache()
+
+    # TOKEN BUDGETS (per-route max_tokens, OPENAI_TOKENS_PER_MINUTE quota)
+    token_shaper = TokenShaper()
+    install_token_counter()
+
+    # MODEL ROUTER (OPENAI_MODEL first, OPENAI_FALLBACK_MODELS on failure)
+    model_router = ModelRouter()
+    lifecycle.on_shutdown("model hedge threads", model_router.close)
+
     # INTERACTIVE CHAT LOOP
     print("\n" + "=" * 60)
     print("PYTHON SDK CHATBOT READY")
@@ -657,109 +467,159 @@ async def main():
     print("• Async scanning with intelligent retry logic")
     print("• Comprehensive security insights and recommendations")
     print("• Powered by OpenAI for intelligent responses")
+    print("• Multi-turn conversation; only new content is security scanned")
     print("• Type 'exit' to terminate")
 
-    while True:
-        user_input = input("\n👤 You: ").strip()
+    try:
+        while True:
+            if lifecycle.stop_requested():  # SIGTERM arrived during the last turn
+                print("\n👋 SDK session stopped for shutdown. Goodbye!")
+                break
 
-        if user_input.lower() == 'exit':
-            print("\n👋 SDK session terminated. Goodbye!")
-            break
+            with lifecycle.idle():  # SIGTERM while waiting here stops at once
+                user_input = input("\n👤 You: ").strip()
 
-        if not user_input:
-            print("⚠️  Please enter a non-empty message.")
-            continue
+            if user_input.lower() == 'exit':
+                print("\n👋 SDK session terminated. Goodbye!")
+                break
 
-        # PYTHON SDK SECURITY SCANNING
-        print("\n🔒 PYTHON SDK SECURITY SCANNING")
-        print("=" * 50)
+            if not user_input:
+                print("⚠️  Please enter a non-empty message.")
+                continue
 
-        try:
-            # Perform async security scan using SDK
-            scan_result = await scanner.async_scan(user_input)
-
-            # Display comprehensive results
-            scanner.display_enhanced_results(scan_result)
-
-            # SECURITY DECISION PROCESSING
-            category = scan_result.get('category')
-            action = scan_result.get('action')
-
-            print(f"\n🚦 SECURITY DECISION:")
-            print(f"   Classification: {category}")
-            print(f"   Recommended Action: {action}")
-
-            if category == "malicious" or action == "block":
-                # MESSAGE BLOCKED
-                print("\n🚫 MESSAGE BLOCKED BY SDK SECURITY")
-                print("=" * 50)
-                print(f"Security Status: {category.upper()}")
-                print(f"Action Taken: {action.upper()}")
-                print(f"Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")
-                print("\n🤖 SDK Response: This message cannot be processed due to")
-                print("   security policy violations detected by the Palo Alto Networks")
-                print("   AI Security Python SDK. Please review the detailed threat")
-                print("   analysis above and modify your message accordingly.")
-                print("=" * 50)
-
-            elif category == "benign" and action == "allow":
-                # MESSAGE APPROVED
-                print("\n✅ SDK SECURITY CHECK PASSED")
-                print("=" * 50)
-                print(f"Security Status: {category.upper()}")
-                print(f"Action: {action.upper()}")
-                print(f"Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")
-                print("SDK analysis confirms content is safe for AI processing...")
-                print("=" * 50)
-
-                # AI PROCESSING
-                if openai_client:
-                    print("\n🧠 AI PROCESSING PHASE")
+            # PYTHON SDK SECURITY SCANNING
+            print("\n🔒 PYTHON SDK SECURITY SCANNING")
+            print("=" * 50)
+
+            # Incremental scanning: the new message plus a short tail of the
+            # earlier conversation (SCAN_CONTEXT_CHARS), never the whole transcript
+            conversation.add_user(user_input)
+            scan_text = conversation.scan_window(get_settings().scan_context_chars)
+
+            # One deadline for the whole turn (REQUEST_DEADLINE_SECONDS, 0 = none):
+            # once it passes, scan retries stop and OpenAI is not called
+            cancel = CancelToken(deadline_seconds=get_settings().request_deadline_seconds or None)
+
+            # Traffic shape for replay (TRAFFIC_RECORD_PATH); a no-op when not recording
+            turn = traffic_recorder.start_turn(scan_text)
+
+            try:
+                # Perform async security scan using SDK
+                with turn.stage("scan"):
+                    scan_result = await scanner.ascan(scan_text, cancel)
+
+                # Display comprehensive results
+                scan_report.print_scan_report(scan_result, "📋 PALO ALTO NETWORKS SDK SECURITY RESULTS")
+
+                # SECURITY DECISION PROCESSING
+                category = scan_result.get('category')
+                action = scan_result.get('action')
+                turn.note(action=action, category=category)
+
+                print(f"\n🚦 SECURITY DECISION:")
+                print(f"   Classification: {category}")
+                print(f"   Recommended Action: {action}")
+
+                if category == "malicious" or action == "block":
+                    # MESSAGE BLOCKED
+                    conversation.discard_unscanned()  # blocked text never becomes history
+                    print("\n🚫 MESSAGE BLOCKED BY SDK SECURITY")
+                    print("=" * 50)
+                    print(f"Security Status: {category.upper()}")
+                    print(f"Action Taken: {action.upper()}")
+                    print(f"Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")
+                    print("\n🤖 SDK Response: This message cannot be processed due to")
+                    print("   security policy violations detected by the Palo Alto Networks")
+                    print("   AI Security Python SDK. Please review the detailed threat")
+                    print("   analysis above and modify your message accordingly.")
+                    print("=" * 50)
+
+                elif category == "benign" and action == "allow":
+                    # MESSAGE APPROVED
+                    conversation.mark_scanned()
+                    print("\n✅ SDK SECURITY CHECK PASSED")
                     print("=" * 50)
-                    print("Generating OpenAI response...")
-
-                    try:
-                        response = openai_client.chat.completions.create(
-                            model=OPENAI_MODEL,  # OpenAI chat model, defaults to gpt-4o-mini
-                            messages=[
-                                {
-                                    "role": "user",
-                                    "content": user_input
-                                }
-                            ],
-                            max_tokens=800,
-                            temperature=0.7
-                        )
-
-                        ai_response = response.choices[0].message.content
-
-                        print("\n" + "=" * 60)
-                        print("🤖 OPENAI RESPONSE:")
-                        print("=" * 60)
-                        print(ai_response)
-                        print("=" * 60)
-
-                    except Exception as openai_err:
-                        print(f"\n❌ OPENAI ERROR: {openai_err}")
+                    print(f"Security Status: {category.upper()}")
+                    print(f"Action: {action.upper()}")
+                    print(f"Scan Time: {scan_result.get('scan_time_ms', 0):.1f}ms")
+                    print("SDK analysis confirms content is safe for AI processing...")
+                    print("=" * 50)
+
+                    # AI PROCESSING
+                    if openai_client:
+                        print("\n🧠 AI PROCESSING PHASE")
+                        print("=" * 50)
+                        print("Generating OpenAI response...")
+
+                        try:
+                            model = get_settings().openai_model  # OPENAI_MODEL, defaults to gpt-4o-mini
+                            messages = list(conversation.messages)  # approved conversation so far
+                            with turn.stage("completion"), token_shaper.reserve("chat", model, messages) as budget:
+                                ai_response, from_cache = model_router.call(
+                                    "chat", budget.prompt_tokens,  # picks the model, fails over on errors
+                                    lambda routed_model, call_cancel: completion_cache.complete(
+                                        openai_client,
+                                        route="chat",          # per-route cache policy (COMPLETION_CACHE_ROUTES)
+                                        verdict=scan_result,   # cached answers are tied to the scan verdict
+                                        model=routed_model,
+                                        messages=messages,
+                                        max_tokens=budget.max_tokens_for(routed_model),  # capped by this model's context
+                                        temperature=0.7,
+                                        usage_callback=budget.settle,  # real usage -> quota + metrics
+                                        cancel=call_cancel             # not sent / cut short after the deadline
+                                    ),
+                                    cancel=cancel)  # hedged calls get child tokens; the loser is cancelled
+                            if from_cache:
+                                print("⚡ Served from completion cache (no OpenAI call)")
+                            turn.note(response_chars=len(ai_response or ""), from_cache=from_cache)
+                            conversation.add_assistant(ai_response or "")
+                            conversation.mark_scanned()
+
+                            print("\n" + "=" * 60)
+                            print("🤖 OPENAI RESPONSE:")
+                            print("=" * 60)
+                            print(ai_response)
+                            print("=" * 60)
+
+                        except Cancelled as cancelled:
+                            print(f"\n⏹️ Request abandoned: {cancelled}")
+                            print("🤖 Response: No answer was generated in time. Please try again.")
+
+                        except Exception as openai_err:
+                            print(f"\n❌ OPENAI ERROR: {openai_err}")
+                            print(
+                                "🤖 Response: A technical error occurred during AI processing.")
+                    else:
+                        print("\n⚠️  OPENAI UNAVAILABLE")
                         print(
-                            "🤖 Response: A technical error occurred during AI processing.")
+                            "🤖 Response: Message passed security screening, but AI processing unavailable.")
+
                 else:
-                    print("\n⚠️  OPENAI UNAVAILABLE")
-                    print(
-                        "🤖 Response: Message passed security screening, but AI processing unavailable.")
+                    conversation.discard_unscanned()
+                    print(f"\n⚠️  UNEXPECTED SECURITY RESULT")
+                    print(f"   Category: {category}")
+                    print(f"   Action: {action}")
+
+            except Cancelled as cancelled:
+                conversation.discard_unscanned()  # fail closed: an abandoned scan is a failed scan
+                print(f"\n⏹️ Scan cancelled: {cancelled}")
+                print("🤖 Response: Security scanning did not finish in time. Please try again.")
 
-            else:
-                print(f"\n⚠️  UNEXPECTED SECURITY RESULT")
-                print(f"   Category: {category}")
-                print(f"   Action: {action}")
+            except AISecSDKException as sdk_err:
+                conversation.discard_unscanned()
+                print(f"\n❌ SDK ERROR: {sdk_err}")
+                print("🤖 Response: SDK security scanning encountered an issue.")
 
-        except AISecSDKException as sdk_err:
-            print(f"\n❌ SDK ERROR: {sdk_err}")
-            print("🤖 Response: SDK security scanning encountered an issue.")
+            except Exception as general_err:
+                conversation.discard_unscanned()
+                print(f"\n❌ UNEXPECTED ERROR: {general_err}")
+                print("🤖 Response: An unexpected error occurred during processing.")
 
-        except Exception as general_err:
-            print(f"\n❌ UNEXPECTED ERROR: {general_err}")
-            print("🤖 Response: An unexpected error occurred during processing.")
+            turn.finish()
+    finally:
+        # 🔚 Refuse new work, drain in-flight scans and completions
+        # (SHUTDOWN_DRAIN_SECONDS), flush the audit log, close pools and threads
+        lifecycle.shutdown()
 
 
 if __name__ == "__main__":
@@ -768,6 +628,8 @@ if __name__ == "__main__":
         asyncio.run(main())
     except KeyboardInterrupt:
         print("\n\n👋 Python SDK chatbot terminated by user. Goodbye!")
+    except lifecycle.ShutdownRequested:
+        print("\n👋 Python SDK chatbot stopped (SIGTERM). Goodbye!")
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
         print("Please check your configuration and try again.")
\ No newline at end of file
@@ -150,12 +150,54 @@ def validate_setup():
             print("⚠️  Palo Alto Networks AI Security SDK not found")
             print("   Install with: pip install pan-aisecurity")
         
-        return True
+        return check_connectivity()
         
     except ImportError as e:
         print(f"❌ Import error: {e}")
         return False
 
+def _configured(value):
+    """True for a real setting, False for empty or .env.example placeholders"""
+    return bool(value) and not value.startswith("your_")
+
+def check_connectivity():
+    """Resolve and connect to the services, and probe-scan when keys are set"""
+    print("\n🌐 CHECKING CONNECTIVITY...")
+
+    try:
+        import warmup
+        from chatbot_settings import get_settings
+        settings = get_settings()
+    except Exception as e:
+        print(f"❌ Could not load settings: {e}")
+        return False
+
+    # A probe scan needs real Palo Alto credentials; OpenAI needs a real key
+    scan = None
+    if _configured(settings.panw_ai_sec_api_key) and _configured(settings.panw_ai_sec_profile_name):
+        from secure_chatbot_openai_api import get_api_scanner
+        scan = get_api_scanner(
+            settings.panw_ai_sec_api_key, settings.panw_ai_sec_profile_name, None).probe
+    else:
+        print("   Palo Alto API key not set yet - skipping the probe scan")
+
+    openai_client = None
+    if _configured(settings.openai_api_key):
+        from openai import OpenAI
+        openai_client = OpenAI(api_key=settings.openai_api_key)
+    else:
+        print("   OpenAI API key not set yet - skipping the OpenAI check")
+
+    report = warmup.warm_up(settings.panw_ai_sec_endpoint, scan=scan, openai_client=openai_client)
+    failed = [step for step, result in report.items() if isinstance(result, str)]
+    if failed:
+        print(f"⚠️  Connectivity problems: {', '.join(failed)}")
+        print("   Check your network, firewall/proxy settings and API keys")
+        return False
+
+    print("✅ Security and AI services reachable")
+    return True
+
 def display_next_steps():
     """Display next steps for the user"""
     print("\n🎯 NEXT STEPS:")
@@ -0,0 +1,30 @@
+# 🧪 Shared test setup: import the flat modules from the repository root and
+# keep every test's metrics and audit files to itself.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AUDIT_ENABLED", "false")  # tests that audit use their own AuditSink
+
+import chatbot_settings  # noqa: E402
+import metrics  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def override_settings(monkeypatch):
+    """Call override_settings(name=value, ...) to change settings for one test."""
+    def override(**values):
+        settings = chatbot_settings.get_settings().model_copy(update=values)
+        monkeypatch.setattr(chatbot_settings, "_settings", settings)
+        return settings
+    return override
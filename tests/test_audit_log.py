@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+import audit_log
+import metrics
+from audit_log import AuditSink, iter_records
+
+
+@pytest.fixture
+def audit_settings(override_settings):
+    return override_settings(audit_flush_interval_ms=10, audit_fsync_interval_seconds=0,
+                             audit_segment_max_bytes=1024, audit_compress=True)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_segments_rotate_and_are_compressed_on_close(tmp_path, audit_settings):
+    sink = AuditSink(tmp_path)
+    for n in range(40):
+        sink.record({"n": n, "padding": "x" * 100})
+        time.sleep(0.002)
+    sink.close()
+
+    segments = sorted(tmp_path.glob("audit-*"))
+    assert len(segments) > 1
+    assert all(p.name.endswith(".jsonl.gz") for p in segments)
+    assert [r["n"] for r in iter_records(tmp_path)] == list(range(40))
+    assert not sink._thread.is_alive()
+
+
+def test_records_after_close_are_dropped(tmp_path, audit_settings):
+    sink = AuditSink(tmp_path)
+    sink.close()
+    assert sink.record({"n": 1}) is False
+    assert sink.dropped == 1
+
+
+def test_unencodable_record_is_dropped_and_the_writer_keeps_going(tmp_path, audit_settings):
+    sink = AuditSink(tmp_path)
+    sink.record({"n": 1})
+    sink.record({"n": 2, "bad": object()})
+    sink.record({"n": 3})
+    wait_for(lambda: sink.records_written == 2)
+    sink.record({"n": 4})
+    sink.close()
+
+    assert [r["n"] for r in iter_records(tmp_path)] == [1, 3, 4]
+    assert sink.dropped == 1
+    assert metrics.snapshot()["counters"]["audit_encode_errors_total"] == 1
+
+
+class FailingSegment:
+    """A segment file whose first write fails, like a full disk."""
+
+    def __init__(self, file):
+        self.file = file
+        self.failed = False
+
+    def write(self, data):
+        if not self.failed:
+            self.failed = True
+            raise OSError(28, "No space left on device")
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_write_error_closes_the_segment_and_starts_a_new_one(tmp_path, audit_settings, monkeypatch):
+    opened = []
+
+    def fake_open(path, mode="r", *args, **kwargs):
+        file = open(path, mode, *args, **kwargs)
+        if mode == "xb" and not opened:
+            file = FailingSegment(file)
+            opened.append(file)
+        return file
+
+    monkeypatch.setattr(audit_log, "open", fake_open, raising=False)
+    sink = AuditSink(tmp_path)
+    sink.record({"n": 1})
+    wait_for(lambda: sink.dropped == 1)
+    assert opened[0].file.closed
+    sink.record({"n": 2})
+    sink.close()
+
+    assert [r["n"] for r in iter_records(tmp_path)] == [2]
+    assert len(list(tmp_path.glob("audit-*.jsonl.gz"))) == 2
@@ -0,0 +1,42 @@
+from conversation import ConversationStore
+
+
+def test_adding_messages_enforces_the_byte_limit():
+    store = ConversationStore(max_tokens=10_000, max_sessions=10, max_bytes=200)
+    old = store.get("old")
+    old.add_user("x" * 100)
+    current = store.get("current")
+    current.add_user("y" * 150)
+
+    assert list(store._sessions) == ["current"]
+    assert store.total_bytes() <= 200
+
+
+def test_adding_messages_keeps_the_growing_session():
+    store = ConversationStore(max_tokens=10_000, max_sessions=10, max_bytes=100)
+    current = store.get("current")
+    current.add_user("z" * 500)  # alone over the limit: kept, nothing else to drop
+
+    assert len(store) == 1
+    assert store.get("current") is current
+
+
+def test_adding_to_a_session_makes_it_most_recent():
+    store = ConversationStore(max_tokens=10_000, max_sessions=10, max_bytes=250)
+    first = store.get("first")
+    store.get("second").add_user("b" * 100)
+    first.add_user("a" * 100)  # "first" is now the most recently used
+    store.get("third").add_user("c" * 100)
+
+    sessions = list(store._sessions)
+    assert "second" not in sessions
+    assert sessions == ["first", "third"]
+
+
+def test_a_dropped_session_can_still_be_added_to():
+    store = ConversationStore(max_tokens=10_000, max_sessions=10, max_bytes=1000)
+    conversation = store.get("gone")
+    store.drop("gone")
+    conversation.add_user("still works")
+
+    assert len(store) == 0
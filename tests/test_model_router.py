@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from cancellation import CancelToken
+from model_router import AllModelsFailed, ModelRouter
+from token_budget import TokenReservation, TokenShaper
+
+
+class APITimeoutError(Exception):
+    """Named like the OpenAI SDK's timeout, so the router fails over on it."""
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.charged = 0
+        self.refunded = 0
+
+    def charge(self, amount):
+        self.charged += amount
+
+    def refund(self, amount):
+        self.refunded += amount
+
+
+def usage(total):
+    return {"prompt_tokens": 10, "completion_tokens": total - 10, "total_tokens": total}
+
+
+@pytest.fixture
+def router():
+    router = ModelRouter()
+    yield router
+    router.close()
+
+
+def test_backup_wins_and_slow_call_is_cancelled(router):
+    tokens = {}
+
+    def request(model, cancel):
+        tokens[model] = cancel
+        if model == "slow":
+            cancel._event.wait(5)
+            return "late answer"
+        return "fast answer"
+
+    parent = CancelToken()
+    assert router._call_hedged(["slow", "fast"], request, 0.05, parent) == "fast answer"
+    assert tokens["slow"].cancelled and tokens["slow"].reason == "hedge_lost"
+    assert not tokens["fast"].cancelled
+    assert not parent.cancelled
+    assert parent._callbacks == []  # children released
+
+
+def test_both_hedged_calls_are_charged(router):
+    limiter = RecordingLimiter()
+    budget = TokenReservation(limiter, "chat", "slow", prompt_tokens=10, max_tokens=90)
+    slow_done = threading.Event()
+
+    def request(model, cancel):
+        if model == "slow":
+            cancel._event.wait(5)
+            budget.settle(usage(80))  # OpenAI already generated these tokens
+            slow_done.set()
+            return "late"
+        budget.settle(usage(60))
+        return "fast"
+
+    with budget:
+        assert router._call_hedged(["slow", "fast"], request, 0.05) == "fast"
+    assert slow_done.wait(5)
+
+    assert budget.used == 140
+    # 60 paid from the 100 reserved, 40 given back at exit, the loser's 80 charged
+    assert limiter.refunded == 40
+    assert limiter.charged == 80
+
+
+def test_parent_cancel_reaches_every_call(router):
+    seen = []
+
+    def request(model, cancel):
+        cancel._event.wait(5)
+        seen.append(model)
+        raise APITimeoutError(model)
+
+    parent = CancelToken()
+    threading.Timer(0.3, parent.cancel).start()
+    with pytest.raises(AllModelsFailed):
+        router._call_hedged(["a", "b"], request, 0.05, parent)
+    assert sorted(seen) == ["a", "b"]
+
+
+def test_failover_after_error_and_non_failover_error_is_raised(router):
+    def flaky(model, cancel):
+        if model == "a":
+            raise APITimeoutError("a timed out")
+        return f"answer from {model}"
+
+    assert router._call_hedged(["a", "b"], flaky, 5) == "answer from b"
+
+    def bad_request(model, cancel):
+        raise ValueError("400 bad request")
+
+    with pytest.raises(ValueError):
+        router._call_hedged(["a", "b"], bad_request, 5)
+
+
+def test_all_models_failing_raises(router):
+    def failing(model, cancel):
+        time.sleep(0.01)
+        raise APITimeoutError(model)
+
+    with pytest.raises(AllModelsFailed):
+        router._call_hedged(["a", "b", "c"], failing, 0.005)
+
+
+def test_max_tokens_fit_each_routed_model(override_settings, router):
+    override_settings(openai_model="big", openai_fallback_models=("small",),
+                      model_context_tokens=128000, model_context_overrides={"small": 4000},
+                      completion_max_tokens=800, openai_tokens_per_minute=0)
+    budget = TokenShaper().reserve("chat", "big", [{"role": "user", "content": "x" * 13800}])
+
+    assert router.candidates("chat", budget.prompt_tokens) == ["big", "small"]
+    assert budget.max_tokens_for("big") == 800
+    small = budget.max_tokens_for("small")
+    assert budget.prompt_tokens + small <= 4000
+    assert small < budget.max_tokens  # never more than was reserved
+
+
+def test_close_stops_hedge_threads(override_settings):
+    override_settings(model_hedge_workers=3)
+    router = ModelRouter()
+    assert router._call_hedged(["a", "b"], lambda model, cancel: model, 5) == "a"
+    pool = router._pool
+    assert pool._max_workers == 3
+    router.close()
+    assert router._pool is None
+    assert not any(thread.is_alive() for thread in pool._threads)
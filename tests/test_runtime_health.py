@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from runtime_health import ExecutorSaturated, InstrumentedExecutor
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def gate():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_max_queue_zero_runs_one_task_per_thread(gate):
+    executor = InstrumentedExecutor(max_workers=2, name="test", max_queue=0)
+    try:
+        running = [executor.submit(gate.wait, 5) for _ in range(2)]
+        with pytest.raises(ExecutorSaturated):
+            executor.submit(gate.wait, 5)
+        assert metrics.snapshot()["counters"]['executor_rejected_total{executor="test"}'] == 1
+
+        gate.set()
+        for future in running:
+            future.result(5)
+        wait_for(lambda: executor.active == 0)
+        assert executor.stats()["queued"] == 0
+        assert executor.submit(lambda: "ok").result(5) == "ok"
+    finally:
+        executor.shutdown()
+
+
+def test_max_queue_counts_only_tasks_waiting_for_a_thread(gate):
+    executor = InstrumentedExecutor(max_workers=2, name="test", max_queue=1)
+    try:
+        futures = [executor.submit(gate.wait, 5) for _ in range(3)]
+        wait_for(lambda: executor.active == 2)
+        assert executor.waiting() == 1
+        with pytest.raises(ExecutorSaturated):
+            executor.submit(gate.wait, 5)
+
+        gate.set()
+        for future in futures:
+            future.result(5)
+        wait_for(lambda: executor.active == 0)
+        assert executor.stats()["queued"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_queued_task_gives_back_its_slot(gate):
+    executor = InstrumentedExecutor(max_workers=1, name="test", max_queue=1)
+    running = executor.submit(gate.wait, 5)
+    queued = executor.submit(gate.wait, 5)
+    wait_for(lambda: executor.active == 1)
+    assert queued.cancel()
+
+    assert executor.stats()["queued"] == 0
+    later = executor.submit(lambda: "ok")  # the freed slot accepts a new task
+    gate.set()
+    running.result(5)
+    assert later.result(5) == "ok"
+    executor.shutdown()
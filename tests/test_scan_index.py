@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from audit_log import compress_segment
+from scan_index import ScanIndex
+
+SEGMENT = "audit-20260101T000000-1-0001.jsonl"
+
+
+def record(n, action="allow", threats=()):
+    return {"ts": 1_700_000_000 + n, "tr_id": f"tr-{n}", "profile": "p", "source": "test",
+            "action": action, "threats": list(threats), "prompt_hash": f"h{n}", "scan_ms": 1.0}
+
+
+def write_records(path, records, mode="a"):
+    with open(path, mode) as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+def count(index, table="scans"):
+    return index.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    yield index
+    index.close()
+
+
+def test_ingesting_the_same_segment_twice_adds_nothing(tmp_path, index):
+    write_records(tmp_path / SEGMENT, [record(1), record(2, "block", ["prompt.injection"])])
+
+    assert index.ingest(tmp_path) == 2
+    assert index.ingest(tmp_path) == 0
+    assert count(index) == 2
+    assert count(index, "scan_threats") == 1
+
+
+def test_growing_segment_adds_only_new_lines(tmp_path, index):
+    segment = tmp_path / SEGMENT
+    write_records(segment, [record(1)])
+    with open(segment, "a") as f:
+        f.write('{"tr_id": "torn')  # still being written
+
+    assert index.ingest(tmp_path) == 1
+    with open(segment, "a") as f:
+        f.write('-3"}\n')
+    write_records(segment, [record(4)])
+
+    assert index.ingest(tmp_path) == 2
+    assert count(index) == 3
+
+
+def test_compressed_segment_is_not_ingested_again(tmp_path, index):
+    segment = tmp_path / SEGMENT
+    write_records(segment, [record(1), record(2)])
+    assert index.ingest(tmp_path) == 2
+
+    write_records(segment, [record(3)])
+    compress_segment(segment)
+    assert index.ingest(tmp_path) == 1
+    assert index.ingest(tmp_path) == 0
+    assert sorted(r[1] for r in index.find()[1]) == ["tr-1", "tr-2", "tr-3"]
+
+
+def test_reopened_index_remembers_what_it_ingested(tmp_path, index):
+    write_records(tmp_path / SEGMENT, [record(1), record(2)])
+    index.ingest(tmp_path)
+    index.close()
+
+    reopened = ScanIndex(tmp_path / "index.sqlite3")
+    try:
+        assert reopened.ingest(tmp_path) == 0
+        assert count(reopened) == 2
+    finally:
+        reopened.close()
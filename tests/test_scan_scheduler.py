@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from scan_scheduler import ScanRejected, ScanScheduler
+
+
+def blocking_scan(gate):
+    def scan(prompt):
+        if prompt == "hold":
+            gate.wait(5)
+        return {"action": "allow", "prompt": prompt}
+    return scan
+
+
+def test_cancelled_future_is_shed_without_killing_the_worker():
+    gate = threading.Event()
+    scheduler = ScanScheduler(blocking_scan(gate), workers=1,
+                              max_wait_seconds={"interactive": 0.1})
+    try:
+        first = scheduler.submit("hold")
+        cancelled = scheduler.submit("cancel me")
+        stale = scheduler.submit("too old")
+        assert cancelled.cancel()
+        time.sleep(0.2)
+        gate.set()
+
+        assert first.result(5)["prompt"] == "hold"
+        with pytest.raises(ScanRejected):
+            stale.result(5)
+        assert all(thread.is_alive() for thread in scheduler._threads)
+        assert scheduler.submit("later").result(5)["prompt"] == "later"
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancelled_future_updates_queue_gauge():
+    gate = threading.Event()
+    scheduler = ScanScheduler(blocking_scan(gate), workers=1)
+    try:
+        first = scheduler.submit("hold")
+        time.sleep(0.05)
+        queued = scheduler.submit("cancel me")
+        assert queued.cancel()
+        gate.set()
+        first.result(5)
+        time.sleep(0.1)  # the worker pops and skips the cancelled scan
+        assert scheduler.queue_depths()["interactive"] == 0
+        assert metrics.snapshot()["gauges"]['scan_queue_depth{priority="interactive"}'] == 0
+    finally:
+        scheduler.shutdown()
+
+
+def test_shutdown_without_wait_sheds_queued_and_cancelled_futures():
+    gate = threading.Event()
+    scheduler = ScanScheduler(blocking_scan(gate), workers=1)
+    first = scheduler.submit("hold")
+    time.sleep(0.05)
+    cancelled = scheduler.submit("cancel me")
+    queued = scheduler.submit("queued")
+    assert cancelled.cancel()
+    threading.Timer(0.1, gate.set).start()
+
+    scheduler.shutdown(wait=False)  # must not raise InvalidStateError
+
+    assert first.result(5)["prompt"] == "hold"
+    with pytest.raises(ScanRejected):
+        queued.result(0)
+    assert not any(thread.is_alive() for thread in scheduler._threads)
+
+
+def test_failing_scan_fails_only_its_future():
+    def scan(prompt):
+        if prompt == "boom":
+            raise RuntimeError("scan failed")
+        return {"prompt": prompt}
+
+    scheduler = ScanScheduler(scan, workers=1)
+    try:
+        with pytest.raises(RuntimeError):
+            scheduler.submit("boom").result(5)
+        assert scheduler.submit("ok").result(5)["prompt"] == "ok"
+    finally:
+        scheduler.shutdown()
+
+
+def test_full_queue_rejects_at_once():
+    gate = threading.Event()
+    scheduler = ScanScheduler(blocking_scan(gate), workers=1,
+                              queue_limits={"interactive": 1, "batch": 1, "background": 1})
+    try:
+        first = scheduler.submit("hold")
+        time.sleep(0.05)
+        scheduler.submit("queued")
+        with pytest.raises(ScanRejected):
+            scheduler.submit("one too many").result(0)
+        gate.set()
+        first.result(5)
+    finally:
+        scheduler.shutdown()
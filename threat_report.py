@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                   📈 THREAT ANALYTICS REPORT OVER SCAN HISTORY              ║
+# ║  🛡️ SECURITY TOOLING: the aggregate view scan_report.py lacks             ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Streams the audit log (audit_log.iter_records) in fixed-size chunks,   ║
+# ║    so memory stays flat however many days of traffic are summarised      ║
+# ║  • Reports threat rates by type and category, block rates by profile,     ║
+# ║    scan latency percentiles and the most repeated blocked prompt hashes   ║
+# ║  • Each chunk is split into columns and each column counted in one pass: ║
+# ║    C-level Counter updates for labels, and a vectorised NumPy histogram  ║
+# ║    for latencies when NumPy is installed (auto-detected)                 ║
+# ║                                                                            ║
+# ║  BOUNDED MEMORY:                                                           ║
+# ║  • Latency percentiles come from a fixed log-spaced histogram (2% wide    ║
+# ║    buckets), not from keeping every sample                                ║
+# ║  • At most TOP_HASH_CAPACITY blocked prompt hashes are tracked; rarer     ║
+# ║    ones are evicted, so reported repeat counts are lower bounds           ║
+# ║                                                                            ║
+# ║  Usage: python threat_report.py [--since 24h] [--profile P] [--json]      ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import bisect
+import importlib.util
+import math
+import sys
+import time
+from collections import Counter
+from itertools import compress
+
+import audit_log
+import json_codec
+from scan_index import parse_time
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+CHUNK_RECORDS = 65536          # records turned into columns per pass
+TOP_HASH_CAPACITY = 10000      # blocked prompt hashes tracked at once
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Latency histogram bucket edges: 0.1ms to 10 minutes, each 2% wider than the last
+_LATENCY_EDGES = [0.1 * 1.02 ** i for i in range(int(math.log(6e6) / math.log(1.02)) + 2)]
+
+
+def _histogram(samples):
+    """Counts per latency bucket (len(_LATENCY_EDGES) + 1 buckets)."""
+    if NUMPY_AVAILABLE:
+        buckets = np.searchsorted(_LATENCY_EDGES, np.asarray(samples, dtype=float), side="right")
+        return np.bincount(buckets, minlength=len(_LATENCY_EDGES) + 1).tolist()
+    counts = [0] * (len(_LATENCY_EDGES) + 1)
+    for sample in samples:
+        counts[bisect.bisect_right(_LATENCY_EDGES, sample)] += 1
+    return counts
+
+
+class ThreatReport:
+    """
+    📈 RUNNING AGGREGATES OVER AUDIT RECORDS
+
+    Feed records with add(), then read summary() or print_report(). Only
+    counters and a fixed-size histogram are kept, never the records.
+    """
+
+    def __init__(self):
+        self.scans = 0
+        self.errors = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.actions = Counter()
+        self.categories = Counter()
+        self.threats = Counter()
+        self.profile_scans = Counter()
+        self.profile_blocks = Counter()
+        self.latency_buckets = [0] * (len(_LATENCY_EDGES) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.blocked_hashes = Counter()
+        self.hash_error = 0    # most a hash's count may be under-reported after evictions
+
+    def add(self, records):
+        """➕ Aggregate an iterable of audit records, CHUNK_RECORDS at a time."""
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= CHUNK_RECORDS:
+                self._add_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._add_chunk(chunk)
+        return self
+
+    def _add_chunk(self, chunk):
+        # 🧱 Split the chunk into columns, then count each column in one pass
+        actions = [r.get("action") or "error" for r in chunk]
+        blocked = [1 if a == "block" else 0 for a in actions]
+        profiles = [r.get("profile") or "" for r in chunk]
+        latencies = [r["scan_ms"] for r in chunk if r.get("scan_ms") is not None and r.get("action") != "error"]
+        threats = [t for r in chunk for t in r.get("threats") or ()]
+        blocked_hashes = [r["prompt_hash"] for r, b in zip(chunk, blocked) if b and r.get("prompt_hash")]
+
+        self.scans += len(chunk)
+        timestamps = [r["ts"] for r in chunk if r.get("ts")]
+        if timestamps:
+            first, last = min(timestamps), max(timestamps)
+            self.first_ts = first if self.first_ts is None else min(self.first_ts, first)
+            self.last_ts = last if self.last_ts is None else max(self.last_ts, last)
+        self.actions.update(actions)
+        self.errors = self.actions["error"]
+        self.categories.update(r.get("category") or "unknown" for r in chunk if r.get("action") != "error")
+        self.threats.update(threats)
+        self.profile_scans.update(profiles)
+        self.profile_blocks.update(compress(profiles, blocked))
+
+        if latencies:
+            self.latency_buckets = [a + b for a, b in zip(self.latency_buckets, _histogram(latencies))]
+            self.latency_sum += math.fsum(latencies)
+            self.latency_max = max(self.latency_max, max(latencies))
+
+        self.blocked_hashes.update(blocked_hashes)
+        if len(self.blocked_hashes) > 2 * TOP_HASH_CAPACITY:
+            # Keep the most repeated hashes; remember the largest count thrown away
+            kept = self.blocked_hashes.most_common(TOP_HASH_CAPACITY)
+            self.hash_error = max(self.hash_error, self.blocked_hashes[kept[-1][0]])
+            self.blocked_hashes = Counter(dict(kept))
+
+    def percentile(self, p):
+        """⏱️ Approximate p-th percentile of scan latency in ms (upper bucket edge)."""
+        total = sum(self.latency_buckets)
+        if not total:
+            return None
+        rank = math.ceil(total * p / 100)
+        seen = 0
+        for index, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= rank:
+                edge = _LATENCY_EDGES[index] if index < len(_LATENCY_EDGES) else self.latency_max
+                return round(min(edge, self.latency_max), 2)
+        return self.latency_max
+
+    def summary(self, top=10):
+        """📋 The report as a plain dict (what --json prints)."""
+        scanned = self.scans - self.errors
+        measured = sum(self.latency_buckets)
+        return {
+            "scans": self.scans,
+            "errors": self.errors,
+            "from": self.first_ts,
+            "to": self.last_ts,
+            "actions": dict(self.actions),
+            "category_rates": {c: n / scanned for c, n in self.categories.most_common()} if scanned else {},
+            "threat_rates": {t: n / scanned for t, n in self.threats.most_common()} if scanned else {},
+            "profiles": {p: {"scans": n, "blocked": self.profile_blocks[p],
+                             "block_rate": self.profile_blocks[p] / n}
+                         for p, n in self.profile_scans.most_common()},
+            "latency_ms": {
+                "mean": round(self.latency_sum / measured, 2) if measured else None,
+                "max": self.latency_max if measured else None,
+                **{f"p{p:g}": self.percentile(p) for p in PERCENTILES},
+            },
+            "top_blocked_prompt_hashes": [
+                {"prompt_hash": h, "blocked": n} for h, n in self.blocked_hashes.most_common(top) if n > 1
+            ],
+            "top_hash_count_error": self.hash_error,
+        }
+
+    def print_report(self, top=10):
+        """🖨️ Print the human-readable report."""
+        s = self.summary(top)
+        span = ""
+        if s["from"]:
+            fmt = "%Y-%m-%d %H:%M:%S"
+            span = f" from {time.strftime(fmt, time.gmtime(s['from']))} to {time.strftime(fmt, time.gmtime(s['to']))} UTC"
+        print(f"\n📈 THREAT ANALYTICS REPORT{span}")
+        print("=" * 60)
+        print(f"🔍 Scans: {s['scans']:,}   🚫 Blocked: {s['actions'].get('block', 0):,}   "
+              f"❌ Failed: {s['errors']:,}")
+
+        print("\n🚦 Category rates:")
+        for category, rate in s["category_rates"].items():
+            print(f"   {category:<24} {rate:8.2%}")
+
+        print("\n🎯 Threat rates (share of scans flagged):")
+        if not s["threat_rates"]:
+            print("   none detected")
+        for threat, rate in s["threat_rates"].items():
+            print(f"   {threat:<24} {rate:8.2%}  ({self.threats[threat]:,})")
+
+        print("\n👤 Block rate by profile:")
+        for profile, row in s["profiles"].items():
+            print(f"   {profile or '(none)':<24} {row['block_rate']:8.2%}  "
+                  f"({row['blocked']:,} of {row['scans']:,})")
+
+        latency = s["latency_ms"]
+        print("\n⏱️  Scan latency (ms):")
+        if latency["mean"] is None:
+            print("   no successful scans")
+        else:
+            print("   " + "  ".join(f"{name}={value}" for name, value in latency.items()))
+
+        print("\n🔁 Most repeated blocked prompts (by hash):")
+        if not s["top_blocked_prompt_hashes"]:
+            print("   no blocked prompt was seen more than once")
+        for row in s["top_blocked_prompt_hashes"]:
+            print(f"   {row['blocked']:>8,}x  {row['prompt_hash']}")
+        if s["top_hash_count_error"]:
+            print(f"   (counts may be low by up to {s['top_hash_count_error']})")
+
+
+def filter_records(records, since=None, until=None, profile=None):
+    """🔎 Only the records inside the time window and (optionally) one profile."""
+    for record in records:
+        ts = record.get("ts", 0.0)
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts >= until:
+            continue
+        if profile is not None and record.get("profile") != profile:
+            continue
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threat analytics report over the scan audit history")
+    parser.add_argument("--audit-dir", help="audit segments (default AUDIT_DIR)")
+    parser.add_argument("--since", type=parse_time, help="e.g. 24h, 7d, 2025-01-31")
+    parser.add_argument("--until", type=parse_time)
+    parser.add_argument("--profile")
+    parser.add_argument("--top", type=int, default=10, help="repeated blocked prompts to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = ThreatReport().add(filter_records(
+        audit_log.iter_records(args.audit_dir), args.since, args.until, args.profile))
+    elapsed = time.perf_counter() - start
+    if args.json:
+        print(json_codec.dumps(report.summary(args.top)).decode("utf-8"))
+    else:
+        report.print_report(args.top)
+        print(f"\n⚡ {report.scans:,} records in {elapsed:.2f}s "
+              f"(latency histogram: {'numpy' if NUMPY_AVAILABLE else 'pure Python'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
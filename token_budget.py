@@ -0,0 +1,180 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 🧮 TOKEN COUNTING, BUDGETS AND QUOTA FOR OPENAI             ║
+# ║  🧠 CHATBOT COMPONENT: Runs only AFTER a message passed security scanning  ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Counts prompt tokens locally before sending (tiktoken when installed,  ║
+# ║    otherwise the ~4-characters-per-token estimate); the tokenizer is      ║
+# ║    loaded once per model and cached                                       ║
+# ║  • Picks max_tokens per request from the route's budget and what is left  ║
+# ║    of the model's context window                                          ║
+# ║  • Tokens-per-minute limiter: a request reserves prompt + max_tokens,     ║
+# ║    every OpenAI call it makes (hedged calls too) is charged its real      ║
+# ║    usage, and the unused part is given back when the request is done     ║
+# ║  • Records real usage (prompt / completion tokens) per route and model    ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import functools
+import importlib.util
+import threading
+
+import conversation
+import metrics
+from chatbot_settings import get_settings
+from rate_limit import TokenBucket
+
+REPLY_PRIMING_TOKENS = 3   # every reply is primed with <|start|>assistant<|message|>
+
+
+class PromptTooLarge(ValueError):
+    """📏 The prompt alone leaves no room for an answer in the model's context."""
+
+
+@functools.lru_cache(maxsize=16)
+def get_token_counter(model):
+    """
+    🧮 Return count(text) -> int for `model`, cached per model.
+
+    Uses tiktoken when it is installed (exact counts); otherwise falls back
+    to conversation's character-based estimate.
+    """
+    if importlib.util.find_spec("tiktoken") is None:
+        return conversation._estimate_tokens
+    import tiktoken  # loaded on first use; building an encoding is slow
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def install_token_counter(model=None):
+    """🔌 Make conversation history trimming use the real tokenizer for `model`."""
+    conversation.set_token_counter(get_token_counter(model or get_settings().openai_model))
+
+
+def context_tokens(model):
+    """📏 Context window of `model`: MODEL_CONTEXT_OVERRIDES, else MODEL_CONTEXT_TOKENS."""
+    settings = get_settings()
+    return settings.model_context_overrides.get(model, settings.model_context_tokens)
+
+
+def count_prompt_tokens(messages, model):
+    """Tokens a chat.completions request for `messages` will use before the answer."""
+    counter = get_token_counter(model)
+    return sum(counter(m["content"]) + conversation.MESSAGE_OVERHEAD_TOKENS
+               for m in messages) + REPLY_PRIMING_TOKENS
+
+
+class TokenReservation:
+    """
+    🎟️ ONE REQUEST'S SHARE OF THE TOKENS-PER-MINUTE QUOTA
+
+    Use as a context manager. settle(usage) charges one OpenAI call's real
+    usage and may be called once per call (a hedged request makes two):
+    usage is paid from the reservation first, anything beyond it is charged
+    on top. Leaving the block gives back whatever was not used (all of it
+    after a cache hit or an error); a call that reports usage later is
+    charged in full.
+    """
+
+    def __init__(self, limiter, route, model, prompt_tokens, max_tokens):
+        self.limiter = limiter
+        self.route = route
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max_tokens
+        self.reserved = prompt_tokens + max_tokens
+        self.used = 0
+        self._unspent = self.reserved   # reserved tokens not yet paid out to a call
+        self._lock = threading.Lock()
+
+    def settle(self, usage):
+        """🧾 Charge one call's actual usage (an OpenAI `response.usage` object or dict)."""
+        get = usage.get if isinstance(usage, dict) else (lambda name: getattr(usage, name, None))
+        prompt = get("prompt_tokens") or 0
+        completion = get("completion_tokens") or 0
+        total = get("total_tokens") or prompt + completion
+        with self._lock:
+            covered = min(total, self._unspent)
+            self._unspent -= covered
+            self.used += total
+        if total > covered:
+            self.limiter.charge(total - covered)
+        labels = {"route": self.route, "model": self.model}
+        metrics.inc("openai_requests_total", **labels)
+        metrics.inc("openai_prompt_tokens_total", prompt, **labels)
+        metrics.inc("openai_completion_tokens_total", completion, **labels)
+        metrics.inc("openai_prompt_tokens_estimated_total", self.prompt_tokens, **labels)
+
+    def max_tokens_for(self, model):
+        """
+        📏 max_tokens to send to `model`: this reservation's budget, capped
+        by the room `model`'s own context window leaves after the prompt. Never
+        more than was reserved, so a failover or hedge to a smaller model
+        still fits its window and the reservation.
+        """
+        room = context_tokens(model) - self.prompt_tokens
+        return max(get_settings().completion_min_tokens, min(self.max_tokens, room))
+
+    def cancel(self):
+        """↩️ The request is done: return the part of the reservation no call used."""
+        with self._lock:
+            unspent, self._unspent = self._unspent, 0
+        if unspent:
+            self.limiter.refund(unspent)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cancel()
+
+
+class TokenShaper:
+    """
+    📐 SIZES AND PACES OPENAI REQUESTS
+
+    Settings:
+    - COMPLETION_MAX_TOKENS: default answer budget for any route
+    - COMPLETION_ROUTE_MAX_TOKENS: per-route budgets, e.g. "chat=800,summary=300"
+    - MODEL_CONTEXT_TOKENS / MODEL_CONTEXT_OVERRIDES: context windows (see context_tokens)
+    - OPENAI_TOKENS_PER_MINUTE: quota to stay under (0 = no limit)
+    """
+
+    def __init__(self):
+        self._limiter = None
+        self._limiter_rate = None
+
+    def _get_limiter(self):
+        tpm = get_settings().openai_tokens_per_minute
+        if self._limiter is None or self._limiter_rate != tpm:
+            self._limiter = TokenBucket(tpm / 60.0, capacity=tpm or None)
+            self._limiter_rate = tpm
+        return self._limiter
+
+    def plan_max_tokens(self, route, prompt_tokens, model=None):
+        """📏 Answer budget: the route's budget, capped by the room left in `model`'s context."""
+        settings = get_settings()
+        budget = settings.completion_route_max_tokens.get(route, settings.completion_max_tokens)
+        window = context_tokens(model or settings.openai_model)
+        room = window - prompt_tokens
+        if room < settings.completion_min_tokens:
+            raise PromptTooLarge(f"prompt uses {prompt_tokens} of {window} context tokens")
+        return max(settings.completion_min_tokens, min(budget, room))
+
+    def reserve(self, route, model, messages, timeout=None):
+        """
+        🎟️ Count the prompt, choose max_tokens and wait for quota.
+
+        Returns a TokenReservation; pass reservation.max_tokens_for(routed_model)
+        to OpenAI and reservation.settle to CompletionCache.complete(usage_callback=...).
+        Raises rate_limit.RateLimitExceeded if the quota would take longer
+        than `timeout` seconds to allow the request.
+        """
+        prompt_tokens = count_prompt_tokens(messages, model)
+        max_tokens = self.plan_max_tokens(route, prompt_tokens, model)
+        limiter = self._get_limiter()
+        waited = limiter.acquire(prompt_tokens + max_tokens, timeout=timeout)
+        metrics.observe("openai_quota_wait_ms", waited * 1000, route=route)
+        return TokenReservation(limiter, route, model, prompt_tokens, max_tokens)
@@ -0,0 +1,157 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                 🎙️ TRAFFIC RECORDER FOR PERFORMANCE REPLAY                  ║
+# ║  ⚙️ SYSTEM COMPONENT: captures the shape of real chat traffic             ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • For every chat turn, records when it arrived, how big the scanned     ║
+# ║    text was, the scan verdict, and how long the scan and the OpenAI call ║
+# ║    took - one JSON line per turn in TRAFFIC_RECORD_PATH                  ║
+# ║  • Prompt text is NEVER written: only its length and a hash (keyed with  ║
+# ║    AUDIT_HASH_KEY when set, like the audit log)                          ║
+# ║  • benchmarks/replay_traffic.py re-drives a recording against the local  ║
+# ║    stand-ins at 1x or Nx speed to catch throughput and tail-latency      ║
+# ║    regressions                                                           ║
+# ║  • Off unless TRAFFIC_RECORD_PATH is set; then start_turn() hands out a  ║
+# ║    no-op turn and costs nothing                                          ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import contextlib
+import threading
+import time
+
+import audit_log
+import json_codec
+from chatbot_settings import get_settings
+
+
+class RecordedTurn:
+    """
+    🎙️ ONE CHAT TURN BEING RECORDED
+
+    Time stages with `with turn.stage("scan"):`, add facts with note(),
+    and call finish() once the turn is over.
+    """
+
+    def __init__(self, recorder, prompt):
+        self._recorder = recorder
+        self._finished = False
+        self.fields = {
+            "t": round(time.monotonic() - recorder.started, 6),  # arrival, seconds into the recording
+            "prompt_hash": audit_log.prompt_hash(prompt),
+            "prompt_chars": len(prompt),
+        }
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """⏱️ Record how long the block takes as <name>_ms."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.fields[f"{name}_ms"] = round((time.monotonic() - start) * 1000, 3)
+
+    def note(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self):
+        if not self._finished:
+            self._finished = True
+            self._recorder.write(self.fields)
+
+
+class _NullTurn:
+    """Stands in for RecordedTurn when recording is off."""
+
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def note(self, **fields):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_TURN = _NullTurn()
+
+
+class TrafficRecorder:
+    """
+    🎙️ APPENDS ONE LINE PER TURN TO A RECORDING FILE
+
+    The first line of a new recording is a header with the wall-clock start
+    time; turn times ("t") are seconds after it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        self.write({"recording_started": time.time()})
+
+    def start_turn(self, prompt):
+        return RecordedTurn(self, prompt)
+
+    def write(self, fields):
+        line = json_codec.dumps(fields) + b"\n"
+        with self._lock:
+            if self._file.closed:
+                return  # a turn that finished after shutdown closed the recording
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_traffic_recorder():
+    """🎙️ The process-wide recorder, or None when TRAFFIC_RECORD_PATH is unset."""
+    global _recorder
+    path = get_settings().traffic_record_path
+    if not path:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = TrafficRecorder(path)
+            print(f"🎙️ Recording traffic shape to {path} (prompt text is not stored)")
+        return _recorder
+
+
+def close_traffic_recorder():
+    """🔒 Close the recording file (a later turn reopens it and appends)."""
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+
+
+def start_turn(prompt):
+    """🎙️ Begin recording a turn whose scanned text is `prompt` (no-op when off)."""
+    recorder = get_traffic_recorder()
+    return recorder.start_turn(prompt) if recorder is not None else _NULL_TURN
+
+
+def load_recording(path):
+    """📖 Turns of a recording, oldest first, as dicts (header lines skipped)."""
+    turns = []
+    offset = 0.0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                entry = json_codec.loads(line)
+            except ValueError:
+                continue
+            if "recording_started" in entry:
+                # Appended sessions restart "t" at zero; keep them in sequence
+                offset = turns[-1]["t"] if turns else 0.0
+                continue
+            entry["t"] += offset
+            turns.append(entry)
+    return turns
@@ -0,0 +1,228 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║          🛡️ NEAR-DUPLICATE VERDICT REUSE (SIMHASH + BANDED INDEX)          ║
+# ║  ⚠️  SECURITY COMPONENT: decides when a scan can be SKIPPED - be strict!   ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Normalizes prompts (Unicode, case, whitespace, repeated punctuation)   ║
+# ║  • Fingerprints them with a 64-bit SimHash over word shingles and keeps   ║
+# ║    the fingerprints in an in-memory index banded for fast lookup          ║
+# ║  • Reuses ONLY "allow" verdicts, ONLY within the same AI profile, and     ║
+# ║    ONLY when the new prompt is CONTAINED in the cached one: at most      ║
+# ║    SIMILARITY_CACHE_MAX_NEW_SHINGLES shingles (default 0) the cached     ║
+# ║    prompt lacks, and covering most of it. Text appended to an allowed    ║
+# ║    prompt (an injection) is always scanned. The SimHash only finds       ║
+# ║    candidates, it never decides                                           ║
+# ║  • Bounded: TTL expiry plus least-recently-used eviction                  ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from chatbot_settings import get_settings
+
+SIMHASH_BITS = 64
+BANDS = 4                          # 4 bands x 16 bits: any candidate shares one band exactly
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_WHITESPACE = re.compile(r"\s+")
+_REPEATED_PUNCTUATION = re.compile(r"([^\w\s])\1+")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def normalize_prompt(prompt):
+    """
+    🧹 Canonical form used for matching.
+
+    Unicode NFKC, case-folded, whitespace collapsed, runs of the same
+    punctuation character squeezed ("!!!" -> "!"), and leading/trailing
+    punctuation removed. Punctuation INSIDE the text is kept because it can
+    matter for security (URLs, code, file paths).
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _REPEATED_PUNCTUATION.sub(r"\1", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.strip(".,;:!?¿¡ ")
+
+
+def _hash64(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(normalized):
+    """🧩 Hashed word unigrams and bigrams of a normalized prompt."""
+    tokens = _TOKEN.findall(normalized)
+    grams = set(tokens)
+    grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return frozenset(_hash64(gram) for gram in grams)
+
+
+def simhash(shingle_hashes):
+    """🔢 64-bit SimHash: each bit is the majority vote of the shingle hashes."""
+    counts = [0] * SIMHASH_BITS
+    for h in shingle_hashes:
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            value |= 1 << bit
+    return value
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def reusable(new, cached, threshold, max_new):
+    """
+    🔒 Similarity of `new` to `cached` when an allow verdict for `cached`
+    may be reused for `new`, else 0.0.
+
+    Symmetric similarity alone is not enough: a long allowed prompt with an
+    injection appended still scores above 0.9. So `new` must be contained in
+    `cached` (at most max_new shingles that `cached` lacks), and must cover
+    `threshold` of it, so a fragment cut out of context is scanned too.
+    """
+    if len(new - cached) > max_new:
+        return 0.0
+    score = jaccard(new, cached)
+    return score if score >= threshold else 0.0
+
+
+class _Entry:
+    __slots__ = ("profile", "normalized", "shingles", "fingerprint", "verdict", "expires_at")
+
+    def __init__(self, profile, normalized, shingle_set, fingerprint, verdict, expires_at):
+        self.profile = profile
+        self.normalized = normalized
+        self.shingles = shingle_set
+        self.fingerprint = fingerprint
+        self.verdict = verdict
+        self.expires_at = expires_at
+
+
+class VerdictSimilarityIndex:
+    """
+    🗂️ IN-MEMORY INDEX OF RECENT "ALLOW" VERDICTS
+
+    Settings (read at call time):
+    - SIMILARITY_CACHE_ENABLED: master switch (off by default)
+    - SIMILARITY_CACHE_THRESHOLD: minimum Jaccard similarity to reuse (0.9)
+    - SIMILARITY_CACHE_MAX_NEW_SHINGLES: shingles a prompt may add to the
+      cached one (0: it must be contained in it)
+    - SIMILARITY_CACHE_MAX_ENTRIES: entries kept across all profiles
+    - SIMILARITY_CACHE_TTL_SECONDS: how long a verdict may be reused
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()   # entry id -> _Entry (LRU order)
+        self._exact = {}                # (profile, normalized) -> entry id
+        self._bands = {}                # (profile, band, value) -> set of entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _band_keys(profile, fingerprint):
+        return [(profile, band, (fingerprint >> (band * BAND_BITS)) & BAND_MASK)
+                for band in range(BANDS)]
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        if self._exact.get((entry.profile, entry.normalized)) == entry_id:
+            del self._exact[(entry.profile, entry.normalized)]
+        for key in self._band_keys(entry.profile, entry.fingerprint):
+            ids = self._bands.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._bands[key]
+
+    def lookup(self, profile, prompt):
+        """
+        🔍 Return (verdict, similarity) for a near-duplicate, or (None, 0.0).
+
+        The returned verdict is the stored dict; callers should copy it
+        before adding per-request fields.
+        """
+        settings = get_settings()
+        if not settings.similarity_cache_enabled:
+            return None, 0.0
+        normalized = normalize_prompt(prompt)
+        now = time.monotonic()
+        with self._lock:
+            # Tier 1: identical after normalization
+            entry_id = self._exact.get((profile, normalized))
+            if entry_id is not None:
+                entry = self._entries[entry_id]
+                if entry.expires_at > now:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry.verdict, 1.0
+                self._remove(entry_id)
+
+        # Tier 2: candidates sharing a SimHash band, confirmed by containment
+        # plus exact Jaccard (see reusable())
+        shingle_set = shingles(normalized)
+        fingerprint = simhash(shingle_set)
+        best_id, best_score = None, 0.0
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(profile, fingerprint):
+                candidates.update(self._bands.get(key, ()))
+            for entry_id in candidates:
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                score = reusable(shingle_set, entry.shingles, settings.similarity_cache_threshold,
+                                 settings.similarity_cache_max_new_shingles)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is not None:
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+                return self._entries[best_id].verdict, best_score
+            self.misses += 1
+        return None, 0.0
+
+    def add(self, profile, prompt, verdict):
+        """➕ Remember an "allow" verdict (anything else is ignored)."""
+        settings = get_settings()
+        if not settings.similarity_cache_enabled or verdict.get("action") != "allow":
+            return
+        normalized = normalize_prompt(prompt)
+        shingle_set = shingles(normalized)
+        entry = _Entry(profile, normalized, shingle_set, simhash(shingle_set), verdict,
+                       time.monotonic() + settings.similarity_cache_ttl_seconds)
+        with self._lock:
+            old_id = self._exact.get((profile, normalized))
+            if old_id is not None:
+                self._remove(old_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._exact[(profile, normalized)] = entry_id
+            for key in self._band_keys(profile, entry.fingerprint):
+                self._bands.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > settings.similarity_cache_max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._bands.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,178 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                  🔥 STARTUP WARM-UP AND CONNECTION HEALTH                   ║
+# ║  ⚙️ SYSTEM COMPONENT: pays the cold-start costs before the first user     ║
+# ║                                                                            ║
+# ║  WHAT THIS DOES:                                                           ║
+# ║  • Resolves and connects to Palo Alto AIRS and OpenAI at startup, so DNS, ║
+# ║    TCP and TLS set-up are not added to the first user message             ║
+# ║  • Runs one probe scan of a harmless canary prompt (WARMUP_CANARY_PROMPT) ║
+# ║    to load the scan code path and check the profile answers "allow"      ║
+# ║  • Keeps the pooled connections open with periodic pings while idle       ║
+# ║    (WARMUP_KEEPALIVE_SECONDS), since servers drop idle keep-alives        ║
+# ║  • Every step is timed and reported; a failed step is a WARNING, never a  ║
+# ║    reason to skip security scanning later                                ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import metrics
+from chatbot_settings import get_settings
+from endpoint_manager import get_dns_cache
+from http_session import get_http_session
+
+
+def _ms_since(start):
+    return (time.monotonic() - start) * 1000
+
+
+def resolve(url):
+    """
+    🌐 DNS lookup for the host in `url`.
+
+    Returns (addresses, milliseconds). Raises OSError if it does not resolve.
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    start = time.monotonic()
+    # AIRS hosts go through the scan session's DNS cache, so this also primes it
+    infos = get_dns_cache().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    return sorted({info[4][0] for info in infos}), _ms_since(start)
+
+
+def connect_airs(base_url):
+    """
+    🔌 Open a pooled keep-alive connection to AIRS (TCP + TLS).
+
+    Any HTTP status counts as reachable - only the connection matters.
+    Returns milliseconds.
+    """
+    start = time.monotonic()
+    response = get_http_session().head(base_url, timeout=get_settings().http_timeout)
+    response.close()  # hands the connection back to the pool
+    return _ms_since(start)
+
+
+def connect_openai(client, model=None):
+    """
+    🔌 Open the OpenAI client's connection with a cheap metadata call.
+
+    Retrieving the model also confirms the key can use it. Returns milliseconds.
+    """
+    start = time.monotonic()
+    client.models.retrieve(model or get_settings().openai_model)
+    return _ms_since(start)
+
+
+def probe_scan(scan, prompt):
+    """
+    🧪 Scan the canary prompt with scan(prompt) -> verdict dict.
+
+    Pass a scanner's probe() (scanners.SecurityScanner.probe): it prints
+    nothing and the canary is not audited, indexed or cached as if a user
+    had sent it. Returns (verdict, milliseconds); raises RuntimeError if the
+    scan failed.
+    """
+    start = time.monotonic()
+    verdict = scan(prompt)
+    elapsed = _ms_since(start)
+    if not verdict:
+        raise RuntimeError("probe scan returned no verdict")
+    return verdict, elapsed
+
+
+def warm_up(airs_endpoint, scan=None, openai_client=None, model=None, canary_prompt=None):
+    """
+    🔥 Run every warm-up step and print a short report.
+
+    - airs_endpoint: AIRS base URL (resolved and connected)
+    - scan: optional quiet scan(prompt) for the canary probe (a scanner's probe)
+    - openai_client: optional OpenAI client to connect ahead of time
+    - canary_prompt: defaults to WARMUP_CANARY_PROMPT ("" skips the probe)
+
+    Returns {step: milliseconds or error message}. Timings go to the
+    warmup_step_ms metric.
+    """
+    report = {}
+
+    def step(name, func):
+        try:
+            value = func()
+        except Exception as e:
+            report[name] = f"failed: {e}"
+            metrics.inc("warmup_failures_total", step=name)
+            print(f"   ⚠️  {name}: {e}")
+            return None
+        report[name] = value
+        metrics.observe("warmup_step_ms", value, step=name)
+        print(f"   ✅ {name}: {value:.1f}ms")
+        return value
+
+    print("\n🔥 WARMING UP CONNECTIONS...")
+    step("airs_dns", lambda: resolve(airs_endpoint)[1])
+    step("airs_connect", lambda: connect_airs(airs_endpoint))
+
+    canary = get_settings().warmup_canary_prompt if canary_prompt is None else canary_prompt
+    if scan is not None and canary:
+        def run_probe():
+            verdict, elapsed = probe_scan(scan, canary)
+            if verdict.get("action") != "allow":
+                print(f"   ⚠️  Canary prompt was not allowed (action={verdict.get('action')}) "
+                      f"- check WARMUP_CANARY_PROMPT and the security profile")
+            return elapsed
+        step("probe_scan", run_probe)
+
+    if openai_client is not None:
+        step("openai_dns", lambda: resolve(str(openai_client.base_url))[1])
+        step("openai_connect", lambda: connect_openai(openai_client, model))
+    return report
+
+
+class KeepWarm:
+    """
+    💓 BACKGROUND PINGS THAT KEEP POOLED CONNECTIONS OPEN
+
+    Every `interval` seconds (WARMUP_KEEPALIVE_SECONDS; 0 = off) it sends a
+    HEAD to AIRS and, if given, a metadata call to OpenAI. A failed ping is
+    counted (warmup_ping_failures_total) and retried next interval.
+    """
+
+    def __init__(self, airs_endpoint, openai_client=None, model=None, interval=None):
+        self.airs_endpoint = airs_endpoint
+        self.openai_client = openai_client
+        self.model = model
+        self.interval = get_settings().warmup_keepalive_seconds if interval is None else interval
+        self.pings = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="keep-warm", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.ping()
+
+    def ping(self):
+        """💓 Ping every target once."""
+        targets = [("airs", lambda: connect_airs(self.airs_endpoint))]
+        if self.openai_client is not None:
+            targets.append(("openai", lambda: connect_openai(self.openai_client, self.model)))
+        for target, ping in targets:
+            try:
+                metrics.observe("warmup_ping_ms", ping(), target=target)
+            except Exception:
+                metrics.inc("warmup_ping_failures_total", target=target)
+        self.pings += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None